@@ -2,10 +2,15 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, date
 import os
-from utils.data_manager import DataManager
+from utils.services import get_data_manager
+from utils.exports import EXPORTS, EXPORT_QUEUE, EXCEL_MIME
 from login import check_password, show_logout_button, get_current_user, logout
 import plotly.express as px
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Set page configuration at the top level
 st.set_page_config(
     page_title="Whites Management System",
@@ -14,12 +19,7 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
-
-def create_single_page_layout(vehicles_df, maintenance_df, equipment_df, rentals_df):
+def create_single_page_layout():
     """Create single-page layout with all functionality"""
     
     # Header with navigation and user info
@@ -37,33 +37,18 @@ def create_single_page_layout(vehicles_df, maintenance_df, equipment_df, rentals
     </div>
     """, unsafe_allow_html=True)
     
-    # Navigation tabs
-    tab1, tab2, tab5, tab4, tab3, tab6 = st.tabs([
-        "🚗 Vehicles", 
-        "🏗️ Machines",
-        "⚙️ Tool Hire",
-        "🔧 Maintenance", 
-        "📊 Dashboard", 
-        "📈 Statistics"
-    ])
-    
-    with tab1:
-        show_vehicle_inventory_content(vehicles_df)
-    
-    with tab2:
-        show_machine_inventory_content()
-    
-    with tab3:
-        show_maintenance_content(maintenance_df, vehicles_df)
-    
-    with tab4:
-        show_dashboard_content(vehicles_df, maintenance_df, equipment_df, rentals_df)
-    
-    with tab5:
-        show_tool_hire_content(equipment_df, rentals_df)
-    
-    with tab6:
-        show_statistics_content(vehicles_df, maintenance_df, equipment_df, rentals_df)
+    # Navigation: st.tabs runs every tab's code on each rerun, so only the
+    # selected section is rendered, and it loads just the data it shows
+    sections = {
+        "🚗 Vehicles": show_vehicle_inventory_content,
+        "🏗️ Machines": show_machine_inventory_content,
+        "⚙️ Tool Hire": show_tool_hire_content,
+        "🔧 Maintenance": show_maintenance_content,
+        "📊 Dashboard": show_dashboard_content,
+        "📈 Statistics": show_statistics_content,
+    }
+    section = st.radio("Section", list(sections), horizontal=True, key="active_section", label_visibility="collapsed")
+    sections[section]()
     
     # Footer with quick actions and export options
     st.markdown("---")
@@ -139,90 +124,41 @@ def create_single_page_layout(vehicles_df, maintenance_df, equipment_df, rentals
     </style>
     """, unsafe_allow_html=True)
     
+    show_quick_actions()
+    
+    # Poll only while this page is waiting on a workbook
+    if pending_exports(get_data_manager()):
+        show_export_progress()
+
+
+@st.fragment
+def show_quick_actions():
+    """Exports, data summary and logout, rerun on their own when a button is used"""
+    dm = get_data_manager()
+    vehicles_df = dm.load_vehicles()
+    machines_df = dm.load_machines()
+    maintenance_df = dm.load_maintenance()
+    equipment_df = dm.load_equipment()
+    
     col1, col2, col3 = st.columns(3)
     
     with col1:
         st.markdown("### 📥 Quick Export")
         
-        # Get fresh data for machines
-        dm = get_data_manager()
-        machines_df = dm.load_machines()
-        
-        # Vehicles Export
-        if not vehicles_df.empty:
-            excel_vehicles = create_excel_export({"Vehicles": vehicles_df}, "vehicles.xlsx")
-            st.download_button(
-                label="🚗 Vehicles Excel",
-                data=excel_vehicles,
-                file_name=f"vehicles_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
-        else:
-            st.button("🚗 Vehicles Excel", disabled=True, use_container_width=True, help="No vehicles to export")
-        
-        # Machines Export
-        if not machines_df.empty:
-            excel_machines = create_excel_export({"Machines": machines_df}, "machines.xlsx")
-            st.download_button(
-                label="🏗️ Machines Excel",
-                data=excel_machines,
-                file_name=f"machines_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
-        else:
-            st.button("🏗️ Machines Excel", disabled=True, use_container_width=True, help="No machines to export")
-        
-        # Maintenance Export
-        if not maintenance_df.empty:
-            excel_maintenance = create_excel_export({"Maintenance": maintenance_df}, "maintenance.xlsx")
-            st.download_button(
-                label="🔧 Maintenance Excel",
-                data=excel_maintenance,
-                file_name=f"maintenance_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
-        else:
-            st.button("🔧 Maintenance Excel", disabled=True, use_container_width=True, help="No maintenance records to export")
-        
-        # Equipment Export
-        if not equipment_df.empty:
-            excel_equipment = create_excel_export({"Equipment": equipment_df}, "equipment.xlsx")
-            st.download_button(
-                label="⚙️ Equipment Excel",
-                data=excel_equipment,
-                file_name=f"equipment_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
-        else:
-            st.button("⚙️ Equipment Excel", disabled=True, use_container_width=True, help="No equipment to export")
+        # Workbooks are only built when asked for, then reused until the data changes
+        show_export_button(dm, 'vehicles', "🚗", "Vehicles Excel", "vehicles",
+                           not vehicles_df.empty, "No vehicles to export")
+        show_export_button(dm, 'machines', "🏗️", "Machines Excel", "machines",
+                           not machines_df.empty, "No machines to export")
+        show_export_button(dm, 'maintenance', "🔧", "Maintenance Excel", "maintenance",
+                           not maintenance_df.empty, "No maintenance records to export")
+        show_export_button(dm, 'equipment', "⚙️", "Equipment Excel", "equipment",
+                           not equipment_df.empty, "No equipment to export")
         
         # Complete Export (All Data)
         has_any_data = not (vehicles_df.empty and machines_df.empty and maintenance_df.empty and equipment_df.empty)
-        if has_any_data:
-            all_data = {}
-            if not vehicles_df.empty:
-                all_data["Vehicles"] = vehicles_df
-            if not machines_df.empty:
-                all_data["Machines"] = machines_df
-            if not maintenance_df.empty:
-                all_data["Maintenance"] = maintenance_df
-            if not equipment_df.empty:
-                all_data["Equipment"] = equipment_df
-            
-            excel_all = create_excel_export(all_data, "all_data.xlsx")
-            st.download_button(
-                label="📊 Complete Export",
-                data=excel_all,
-                file_name=f"whites_management_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
-        else:
-            st.button("📊 Complete Export", disabled=True, use_container_width=True, help="No data to export")
+        show_export_button(dm, 'all_data', "📊", "Complete Export", "whites_management",
+                           has_any_data, "No data to export")
     
     with col2:
         st.markdown("### 📊 Quick Export")
@@ -247,7 +183,8 @@ def create_single_page_layout(vehicles_df, maintenance_df, equipment_df, rentals
             logout()
 
 
-def show_vehicle_inventory_content(vehicles_df):
+@st.fragment
+def show_vehicle_inventory_content():
     """Vehicle inventory content"""
     st.markdown("### 🚗 Vehicle Inventory Management")
     
@@ -353,82 +290,89 @@ def show_vehicle_inventory_content(vehicles_df):
         else:
             st.dataframe(display_vehicles, use_container_width=True, hide_index=True)
         
-        # Edit vehicle functionality
-        st.markdown("### Edit Vehicle")
-        if not vehicles_df.empty:
-            vehicle_options = [f"{row['make']} {row['model']} ({row['license_plate']})" 
-                             for _, row in vehicles_df.iterrows()]
-            selected_vehicle = st.selectbox("Select Vehicle to Edit", vehicle_options)
-            selected_idx = vehicle_options.index(selected_vehicle)
-            selected_vehicle_data = vehicles_df.iloc[selected_idx]
-            
-            with st.expander("✏️ Edit Selected Vehicle"):
-                with st.form("edit_vehicle_form"):
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        make = st.text_input("Make*", value=selected_vehicle_data.get('make', ''))
-                        model = st.text_input("Model*", value=selected_vehicle_data.get('model', ''))
-                        year = st.number_input("Year*", min_value=1900, max_value=2030, value=int(selected_vehicle_data.get('year', 2020)))
-                        license_plate = st.text_input("License Plate*", value=selected_vehicle_data.get('license_plate', ''))
-                        fuel_type = st.selectbox("Fuel Type*", ["Petrol", "Diesel", "Electric", "Hybrid"], 
-                                                index=["Petrol", "Diesel", "Electric", "Hybrid"].index(selected_vehicle_data.get('fuel_type', 'Diesel')))
-                    
-                    with col2:
-                        whites_id = st.text_input("Whites ID", value=selected_vehicle_data.get('whites_id', '') if pd.notna(selected_vehicle_data.get('whites_id')) else '')
-                        vin_chassis = st.text_input("VIN/Chassis", value=selected_vehicle_data.get('vin_chassis', '') if pd.notna(selected_vehicle_data.get('vin_chassis')) else '')
-                        vehicle_type_options = ["Car", "Van", "Truck", "Lorry", "Bus", "Motorcycle", "Other", "Custom"]
-                        selected_vehicle_type = selected_vehicle_data.get('vehicle_type', 'Car')
-                        if selected_vehicle_type not in vehicle_type_options[:-1]:  # Exclude 'Custom' from check
-                            # If it's a custom vehicle type, set to Custom and show text input
-                            vehicle_type = st.selectbox("Vehicle Type", vehicle_type_options, index=vehicle_type_options.index('Custom'))
-                            vehicle_type = st.text_input("Custom Vehicle Type", value=selected_vehicle_type)
-                        else:
-                            vehicle_type = st.selectbox("Vehicle Type", vehicle_type_options, index=vehicle_type_options.index(selected_vehicle_type) if pd.notna(selected_vehicle_type) else 0)
-                            if vehicle_type == "Custom":
-                                vehicle_type = st.text_input("Custom Vehicle Type", placeholder="Enter custom vehicle type")
-                        mileage = st.number_input("Mileage*", min_value=0, value=int(selected_vehicle_data.get('mileage', 0)))
-                        weight = st.number_input("Weight (tonnes)*", min_value=0.0, value=float(selected_vehicle_data.get('weight', 1.5)), format="%.1f")
-                    
-                    with col3:
-                        status = st.selectbox("Status*", ["Active", "Maintenance", "Retired"], 
-                                             index=["Active", "Maintenance", "Retired"].index(selected_vehicle_data.get('status', 'Active')))
-                        defects = st.text_area("Defects", value=selected_vehicle_data.get('defects', '') if pd.notna(selected_vehicle_data.get('defects')) else '')
-                        notes = st.text_area("Notes", value=selected_vehicle_data.get('notes', '') if pd.notna(selected_vehicle_data.get('notes')) else '')
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.form_submit_button("Update Vehicle", use_container_width=True):
-                            updated_vehicle = selected_vehicle_data.copy()
-                            updated_vehicle['make'] = make
-                            updated_vehicle['model'] = model
-                            updated_vehicle['year'] = year
-                            updated_vehicle['license_plate'] = license_plate
-                            updated_vehicle['fuel_type'] = fuel_type
-                            updated_vehicle['mileage'] = mileage
-                            updated_vehicle['weight'] = weight
-                            updated_vehicle['status'] = status
-                            updated_vehicle['whites_id'] = whites_id if whites_id else None
-                            updated_vehicle['vin_chassis'] = vin_chassis if vin_chassis else None
-                            updated_vehicle['vehicle_type'] = vehicle_type if vehicle_type else None
-                            updated_vehicle['defects'] = defects if defects else None
-                            updated_vehicle['notes'] = notes if notes else None
-                            
-                            dm = get_data_manager()
-                            dm.update_vehicle(updated_vehicle)
-                            st.success(f"✅ Vehicle {make} {model} updated successfully!")
-                            st.rerun()
-                    
-                    with col2:
-                        if st.form_submit_button("Delete Vehicle", use_container_width=True):
-                            dm = get_data_manager()
-                            dm.delete_vehicle(selected_vehicle_data['vehicle_id'])
-                            st.success(f"✅ Vehicle {selected_vehicle_data['make']} {selected_vehicle_data['model']} deleted successfully!")
-                            st.rerun()
+        # Edit vehicle functionality (its own fragment, so choosing a vehicle doesn't redraw the list)
+        show_vehicle_editor(vehicles_df)
     else:
         st.info("No vehicles found. Add your first vehicle above.")
 
 
-def show_maintenance_content(maintenance_df, vehicles_df):
+@st.fragment
+def show_vehicle_editor(vehicles_df):
+    """Pick a vehicle to edit or delete"""
+    st.markdown("### Edit Vehicle")
+    if not vehicles_df.empty:
+        vehicle_options = [f"{row['make']} {row['model']} ({row['license_plate']})" 
+                         for _, row in vehicles_df.iterrows()]
+        selected_vehicle = st.selectbox("Select Vehicle to Edit", vehicle_options)
+        selected_idx = vehicle_options.index(selected_vehicle)
+        selected_vehicle_data = vehicles_df.iloc[selected_idx]
+        
+        with st.expander("✏️ Edit Selected Vehicle"):
+            with st.form("edit_vehicle_form"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    make = st.text_input("Make*", value=selected_vehicle_data.get('make', ''))
+                    model = st.text_input("Model*", value=selected_vehicle_data.get('model', ''))
+                    year = st.number_input("Year*", min_value=1900, max_value=2030, value=int(selected_vehicle_data.get('year', 2020)))
+                    license_plate = st.text_input("License Plate*", value=selected_vehicle_data.get('license_plate', ''))
+                    fuel_type = st.selectbox("Fuel Type*", ["Petrol", "Diesel", "Electric", "Hybrid"], 
+                                            index=["Petrol", "Diesel", "Electric", "Hybrid"].index(selected_vehicle_data.get('fuel_type', 'Diesel')))
+                
+                with col2:
+                    whites_id = st.text_input("Whites ID", value=selected_vehicle_data.get('whites_id', '') if pd.notna(selected_vehicle_data.get('whites_id')) else '')
+                    vin_chassis = st.text_input("VIN/Chassis", value=selected_vehicle_data.get('vin_chassis', '') if pd.notna(selected_vehicle_data.get('vin_chassis')) else '')
+                    vehicle_type_options = ["Car", "Van", "Truck", "Lorry", "Bus", "Motorcycle", "Other", "Custom"]
+                    selected_vehicle_type = selected_vehicle_data.get('vehicle_type', 'Car')
+                    if selected_vehicle_type not in vehicle_type_options[:-1]:  # Exclude 'Custom' from check
+                        # If it's a custom vehicle type, set to Custom and show text input
+                        vehicle_type = st.selectbox("Vehicle Type", vehicle_type_options, index=vehicle_type_options.index('Custom'))
+                        vehicle_type = st.text_input("Custom Vehicle Type", value=selected_vehicle_type)
+                    else:
+                        vehicle_type = st.selectbox("Vehicle Type", vehicle_type_options, index=vehicle_type_options.index(selected_vehicle_type) if pd.notna(selected_vehicle_type) else 0)
+                        if vehicle_type == "Custom":
+                            vehicle_type = st.text_input("Custom Vehicle Type", placeholder="Enter custom vehicle type")
+                    mileage = st.number_input("Mileage*", min_value=0, value=int(selected_vehicle_data.get('mileage', 0)))
+                    weight = st.number_input("Weight (tonnes)*", min_value=0.0, value=float(selected_vehicle_data.get('weight', 1.5)), format="%.1f")
+                
+                with col3:
+                    status = st.selectbox("Status*", ["Active", "Maintenance", "Retired"], 
+                                         index=["Active", "Maintenance", "Retired"].index(selected_vehicle_data.get('status', 'Active')))
+                    defects = st.text_area("Defects", value=selected_vehicle_data.get('defects', '') if pd.notna(selected_vehicle_data.get('defects')) else '')
+                    notes = st.text_area("Notes", value=selected_vehicle_data.get('notes', '') if pd.notna(selected_vehicle_data.get('notes')) else '')
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.form_submit_button("Update Vehicle", use_container_width=True):
+                        updated_vehicle = selected_vehicle_data.copy()
+                        updated_vehicle['make'] = make
+                        updated_vehicle['model'] = model
+                        updated_vehicle['year'] = year
+                        updated_vehicle['license_plate'] = license_plate
+                        updated_vehicle['fuel_type'] = fuel_type
+                        updated_vehicle['mileage'] = mileage
+                        updated_vehicle['weight'] = weight
+                        updated_vehicle['status'] = status
+                        updated_vehicle['whites_id'] = whites_id if whites_id else None
+                        updated_vehicle['vin_chassis'] = vin_chassis if vin_chassis else None
+                        updated_vehicle['vehicle_type'] = vehicle_type if vehicle_type else None
+                        updated_vehicle['defects'] = defects if defects else None
+                        updated_vehicle['notes'] = notes if notes else None
+                        
+                        dm = get_data_manager()
+                        dm.update_vehicle(updated_vehicle)
+                        st.success(f"✅ Vehicle {make} {model} updated successfully!")
+                        st.rerun()
+                
+                with col2:
+                    if st.form_submit_button("Delete Vehicle", use_container_width=True):
+                        dm = get_data_manager()
+                        dm.delete_vehicle(selected_vehicle_data['vehicle_id'])
+                        st.success(f"✅ Vehicle {selected_vehicle_data['make']} {selected_vehicle_data['model']} deleted successfully!")
+                        st.rerun()
+
+
+@st.fragment
+def show_maintenance_content():
     """Maintenance records content"""
     st.markdown("### 🔧 Maintenance Records")
     
@@ -536,13 +480,17 @@ def show_maintenance_content(maintenance_df, vehicles_df):
         st.info("No maintenance records found. Add your first record above.")
 
 
-def show_dashboard_content(vehicles_df, maintenance_df, equipment_df, rentals_df):
+@st.fragment
+def show_dashboard_content():
     """Dashboard content with metrics and charts"""
     st.markdown("### 📊 Dashboard Overview")
     
-    # Load machines data
+    # Load the data the metrics are built from
     dm = get_data_manager()
+    vehicles_df = dm.load_vehicles()
     machines_df = dm.load_machines()
+    maintenance_df = dm.load_maintenance()
+    equipment_df = dm.load_equipment()
     
     # Metrics - reordered to vehicles, machines, tool hire
     col1, col2, col3, col4 = st.columns(4)
@@ -631,7 +579,8 @@ def show_dashboard_content(vehicles_df, maintenance_df, equipment_df, rentals_df
 
 
 
-def show_tool_hire_content(equipment_df, rentals_df):
+@st.fragment
+def show_tool_hire_content():
     """Tool hire content"""
     st.markdown("### ⚙️ Tool Hire Management")
     
@@ -731,7 +680,7 @@ def show_tool_hire_content(equipment_df, rentals_df):
             )
         
         # Clean up None values
-        display_equipment = display_equipment.fillna("")
+        display_equipment = display_equipment.astype(object).fillna("")
         
         # Add status styling
         def highlight_status(val):
@@ -751,104 +700,115 @@ def show_tool_hire_content(equipment_df, rentals_df):
         else:
             st.dataframe(display_equipment, use_container_width=True, hide_index=True)
         
-        # Edit equipment functionality
-        st.markdown("### Edit Equipment")
-        equipment_options = [f"{row['name']} ({row['category']})" 
-                           for _, row in equipment_df.iterrows()]
-        selected_equipment = st.selectbox("Select Equipment to Edit", equipment_options)
-        selected_idx = equipment_options.index(selected_equipment)
-        selected_equipment_data = equipment_df.iloc[selected_idx]
-        
-        with st.expander("✏️ Edit Selected Equipment"):
-            with st.form("edit_equipment_form"):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    name = st.text_input("Equipment Name*", value=selected_equipment_data.get('name', ''))
-                    category_options = ["Construction", "Excavation", "Lifting", "Cutting", "Drilling", "Measuring", "Safety", "Power Tools", "Access Equipment", "Other", "Custom"]
-                    selected_category = selected_equipment_data.get('category', 'Other')
-                    if selected_category not in category_options[:-1]:  # Exclude 'Custom' from check
-                        # If it's a custom category, set to Custom and show text input
-                        category = st.selectbox("Category*", category_options, index=category_options.index('Custom'))
-                        category = st.text_input("Custom Category*", value=selected_category)
-                    else:
-                        category = st.selectbox("Category*", category_options, index=category_options.index(selected_category))
-                        if category == "Custom":
-                            category = st.text_input("Custom Category*", placeholder="Enter custom category")
-                    whites_id = st.text_input("Whites ID", value=selected_equipment_data.get('whites_id', '') if pd.notna(selected_equipment_data.get('whites_id')) else '')
-                    brand = st.text_input("Brand", value=selected_equipment_data.get('brand', '') if pd.notna(selected_equipment_data.get('brand')) else '')
-                    model = st.text_input("Model", value=selected_equipment_data.get('model', '') if pd.notna(selected_equipment_data.get('model')) else '')
-                    serial_number = st.text_input("Serial Number", value=selected_equipment_data.get('serial_number', '') if pd.notna(selected_equipment_data.get('serial_number')) else '')
+        # Edit equipment functionality (its own fragment, so picking an item of equipment doesn't redraw the list)
+        show_equipment_editor(equipment_df)
+    else:
+        st.info("No equipment found. Add your first equipment above.")
+
+
+@st.fragment
+def show_equipment_editor(equipment_df):
+    """Pick a piece of equipment to edit or delete"""
+    st.markdown("### Edit Equipment")
+    equipment_options = [f"{row['name']} ({row['category']})" 
+                       for _, row in equipment_df.iterrows()]
+    selected_equipment = st.selectbox("Select Equipment to Edit", equipment_options)
+    selected_idx = equipment_options.index(selected_equipment)
+    selected_equipment_data = equipment_df.iloc[selected_idx]
+    
+    with st.expander("✏️ Edit Selected Equipment"):
+        with st.form("edit_equipment_form"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                name = st.text_input("Equipment Name*", value=selected_equipment_data.get('name', ''))
+                category_options = ["Construction", "Excavation", "Lifting", "Cutting", "Drilling", "Measuring", "Safety", "Power Tools", "Access Equipment", "Other", "Custom"]
+                selected_category = selected_equipment_data.get('category', 'Other')
+                if selected_category not in category_options[:-1]:  # Exclude 'Custom' from check
+                    # If it's a custom category, set to Custom and show text input
+                    category = st.selectbox("Category*", category_options, index=category_options.index('Custom'))
+                    category = st.text_input("Custom Category*", value=selected_category)
+                else:
+                    category = st.selectbox("Category*", category_options, index=category_options.index(selected_category))
+                    if category == "Custom":
+                        category = st.text_input("Custom Category*", placeholder="Enter custom category")
+                whites_id = st.text_input("Whites ID", value=selected_equipment_data.get('whites_id', '') if pd.notna(selected_equipment_data.get('whites_id')) else '')
+                brand = st.text_input("Brand", value=selected_equipment_data.get('brand', '') if pd.notna(selected_equipment_data.get('brand')) else '')
+                model = st.text_input("Model", value=selected_equipment_data.get('model', '') if pd.notna(selected_equipment_data.get('model')) else '')
+                serial_number = st.text_input("Serial Number", value=selected_equipment_data.get('serial_number', '') if pd.notna(selected_equipment_data.get('serial_number')) else '')
+            
+            with col2:
+                daily_rate = st.number_input("Daily Rate (£)*", min_value=0.0, value=float(selected_equipment_data.get('daily_rate', 0)), format="%.2f")
+                weekly_rate = st.number_input("Weekly Rate (£)", min_value=0.0, value=float(selected_equipment_data.get('weekly_rate', 0)) if pd.notna(selected_equipment_data.get('weekly_rate')) else 0.0, format="%.2f")
+                purchase_price = st.number_input("Purchase Price (£)", min_value=0.0, value=float(selected_equipment_data.get('purchase_price', 0)) if pd.notna(selected_equipment_data.get('purchase_price')) else 0.0, format="%.2f")
                 
-                with col2:
-                    daily_rate = st.number_input("Daily Rate (£)*", min_value=0.0, value=float(selected_equipment_data.get('daily_rate', 0)), format="%.2f")
-                    weekly_rate = st.number_input("Weekly Rate (£)", min_value=0.0, value=float(selected_equipment_data.get('weekly_rate', 0)) if pd.notna(selected_equipment_data.get('weekly_rate')) else 0.0, format="%.2f")
-                    purchase_price = st.number_input("Purchase Price (£)", min_value=0.0, value=float(selected_equipment_data.get('purchase_price', 0)) if pd.notna(selected_equipment_data.get('purchase_price')) else 0.0, format="%.2f")
-                    
-                    # Handle date inputs
-                    purchase_date = selected_equipment_data.get('purchase_date')
-                    if pd.notna(purchase_date) and purchase_date:
-                        try:
-                            purchase_date_val = pd.to_datetime(purchase_date).date()
-                        except:
-                            purchase_date_val = None
-                    else:
+                # Handle date inputs
+                purchase_date = selected_equipment_data.get('purchase_date')
+                if pd.notna(purchase_date) and purchase_date:
+                    try:
+                        purchase_date_val = pd.to_datetime(purchase_date).date()
+                    except:
                         purchase_date_val = None
-                    purchase_date_input = st.date_input("Purchase Date", value=purchase_date_val)
-                    
-                    last_service_date = selected_equipment_data.get('last_service_date')
-                    if pd.notna(last_service_date) and last_service_date:
-                        try:
-                            last_service_date_val = pd.to_datetime(last_service_date).date()
-                        except:
-                            last_service_date_val = None
-                    else:
-                        last_service_date_val = None
-                    last_service_date_input = st.date_input("Last Service Date", value=last_service_date_val)
-                
-                with col3:
-                    status = st.selectbox("Status*", ["Available", "Rented", "Maintenance", "Retired"], 
-                                         index=["Available", "Rented", "Maintenance", "Retired"].index(selected_equipment_data.get('status', 'Available')))
-                    description = st.text_area("Description", value=selected_equipment_data.get('description', '') if pd.notna(selected_equipment_data.get('description')) else '')
-                    notes = st.text_area("Notes", value=selected_equipment_data.get('notes', '') if pd.notna(selected_equipment_data.get('notes')) else '')
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.form_submit_button("Update Equipment", use_container_width=True):
-                        updated_equipment = selected_equipment_data.copy()
-                        updated_equipment['name'] = name
-                        updated_equipment['category'] = category
-                        updated_equipment['daily_rate'] = daily_rate
-                        updated_equipment['status'] = status
-                        updated_equipment['whites_id'] = whites_id if whites_id else None
-                        updated_equipment['brand'] = brand if brand else None
-                        updated_equipment['model'] = model if model else None
-                        updated_equipment['serial_number'] = serial_number if serial_number else None
-                        updated_equipment['weekly_rate'] = weekly_rate if weekly_rate > 0 else None
-                        updated_equipment['purchase_price'] = purchase_price if purchase_price > 0 else None
-                        updated_equipment['purchase_date'] = purchase_date_input.strftime('%Y-%m-%d') if purchase_date_input else None
-                        updated_equipment['last_service_date'] = last_service_date_input.strftime('%Y-%m-%d') if last_service_date_input else None
-                        updated_equipment['description'] = description if description else None
-                        updated_equipment['notes'] = notes if notes else None
-                        
-                        dm = get_data_manager()
-                        dm.update_equipment(updated_equipment)
-                        st.success(f"✅ Equipment {name} updated successfully!")
-                        st.rerun()
+                else:
+                    purchase_date_val = None
+                purchase_date_input = st.date_input("Purchase Date", value=purchase_date_val)
                 
-                with col2:
-                    if st.form_submit_button("Delete Equipment", use_container_width=True):
-                        dm = get_data_manager()
-                        dm.delete_equipment(selected_equipment_data['equipment_id'])
-                        st.success(f"✅ Equipment {selected_equipment_data['name']} deleted successfully!")
-                        st.rerun()
-    else:
-        st.info("No equipment found. Add your first equipment above.")
+                last_service_date = selected_equipment_data.get('last_service_date')
+                if pd.notna(last_service_date) and last_service_date:
+                    try:
+                        last_service_date_val = pd.to_datetime(last_service_date).date()
+                    except:
+                        last_service_date_val = None
+                else:
+                    last_service_date_val = None
+                last_service_date_input = st.date_input("Last Service Date", value=last_service_date_val)
+            
+            with col3:
+                status = st.selectbox("Status*", ["Available", "Rented", "Maintenance", "Retired"], 
+                                     index=["Available", "Rented", "Maintenance", "Retired"].index(selected_equipment_data.get('status', 'Available')))
+                description = st.text_area("Description", value=selected_equipment_data.get('description', '') if pd.notna(selected_equipment_data.get('description')) else '')
+                notes = st.text_area("Notes", value=selected_equipment_data.get('notes', '') if pd.notna(selected_equipment_data.get('notes')) else '')
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.form_submit_button("Update Equipment", use_container_width=True):
+                    updated_equipment = selected_equipment_data.copy()
+                    updated_equipment['name'] = name
+                    updated_equipment['category'] = category
+                    updated_equipment['daily_rate'] = daily_rate
+                    updated_equipment['status'] = status
+                    updated_equipment['whites_id'] = whites_id if whites_id else None
+                    updated_equipment['brand'] = brand if brand else None
+                    updated_equipment['model'] = model if model else None
+                    updated_equipment['serial_number'] = serial_number if serial_number else None
+                    updated_equipment['weekly_rate'] = weekly_rate if weekly_rate > 0 else None
+                    updated_equipment['purchase_price'] = purchase_price if purchase_price > 0 else None
+                    updated_equipment['purchase_date'] = purchase_date_input.strftime('%Y-%m-%d') if purchase_date_input else None
+                    updated_equipment['last_service_date'] = last_service_date_input.strftime('%Y-%m-%d') if last_service_date_input else None
+                    updated_equipment['description'] = description if description else None
+                    updated_equipment['notes'] = notes if notes else None
+                    
+                    dm = get_data_manager()
+                    dm.update_equipment(updated_equipment)
+                    st.success(f"✅ Equipment {name} updated successfully!")
+                    st.rerun()
+            
+            with col2:
+                if st.form_submit_button("Delete Equipment", use_container_width=True):
+                    dm = get_data_manager()
+                    dm.delete_equipment(selected_equipment_data['equipment_id'])
+                    st.success(f"✅ Equipment {selected_equipment_data['name']} deleted successfully!")
+                    st.rerun()
 
 
-def show_statistics_content(vehicles_df, maintenance_df, equipment_df, rentals_df):
+@st.fragment
+def show_statistics_content():
     """Statistics content"""
     st.markdown("### 📈 Statistics & Analytics")
     
+    dm = get_data_manager()
+    vehicles_df = dm.load_vehicles()
+    maintenance_df = dm.load_maintenance()
+    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -872,6 +832,7 @@ def show_statistics_content(vehicles_df, maintenance_df, equipment_df, rentals_d
             st.info("No maintenance data available")
 
 
+@st.fragment
 def show_machine_inventory_content():
     """Machine inventory content"""
     st.markdown("### 🏗️ Machine Inventory (Plant Vehicles)")
@@ -979,87 +940,136 @@ def show_machine_inventory_content():
         else:
             st.dataframe(display_machines, use_container_width=True, hide_index=True)
         
-        # Edit machine functionality
-        st.markdown("### Edit Machine")
-        machine_options = [f"{row['make']} {row['model']} ({row['serial_number']})" 
-                          for _, row in machines_df.iterrows()]
-        selected_machine = st.selectbox("Select Machine to Edit", machine_options)
-        selected_idx = machine_options.index(selected_machine)
-        selected_machine_data = machines_df.iloc[selected_idx]
-        
-        with st.expander("✏️ Edit Selected Machine"):
-            with st.form("edit_machine_form"):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    make = st.text_input("Make*", value=selected_machine_data.get('make', ''))
-                    model = st.text_input("Model*", value=selected_machine_data.get('model', ''))
-                    year = st.number_input("Year*", min_value=1900, max_value=2030, value=int(selected_machine_data.get('year', 2020)))
-                    serial_number = st.text_input("Serial Number*", value=selected_machine_data.get('serial_number', ''))
-                    whites_id = st.text_input("Whites ID", value=selected_machine_data.get('whites_id', '') if pd.notna(selected_machine_data.get('whites_id')) else '')
-                
-                with col2:
-                    machine_type = st.selectbox("Machine Type*", [
-                        "Excavator", "Bulldozer", "Loader", "Crane", 
-                        "Compactor", "Grader", "Other"
-                    ], index=["Excavator", "Bulldozer", "Loader", "Crane", "Compactor", "Grader", "Other"].index(selected_machine_data.get('machine_type', 'Other')))
-                    hours = st.number_input("Operating Hours*", min_value=0, value=int(selected_machine_data.get('hours', 0)))
-                    weight = st.number_input("Weight (tonnes)*", min_value=0.0, value=float(selected_machine_data.get('weight', 10.0)), format="%.1f")
-                    vin_chassis = st.text_input("VIN/Chassis", value=selected_machine_data.get('vin_chassis', '') if pd.notna(selected_machine_data.get('vin_chassis')) else '')
-                    status = st.selectbox("Status*", ["Active", "Maintenance", "Retired"], 
-                                         index=["Active", "Maintenance", "Retired"].index(selected_machine_data.get('status', 'Active')))
-                
-                with col3:
-                    daily_rate = st.number_input("Daily Rate (£)", min_value=0.0, value=float(selected_machine_data.get('daily_rate', 0)) if pd.notna(selected_machine_data.get('daily_rate')) else 0.0, format="%.2f")
-                    weekly_rate = st.number_input("Weekly Rate (£)", min_value=0.0, value=float(selected_machine_data.get('weekly_rate', 0)) if pd.notna(selected_machine_data.get('weekly_rate')) else 0.0, format="%.2f")
-                    defects = st.text_area("Defects", value=selected_machine_data.get('defects', '') if pd.notna(selected_machine_data.get('defects')) else '')
-                    notes = st.text_area("Notes", value=selected_machine_data.get('notes', '') if pd.notna(selected_machine_data.get('notes')) else '')
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.form_submit_button("Update Machine", use_container_width=True):
-                        updated_machine = selected_machine_data.copy()
-                        updated_machine['make'] = make
-                        updated_machine['model'] = model
-                        updated_machine['year'] = year
-                        updated_machine['serial_number'] = serial_number
-                        updated_machine['machine_type'] = machine_type
-                        updated_machine['hours'] = hours
-                        updated_machine['weight'] = weight
-                        updated_machine['status'] = status
-                        updated_machine['whites_id'] = whites_id if whites_id else None
-                        updated_machine['vin_chassis'] = vin_chassis if vin_chassis else None
-                        updated_machine['daily_rate'] = daily_rate if daily_rate > 0 else None
-                        updated_machine['weekly_rate'] = weekly_rate if weekly_rate > 0 else None
-                        updated_machine['defects'] = defects if defects else None
-                        updated_machine['notes'] = notes if notes else None
-                        
-                        dm = get_data_manager()
-                        dm.update_machine(updated_machine)
-                        st.success(f"✅ Machine {make} {model} updated successfully!")
-                        st.rerun()
-                
-                with col2:
-                    if st.form_submit_button("Delete Machine", use_container_width=True):
-                        dm = get_data_manager()
-                        dm.delete_machine(selected_machine_data['machine_id'])
-                        st.success(f"✅ Machine {selected_machine_data['make']} {selected_machine_data['model']} deleted successfully!")
-                        st.rerun()
+        # Edit machine functionality (its own fragment, so choosing a machine doesn't redraw the list)
+        show_machine_editor(machines_df)
     else:
         st.info("No machines found. Add your first machine above.")
 
 
-def create_excel_export(dataframes, filename):
-    """Create Excel export function"""
-    import io
-    import pandas as pd
-    
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        for sheet_name, df in dataframes.items():
-            if not df.empty:
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-    
-    return output.getvalue()
+@st.fragment
+def show_machine_editor(machines_df):
+    """Pick a machine to edit or delete"""
+    st.markdown("### Edit Machine")
+    machine_options = [f"{row['make']} {row['model']} ({row['serial_number']})" 
+                      for _, row in machines_df.iterrows()]
+    selected_machine = st.selectbox("Select Machine to Edit", machine_options)
+    selected_idx = machine_options.index(selected_machine)
+    selected_machine_data = machines_df.iloc[selected_idx]
+    
+    with st.expander("✏️ Edit Selected Machine"):
+        with st.form("edit_machine_form"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                make = st.text_input("Make*", value=selected_machine_data.get('make', ''))
+                model = st.text_input("Model*", value=selected_machine_data.get('model', ''))
+                year = st.number_input("Year*", min_value=1900, max_value=2030, value=int(selected_machine_data.get('year', 2020)))
+                serial_number = st.text_input("Serial Number*", value=selected_machine_data.get('serial_number', ''))
+                whites_id = st.text_input("Whites ID", value=selected_machine_data.get('whites_id', '') if pd.notna(selected_machine_data.get('whites_id')) else '')
+            
+            with col2:
+                machine_type = st.selectbox("Machine Type*", [
+                    "Excavator", "Bulldozer", "Loader", "Crane", 
+                    "Compactor", "Grader", "Other"
+                ], index=["Excavator", "Bulldozer", "Loader", "Crane", "Compactor", "Grader", "Other"].index(selected_machine_data.get('machine_type', 'Other')))
+                hours = st.number_input("Operating Hours*", min_value=0, value=int(selected_machine_data.get('hours', 0)))
+                weight = st.number_input("Weight (tonnes)*", min_value=0.0, value=float(selected_machine_data.get('weight', 10.0)), format="%.1f")
+                vin_chassis = st.text_input("VIN/Chassis", value=selected_machine_data.get('vin_chassis', '') if pd.notna(selected_machine_data.get('vin_chassis')) else '')
+                status = st.selectbox("Status*", ["Active", "Maintenance", "Retired"], 
+                                     index=["Active", "Maintenance", "Retired"].index(selected_machine_data.get('status', 'Active')))
+            
+            with col3:
+                daily_rate = st.number_input("Daily Rate (£)", min_value=0.0, value=float(selected_machine_data.get('daily_rate', 0)) if pd.notna(selected_machine_data.get('daily_rate')) else 0.0, format="%.2f")
+                weekly_rate = st.number_input("Weekly Rate (£)", min_value=0.0, value=float(selected_machine_data.get('weekly_rate', 0)) if pd.notna(selected_machine_data.get('weekly_rate')) else 0.0, format="%.2f")
+                defects = st.text_area("Defects", value=selected_machine_data.get('defects', '') if pd.notna(selected_machine_data.get('defects')) else '')
+                notes = st.text_area("Notes", value=selected_machine_data.get('notes', '') if pd.notna(selected_machine_data.get('notes')) else '')
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.form_submit_button("Update Machine", use_container_width=True):
+                    updated_machine = selected_machine_data.copy()
+                    updated_machine['make'] = make
+                    updated_machine['model'] = model
+                    updated_machine['year'] = year
+                    updated_machine['serial_number'] = serial_number
+                    updated_machine['machine_type'] = machine_type
+                    updated_machine['hours'] = hours
+                    updated_machine['weight'] = weight
+                    updated_machine['status'] = status
+                    updated_machine['whites_id'] = whites_id if whites_id else None
+                    updated_machine['vin_chassis'] = vin_chassis if vin_chassis else None
+                    updated_machine['daily_rate'] = daily_rate if daily_rate > 0 else None
+                    updated_machine['weekly_rate'] = weekly_rate if weekly_rate > 0 else None
+                    updated_machine['defects'] = defects if defects else None
+                    updated_machine['notes'] = notes if notes else None
+                    
+                    dm = get_data_manager()
+                    dm.update_machine(updated_machine)
+                    st.success(f"✅ Machine {make} {model} updated successfully!")
+                    st.rerun()
+            
+            with col2:
+                if st.form_submit_button("Delete Machine", use_container_width=True):
+                    dm = get_data_manager()
+                    dm.delete_machine(selected_machine_data['machine_id'])
+                    st.success(f"✅ Machine {selected_machine_data['make']} {selected_machine_data['model']} deleted successfully!")
+                    st.rerun()
+
+
+def show_export_button(dm, name, icon, label, file_prefix, has_data, empty_help):
+    """Show a download button for an export, building the workbook in the background on demand"""
+    if not has_data:
+        st.button(f"{icon} {label}", disabled=True, use_container_width=True, help=empty_help)
+        return
+    
+    job = EXPORT_QUEUE.job(dm, name)
+    if job is not None and not job.finished:
+        # Progress is shown by show_export_progress below the quick actions
+        st.button(f"⏳ Preparing {label}...", key=f"preparing_export_{name}", disabled=True, use_container_width=True)
+        return
+    
+    if job is None or job.status == 'failed':
+        if job is not None:
+            st.caption(f"⚠️ {label} failed: {job.error}")
+        if st.button(f"{icon} Prepare {label}", key=f"prepare_export_{name}", use_container_width=True):
+            EXPORT_QUEUE.submit(dm, name)
+            # A full rerun, so the page starts polling the new job
+            st.rerun()
+        return
+    
+    data = job.read()
+    if data is None:
+        # The workbook couldn't be read back; build it again
+        EXPORT_QUEUE.submit(dm, name, rebuild=True)
+        st.rerun()
+    
+    st.download_button(
+        label=f"{icon} {label}",
+        data=data,
+        file_name=f"{file_prefix}_{datetime.now().strftime('%Y%m%d')}.xlsx",
+        mime=EXCEL_MIME,
+        key=f"download_export_{name}",
+        use_container_width=True
+    )
+
+
+def pending_exports(dm):
+    """Export jobs for the current data that are still being built"""
+    jobs = (EXPORT_QUEUE.job(dm, name) for name in EXPORTS)
+    return [job for job in jobs if job is not None and not job.finished]
+
+
+@st.fragment(run_every=1)
+def show_export_progress():
+    """
+    Poll the exports being built. Once none are left the whole page reruns
+    a single time to show the downloads, and the page stops calling this.
+    """
+    pending = pending_exports(get_data_manager())
+    if not pending:
+        st.rerun()
+    for job in pending:
+        label = job.name.replace('_', ' ').title()
+        st.progress(job.progress, text=f"📥 {label} export: building... {job.progress:.0%}")
 
 
 def main():
@@ -1098,32 +1108,6 @@ def main():
         max-width: 100% !important;
     }
     
-    /* Tab Styling */
-    .stTabs {
-        background: rgba(255, 255, 255, 0.03);
-        border-radius: 12px;
-        padding: 1rem;
-        margin: 1rem 0;
-        border: 1px solid rgba(255, 255, 255, 0.1);
-    }
-    
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        background: rgba(255, 255, 255, 0.05);
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        border-radius: 8px;
-        padding: 0.5rem 1rem;
-        color: #e0e6ed;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: linear-gradient(135deg, #2196f3 0%, #1976d2 100%);
-        color: white;
-    }
-    
     /* Button Styling */
     .stButton > button {
         background: linear-gradient(135deg, #2196f3 0%, #1976d2 100%);
@@ -1285,11 +1269,6 @@ def main():
             padding: 0.5rem;
         }
         
-        .stTabs [data-baseweb="tab"] {
-            padding: 0.375rem 0.75rem;
-            font-size: 0.875rem;
-        }
-        
         .main .block-container {
             padding-left: 0.5rem !important;
             padding-right: 0.5rem !important;
@@ -1298,15 +1277,8 @@ def main():
     </style>
     """, unsafe_allow_html=True)
     
-    # Load data
-    dm = get_data_manager()
-    vehicles_df = dm.load_vehicles()
-    maintenance_df = dm.load_maintenance()
-    equipment_df = dm.load_equipment()
-    rentals_df = dm.load_rentals()
-    
-    # Create single-page navigation and content
-    create_single_page_layout(vehicles_df, maintenance_df, equipment_df, rentals_df)
+    # Create single-page navigation and content; each section loads its own data
+    create_single_page_layout()
 
 
 if __name__ == "__main__":
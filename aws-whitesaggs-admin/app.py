@@ -2,7 +2,17 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, date
 import os
-from utils.data_manager import DataManager
+import sys
+
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
+# utils/ is shared with the main app: deployments copy it next to this
+# file, a repository checkout has it one level up
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(APP_DIR if os.path.isdir(os.path.join(APP_DIR, "utils")) else os.path.dirname(APP_DIR))
+from utils.services import get_data_manager
 
 # Configure the page
 st.set_page_config(
@@ -12,11 +22,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
-
 def create_sidebar(vehicles_df, maintenance_df, equipment_df, rentals_df):
     """Create permanent sidebar with organized navigation and export options"""
     with st.sidebar:
@@ -4,9 +4,18 @@ from datetime import datetime, date
 import sys
 import os
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Add parent directory to path to import utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_manager import DataManager
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(APP_DIR)
+# utils/ is shared with the main app: deployments copy it into the app
+# directory, a repository checkout has it one level up
+if not os.path.isdir(os.path.join(APP_DIR, "utils")):
+    sys.path.append(os.path.dirname(APP_DIR))
+from utils.services import get_data_manager
 from utils.validators import validate_weight, validate_year
 
 st.set_page_config(
@@ -16,11 +25,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
-
 def create_sidebar():
     """Create permanent sidebar navigation"""
     with st.sidebar:
@@ -164,7 +168,7 @@ def main():
                 filtered_df = filtered_df[filtered_df['status'] == status_filter]
             
             if type_filter != "All":
-                filtered_df = filtered_df[filtered_df['vehicle_type'].fillna('Unknown') == type_filter]
+                filtered_df = filtered_df[filtered_df['vehicle_type'].astype(object).fillna('Unknown') == type_filter]
             
             # Display results
             st.write(f"Showing {len(filtered_df)} of {len(vehicles_df)} vehicles")
@@ -431,7 +435,7 @@ def main():
                         st.dataframe(import_df.head())
                         
                         if st.button("Import Vehicles"):
-                            success_count = dm.import_vehicles(import_df)
+                            success_count = dm.import_vehicles(import_df).accepted_count
                             st.success(f"Successfully imported {success_count} vehicles!")
                             st.rerun()
                     else:
@@ -4,9 +4,19 @@ from datetime import datetime, date, timedelta
 import sys
 import os
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Add parent directory to path to import utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_manager import DataManager
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(APP_DIR)
+# utils/ is shared with the main app: deployments copy it into the app
+# directory, a repository checkout has it one level up
+if not os.path.isdir(os.path.join(APP_DIR, "utils")):
+    sys.path.append(os.path.dirname(APP_DIR))
+from utils.services import get_data_manager
+from utils.schema import format_date
 
 st.set_page_config(
     page_title="Maintenance Records", 
@@ -15,11 +25,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
-
 def create_sidebar():
     """Create permanent sidebar navigation"""
     with st.sidebar:
@@ -160,7 +165,6 @@ def main():
             
             # Apply date filter
             if date_range != "All Time":
-                filtered_df['date'] = pd.to_datetime(filtered_df['date'])
                 
                 if date_range == "Last 30 Days":
                     cutoff_date = datetime.now() - timedelta(days=30)
@@ -212,11 +216,11 @@ def main():
                 for index, record in filtered_df.iterrows():
                     vehicle_info = f"{record['year']} {record['make']} {record['model']} ({record['license_plate']})"
                     
-                    with st.expander(f"{record['date']} - {record['type']} - {vehicle_info} - ${record['cost']:.2f}"):
+                    with st.expander(f"{format_date(record['date'])} - {record['type']} - {vehicle_info} - ${record['cost']:.2f}"):
                         col1, col2 = st.columns(2)
                         
                         with col1:
-                            st.write(f"**Date:** {record['date']}")
+                            st.write(f"**Date:** {format_date(record['date'])}")
                             st.write(f"**Type:** {record['type']}")
                             st.write(f"**Cost:** £{record['cost']:.2f}")
                             st.write(f"**Mileage:** {record['mileage']:,} miles")
@@ -255,7 +259,7 @@ def main():
                                 col1, col2 = st.columns(2)
                                 
                                 with col1:
-                                    new_date = st.date_input("Date", value=pd.to_datetime(record['date']).date())
+                                    new_date = st.date_input("Date", value=record['date'].date() if pd.notna(record['date']) else date.today())
                                     new_type = st.selectbox("Type", 
                                                           ["Oil Change", "Tire Rotation", "Brake Service", "Transmission Service", 
                                                            "Engine Repair", "General Maintenance", "Inspection", "Other"],
@@ -360,55 +364,33 @@ def main():
     with tab3:
         st.subheader("Upcoming Maintenance Due")
         
-        maintenance_df = dm.load_maintenance()
+        # Latest schedule per vehicle and type, kept up to date as records are logged
+        overdue, due_soon, upcoming = dm.get_maintenance_due(due_soon_miles=1000)
         
-        if not maintenance_df.empty:
-            # Get vehicles with next due mileage
-            due_maintenance = maintenance_df[maintenance_df['next_due_mileage'].notna()].copy()
+        if not (overdue.empty and due_soon.empty and upcoming.empty):
+            # Display overdue items
+            if not overdue.empty:
+                st.error("⚠️ Overdue Maintenance")
+                for _, item in overdue.iterrows():
+                    vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
+                    overdue_miles = abs(item['miles_until_due'])
+                    st.write(f"🔴 **{vehicle_info}** - {item['type']} - Overdue by {overdue_miles:,} miles")
             
-            if not due_maintenance.empty:
-                # Merge with vehicle data
-                due_maintenance = due_maintenance.merge(vehicles_df, on='vehicle_id', how='left')
-                
-                # Calculate how close each vehicle is to due maintenance
-                due_maintenance['miles_until_due'] = due_maintenance['next_due_mileage'] - due_maintenance['mileage']
-                
-                # Sort by miles until due (closest first)
-                due_maintenance = due_maintenance.sort_values('miles_until_due')
-                
-                # Categorize by urgency
-                overdue = due_maintenance[due_maintenance['miles_until_due'] <= 0]
-                due_soon = due_maintenance[(due_maintenance['miles_until_due'] > 0) & (due_maintenance['miles_until_due'] <= 1000)]
-                upcoming = due_maintenance[due_maintenance['miles_until_due'] > 1000]
-                
-                # Display overdue items
-                if not overdue.empty:
-                    st.error("⚠️ Overdue Maintenance")
-                    for _, item in overdue.iterrows():
-                        vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
-                        overdue_miles = abs(item['miles_until_due'])
-                        st.write(f"🔴 **{vehicle_info}** - {item['type']} - Overdue by {overdue_miles:,} miles")
-                
-                # Display due soon items
-                if not due_soon.empty:
-                    st.warning("⏰ Due Soon (Within 1,000 miles)")
-                    for _, item in due_soon.iterrows():
-                        vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
-                        st.write(f"🟡 **{vehicle_info}** - {item['type']} - Due in {item['miles_until_due']:,} miles")
-                
-                # Display upcoming items
-                if not upcoming.empty:
-                    st.info("📅 Upcoming Maintenance")
-                    for _, item in upcoming.iterrows():
-                        vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
-                        st.write(f"🟢 **{vehicle_info}** - {item['type']} - Due in {item['miles_until_due']:,} miles")
-                
-                if overdue.empty and due_soon.empty and upcoming.empty:
-                    st.success("✅ No upcoming maintenance scheduled!")
-            else:
-                st.info("No maintenance schedules found. Log maintenance with 'Next Due Mileage' to track upcoming services.")
+            # Display due soon items
+            if not due_soon.empty:
+                st.warning("⏰ Due Soon (Within 1,000 miles)")
+                for _, item in due_soon.iterrows():
+                    vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
+                    st.write(f"🟡 **{vehicle_info}** - {item['type']} - Due in {item['miles_until_due']:,} miles")
+            
+            # Display upcoming items
+            if not upcoming.empty:
+                st.info("📅 Upcoming Maintenance")
+                for _, item in upcoming.iterrows():
+                    vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
+                    st.write(f"🟢 **{vehicle_info}** - {item['type']} - Due in {item['miles_until_due']:,} miles")
         else:
-            st.info("No maintenance records found.")
+            st.info("No maintenance schedules found. Log maintenance with 'Next Due Mileage' to track upcoming services.")
     
     with tab4:
         st.subheader("Import/Export Maintenance Data")
@@ -454,7 +436,7 @@ def main():
                         st.dataframe(import_df.head())
                         
                         if st.button("Import Maintenance Records"):
-                            success_count = dm.import_maintenance(import_df)
+                            success_count = dm.import_maintenance(import_df).accepted_count
                             st.success(f"Successfully imported {success_count} maintenance records!")
                             st.rerun()
                     else:
@@ -6,9 +6,19 @@ from datetime import datetime, date, timedelta
 import sys
 import os
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Add parent directory to path to import utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_manager import DataManager
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(APP_DIR)
+# utils/ is shared with the main app: deployments copy it into the app
+# directory, a repository checkout has it one level up
+if not os.path.isdir(os.path.join(APP_DIR, "utils")):
+    sys.path.append(os.path.dirname(APP_DIR))
+from utils.services import get_data_manager
+from utils.schema import format_date
 
 st.set_page_config(
     page_title="Dashboard", 
@@ -17,11 +27,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
-
 def create_sidebar():
     """Create permanent sidebar navigation"""
     with st.sidebar:
@@ -409,7 +414,7 @@ def main():
             
             for _, record in recent_with_vehicles.iterrows():
                 vehicle_info = f"{record['year']} {record['make']} {record['model']} ({record['license_plate']})"
-                st.write(f"**{record['date']}** - {record['type']} on {vehicle_info} - ${record['cost']:.2f}")
+                st.write(f"**{format_date(record['date'])}** - {record['type']} on {vehicle_info} - ${record['cost']:.2f}")
         else:
             st.info("No recent maintenance activity")
     
@@ -418,15 +423,9 @@ def main():
         
         if not maintenance_df.empty:
             # Check for overdue maintenance
-            due_maintenance = maintenance_df[maintenance_df['next_due_mileage'].notna()].copy()
+            overdue, due_soon, upcoming = dm.get_maintenance_due(due_soon_miles=1000)
             
-            if not due_maintenance.empty:
-                due_maintenance = due_maintenance.merge(vehicles_df, on='vehicle_id', how='left')
-                due_maintenance['miles_until_due'] = due_maintenance['next_due_mileage'] - due_maintenance['mileage']
-                
-                overdue = due_maintenance[due_maintenance['miles_until_due'] <= 0]
-                due_soon = due_maintenance[(due_maintenance['miles_until_due'] > 0) & (due_maintenance['miles_until_due'] <= 1000)]
-                
+            if not (overdue.empty and due_soon.empty and upcoming.empty):
                 if not overdue.empty:
                     st.error(f"🔴 {len(overdue)} vehicle(s) have overdue maintenance")
                     for _, item in overdue.head(3).iterrows():
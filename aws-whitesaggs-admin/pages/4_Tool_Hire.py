@@ -4,9 +4,19 @@ from datetime import datetime, date, timedelta
 import sys
 import os
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Add parent directory to path to import utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_manager import DataManager
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(APP_DIR)
+# utils/ is shared with the main app: deployments copy it into the app
+# directory, a repository checkout has it one level up
+if not os.path.isdir(os.path.join(APP_DIR, "utils")):
+    sys.path.append(os.path.dirname(APP_DIR))
+from utils.services import get_data_manager
+from utils.schema import format_date
 
 st.set_page_config(
     page_title="Tool Hire", 
@@ -15,11 +25,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
-
 def create_sidebar():
     """Create permanent sidebar navigation"""
     with st.sidebar:
@@ -208,7 +213,7 @@ def main():
                         st.write(f"**Daily Rate:** £{equipment['daily_rate']:.2f}")
                         st.write(f"**Weekly Rate:** £{equipment['weekly_rate']:.2f}")
                         st.write(f"**Purchase Price:** £{equipment['purchase_price']:.2f}")
-                        st.write(f"**Purchase Date:** {equipment['purchase_date']}")
+                        st.write(f"**Purchase Date:** {format_date(equipment['purchase_date'])}")
                         st.write(f"**Last Service:** {equipment.get('last_service_date', 'N/A')}")
                     
                     if equipment.get('notes'):
@@ -294,11 +299,16 @@ def main():
                                             'notes': notes
                                         }
                                         
-                                        dm.add_rental(rental_data)
-                                        dm.update_equipment_status(equipment['equipment_id'], 'Rented')
-                                        st.success("Rental created successfully!")
-                                        del st.session_state[f'rent_equipment_{equipment["equipment_id"]}']
-                                        st.rerun()
+                                        try:
+                                            # Refused if the equipment is already booked for those dates
+                                            dm.add_rental(rental_data)
+                                        except ValueError as e:
+                                            st.error(str(e))
+                                        else:
+                                            dm.update_equipment_status(equipment['equipment_id'], 'Rented')
+                                            st.success("Rental created successfully!")
+                                            del st.session_state[f'rent_equipment_{equipment["equipment_id"]}']
+                                            st.rerun()
                             
                             with col2:
                                 if st.form_submit_button("Cancel"):
@@ -402,8 +412,8 @@ def main():
                             st.write(f"**Email:** {rental.get('customer_email', 'N/A')}")
                         
                         with col2:
-                            st.write(f"**Start Date:** {rental['start_date']}")
-                            st.write(f"**Expected Return:** {rental['expected_return_date'].strftime('%Y-%m-%d')}")
+                            st.write(f"**Start Date:** {format_date(rental['start_date'])}")
+                            st.write(f"**Expected Return:** {format_date(rental['expected_return_date'])}")
                             st.write(f"**Rental Rate:** £{rental['rental_rate']:.2f}")
                             st.write(f"**Deposit:** £{rental.get('deposit', 0):.2f}")
                         
@@ -446,8 +456,8 @@ def main():
                                 with col1:
                                     if st.form_submit_button("Process Return"):
                                         # Calculate final cost
-                                        actual_days = (return_date - pd.to_datetime(rental['start_date']).date()).days + 1
-                                        expected_days = (pd.to_datetime(rental['expected_return_date']).date() - pd.to_datetime(rental['start_date']).date()).days + 1
+                                        actual_days = (return_date - rental['start_date'].date()).days + 1
+                                        expected_days = (rental['expected_return_date'].date() - rental['start_date'].date()).days + 1
                                         
                                         # Update rental record
                                         dm.return_rental(rental['rental_id'], {
@@ -585,7 +595,7 @@ def main():
                         st.dataframe(import_df.head())
                         
                         if st.button("Import Equipment"):
-                            success_count = dm.import_equipment(import_df)
+                            success_count = dm.import_equipment(import_df).accepted_count
                             st.success(f"Successfully imported {success_count} equipment items!")
                             st.rerun()
                     
@@ -594,7 +604,7 @@ def main():
                         st.dataframe(import_df.head())
                         
                         if st.button("Import Rentals"):
-                            success_count = dm.import_rentals(import_df)
+                            success_count = dm.import_rentals(import_df).accepted_count
                             st.success(f"Successfully imported {success_count} rental records!")
                             st.rerun()
                     
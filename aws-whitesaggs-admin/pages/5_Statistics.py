@@ -6,9 +6,18 @@ from datetime import datetime, date, timedelta
 import sys
 import os
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Add parent directory to path to import utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_manager import DataManager
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(APP_DIR)
+# utils/ is shared with the main app: deployments copy it into the app
+# directory, a repository checkout has it one level up
+if not os.path.isdir(os.path.join(APP_DIR, "utils")):
+    sys.path.append(os.path.dirname(APP_DIR))
+from utils.services import get_data_manager
 
 st.set_page_config(
     page_title="Statistics", 
@@ -17,11 +26,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
-
 def create_sidebar():
     """Create permanent sidebar navigation"""
     with st.sidebar:
@@ -220,7 +224,7 @@ def main():
                 st.markdown('<div class="chart-container">', unsafe_allow_html=True)
                 st.subheader("Fleet by Type")
                 if 'vehicle_type' in vehicles_df.columns:
-                    type_counts = vehicles_df['vehicle_type'].fillna('Unknown').value_counts()
+                    type_counts = vehicles_df['vehicle_type'].astype(object).fillna('Unknown').value_counts()
                     fig_type = px.bar(
                         x=type_counts.index,
                         y=type_counts.values,
@@ -308,7 +312,6 @@ def main():
             
             with col4:
                 # Recent maintenance (last 30 days)
-                maintenance_df['date'] = pd.to_datetime(maintenance_df['date'])
                 recent_maintenance = maintenance_df[maintenance_df['date'] >= datetime.now() - timedelta(days=30)]
                 recent_count = len(recent_maintenance)
                 st.markdown(f"""
@@ -76,7 +76,7 @@ print_status "Setting up Python virtual environment..."
 python3.11 -m venv venv
 source venv/bin/activate
 pip install --upgrade pip
-pip install streamlit pandas plotly xlsxwriter
+pip install "streamlit>=1.46.1" "pandas>=2.3.1" plotly xlsxwriter
 
 # Create Streamlit configuration for subdirectory
 print_status "Configuring Streamlit for subdirectory routing..."
@@ -376,8 +376,9 @@ tee /root/upload_whitesaggs_admin_files.sh > /dev/null <<'UPLOAD_EOF'
 #!/bin/bash
 
 if [ $# -eq 0 ]; then
-    echo "Usage: $0 <path-to-whites-management-files>"
-    echo "Example: $0 /home/user/whites-management-files"
+    echo "Usage: $0 <path-to-aws-whitesaggs-admin>"
+    echo "Example: $0 /home/user/WhitesManagement/aws-whitesaggs-admin"
+    echo "utils/ is taken from that directory or, in a repository checkout, its parent"
     exit 1
 fi
 
@@ -389,12 +390,27 @@ if [ ! -d "$SOURCE_DIR" ]; then
     exit 1
 fi
 
+# The data layer (utils/) is shared with the main app: take it from the
+# upload, or from the repository root next to the admin app
+if [ -d "$SOURCE_DIR/utils" ]; then
+    UTILS_DIR="$SOURCE_DIR/utils"
+elif [ -d "$SOURCE_DIR/../utils" ]; then
+    UTILS_DIR="$SOURCE_DIR/../utils"
+else
+    echo "Error: utils/ not found in $SOURCE_DIR or its parent directory"
+    exit 1
+fi
+
 echo "Stopping service..."
 systemctl stop whites-management
 
 echo "Copying files..."
 cp -r "$SOURCE_DIR"/* "$DEST_DIR/"
 
+# Install the data layer inside the app directory, replacing any older copy
+rm -rf "$DEST_DIR/utils"
+cp -r "$UTILS_DIR" "$DEST_DIR/utils"
+
 echo "Setting permissions..."
 chown -R www-data:www-data "$DEST_DIR"
 chmod -R 755 "$DEST_DIR"
@@ -557,7 +573,7 @@ echo "1. Configure AWS Security Group:"
 echo "   /root/aws_security_group_setup.sh"
 echo ""
 echo "2. Upload your Whites Management files:"
-echo "   /root/upload_whitesaggs_admin_files.sh /path/to/your/whites-management-files"
+echo "   /root/upload_whitesaggs_admin_files.sh /path/to/WhitesManagement/aws-whitesaggs-admin"
 echo ""
 echo "3. Configure DNS (choose one):"
 echo "   - Route 53: /root/aws_route53_setup.sh"
@@ -81,5 +81,7 @@ echo ""
 echo "Next steps:"
 echo "1. Point $DOMAIN_NAME DNS to $PUBLIC_IP"
 echo "2. Wait for DNS propagation (24-48 hours)"
-echo "3. SSH to server and run: /root/setup_ssl_whitesaggs_admin.sh"
-echo "4. Access admin panel at: https://$DOMAIN_NAME/admin"
+echo "3. Copy a repository checkout to the server (aws-whitesaggs-admin/ and utils/) and run:"
+echo "   /root/upload_whitesaggs_admin_files.sh /path/to/WhitesManagement/aws-whitesaggs-admin"
+echo "4. SSH to server and run: /root/setup_ssl_whitesaggs_admin.sh"
+echo "5. Access admin panel at: https://$DOMAIN_NAME/admin"
@@ -13,12 +13,17 @@ apt-get install -y git
 
 # Clone or download the deployment package
 cd /tmp
-# You would replace this with your actual repository or download URL
+# You would replace this with your actual repository or download URL.
+# Clone the whole repository: the admin app uses the data layer (utils/)
+# in its root
 # git clone https://github.com/your-repo/whites-management.git
-# cd whites-management
+# cd whites-management/aws-whitesaggs-admin
 
 # Run deployment script
 chmod +x scripts/aws_whitesaggs_deployment.sh
 ./scripts/aws_whitesaggs_deployment.sh
 
+# Install the app and the shared data layer into /opt/whites-management
+/root/upload_whitesaggs_admin_files.sh "$(pwd)"
+
 echo "EC2 user data script completed"
@@ -4,9 +4,15 @@ from datetime import datetime, date
 import sys
 import os
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_manager import DataManager
+from utils.data_manager import ConcurrentEditError
+from utils.services import get_data_manager
+from utils.pagination import show_paged_frame
 from utils.validators import validate_weight, validate_year
 from login import check_password, show_logout_button
 
@@ -17,10 +23,29 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
+# Sort options for the list view, mapped to their columns
+VEHICLE_SORT_COLUMNS = {
+    "Date Added": None,
+    "Whites ID": 'whites_id',
+    "Make": 'make',
+    "Model": 'model',
+    "Year": 'year',
+    "Mileage": 'mileage',
+    "Status": 'status',
+}
+
+# Columns a bulk update upload can identify vehicles by
+BULK_MATCH_COLUMNS = {
+    "Whites ID": 'whites_id',
+    "License Plate": 'license_plate',
+    "Vehicle ID": 'vehicle_id',
+}
+
+# Columns a bulk update upload can set
+BULK_UPDATE_FIELDS = {
+    "Mileage": 'mileage',
+    "Status": 'status',
+}
 
 def create_sidebar():
     """Create permanent sidebar navigation"""
@@ -159,25 +184,23 @@ def main():
             filtered_df = vehicles_df.copy()
             
             if search_term:
-                mask = (
-                    filtered_df['make'].str.contains(search_term, case=False, na=False) |
-                    filtered_df['model'].str.contains(search_term, case=False, na=False) |
-                    filtered_df.get('whites_id', pd.Series()).astype(str).str.contains(search_term, case=False, na=False) |
-                    filtered_df['license_plate'].str.contains(search_term, case=False, na=False)
-                )
-                filtered_df = filtered_df[mask]
+                # Matches Whites ID, make, model, plate or VIN (spaces and dashes ignored)
+                matches = dm.search('vehicles', search_term)
+                if matches is not None:
+                    filtered_df = filtered_df[filtered_df['vehicle_id'].astype(str).isin(matches)]
             
             if status_filter != "All":
                 filtered_df = filtered_df[filtered_df['status'] == status_filter]
             
             if type_filter != "All":
-                filtered_df = filtered_df[filtered_df['vehicle_type'].fillna('Unknown') == type_filter]
+                filtered_df = filtered_df[filtered_df['vehicle_type'].astype(object).fillna('Unknown') == type_filter]
             
             # Display results
             st.write(f"Showing {len(filtered_df)} of {len(vehicles_df)} vehicles")
             
-            # Display vehicles in a more readable format
-            for index, vehicle in filtered_df.iterrows():
+            # Display one page of vehicles at a time
+            page_df = show_paged_frame(filtered_df, "vehicle_list", VEHICLE_SORT_COLUMNS)
+            for index, vehicle in page_df.iterrows():
                 whites_id = vehicle.get('whites_id', 'N/A')
                 vehicle_type = vehicle.get('vehicle_type', 'Unknown')
                 with st.expander(f"{vehicle['year']} {vehicle['make']} {vehicle['model']} - {vehicle_type} (ID: {whites_id})"):
@@ -205,7 +228,8 @@ def main():
                     col1, col2, col3 = st.columns(3)
                     with col1:
                         if st.button(f"Edit", key=f"edit_{vehicle['vehicle_id']}"):
-                            st.session_state[f'edit_vehicle_{vehicle["vehicle_id"]}'] = True
+                            # Remember the version being edited so a save can't overwrite someone else's changes
+                            st.session_state[f'edit_vehicle_{vehicle["vehicle_id"]}'] = dm.row_version('vehicles', vehicle)
                             st.rerun()
                     
                     with col2:
@@ -288,10 +312,14 @@ def main():
                                             'defects': new_defects,
                                             'notes': new_notes
                                         }
-                                        dm.update_vehicle(updated_vehicle)
-                                        st.success("Vehicle updated successfully!")
-                                        del st.session_state[f'edit_vehicle_{vehicle["vehicle_id"]}']
-                                        st.rerun()
+                                        try:
+                                            dm.update_vehicle(updated_vehicle, expected_version=st.session_state[f'edit_vehicle_{vehicle["vehicle_id"]}'])
+                                        except ConcurrentEditError as e:
+                                            st.error(f"{e}. Cancel and edit again to see the latest details.")
+                                        else:
+                                            st.success("Vehicle updated successfully!")
+                                            del st.session_state[f'edit_vehicle_{vehicle["vehicle_id"]}']
+                                            st.rerun()
                             
                             with col2:
                                 if st.form_submit_button("Cancel"):
@@ -428,7 +456,8 @@ def main():
             
             if uploaded_file is not None:
                 try:
-                    import_df = pd.read_csv(uploaded_file)
+                    # Only the first rows are read for the preview; the import streams the file
+                    import_df = pd.read_csv(uploaded_file, nrows=5)
                     
                     # Validate required columns
                     required_columns = ['make', 'model', 'year', 'weight', 'license_plate', 'vehicle_type', 'status', 'mileage']
@@ -438,14 +467,61 @@ def main():
                         st.dataframe(import_df.head())
                         
                         if st.button("Import Vehicles"):
-                            success_count = dm.import_vehicles(import_df)
-                            st.success(f"Successfully imported {success_count} vehicles!")
-                            st.rerun()
+                            uploaded_file.seek(0)
+                            progress_bar = st.progress(0.0, text="Importing...")
+                            report = dm.import_csv(
+                                'vehicles', uploaded_file,
+                                progress=lambda rows, done: progress_bar.progress(done, text=f"Imported {rows:,} rows...")
+                            )
+                            st.success(f"Successfully imported {report.accepted_count} vehicles!")
+                            if report.rejected_count:
+                                st.warning(f"{report.rejected_count} rows were skipped:")
+                                st.dataframe(report.rejected[['row', 'reason']], hide_index=True)
+                            else:
+                                st.rerun()
                     else:
                         st.error(f"CSV must contain these columns: {', '.join(required_columns)}")
                         
                 except Exception as e:
                     st.error(f"Error reading CSV file: {str(e)}")
+        
+        st.markdown("---")
+        st.markdown("#### Bulk Update Mileage or Status")
+        st.caption("Upload a CSV with one column identifying each vehicle and one with its new mileage or status.")
+        update_file = st.file_uploader("Choose a CSV file", type="csv", key="bulk_update_file")
+        
+        if update_file is not None:
+            try:
+                update_df = pd.read_csv(update_file)
+                file_columns = list(update_df.columns)
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    id_column = st.selectbox("Column identifying each vehicle", file_columns)
+                    match_label = st.selectbox("Identified by", list(BULK_MATCH_COLUMNS))
+                with col2:
+                    value_column = st.selectbox("Column with the new values", file_columns, index=len(file_columns) - 1)
+                    field_label = st.selectbox("Update", list(BULK_UPDATE_FIELDS))
+                
+                match_on, field = BULK_MATCH_COLUMNS[match_label], BULK_UPDATE_FIELDS[field_label]
+                updates = pd.DataFrame({match_on: update_df[id_column], field: update_df[value_column]})
+                st.write(f"Preview of {len(updates)} updates:")
+                st.dataframe(updates.head(), hide_index=True)
+                
+                if st.button("Apply Updates"):
+                    if field == 'status':
+                        report = dm.bulk_update_status('vehicles', updates, match_on, allowed=["On Hire", "Off Hire", "Maintenance"])
+                    else:
+                        report = dm.bulk_update_vehicle_mileage(updates, match_on)
+                    st.success(f"Updated {report.accepted_count} vehicles!")
+                    if report.rejected_count:
+                        st.warning(f"{report.rejected_count} rows were skipped:")
+                        st.dataframe(report.rejected[['row', 'reason']], hide_index=True)
+                    else:
+                        st.rerun()
+            
+            except Exception as e:
+                st.error(f"Error reading CSV file: {str(e)}")
     
     # Create permanent sidebar
     create_sidebar()
@@ -4,9 +4,15 @@ from datetime import datetime, date, timedelta
 import sys
 import os
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_manager import DataManager
+from utils.data_manager import ConcurrentEditError
+from utils.services import get_data_manager
+from utils.schema import format_date
 from login import check_password, show_logout_button
 
 st.set_page_config(
@@ -16,11 +22,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
-
 def create_sidebar():
     """Create permanent sidebar navigation"""
     with st.sidebar:
@@ -130,7 +131,7 @@ def main():
         return
     
     # Tabs for different actions
-    tab1, tab2, tab3, tab4 = st.tabs(["📋 View Records", "➕ Log Maintenance", "📅 Upcoming Due", "📊 Import/Export"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📋 View Records", "➕ Log Maintenance", "📅 Upcoming Due", "🗓️ Service Schedules", "📊 Import/Export"])
     
     with tab1:
         st.markdown('<div class="section-header">Maintenance History</div>', unsafe_allow_html=True)
@@ -156,18 +157,17 @@ def main():
                     start_date = st.date_input("Start Date", value=date.today() - timedelta(days=365))
                     end_date = st.date_input("End Date", value=date.today())
             
-            # Apply filters
-            filtered_df = maintenance_df.copy()
-            
+            # Apply filters; one vehicle's records come straight from its history index
             if vehicle_filter != "All":
-                filtered_df = filtered_df[filtered_df['vehicle_id'] == vehicle_filter]
+                filtered_df = dm.get_vehicle_maintenance_history(vehicle_filter)
+            else:
+                filtered_df = maintenance_df.copy()
             
             if type_filter != "All":
                 filtered_df = filtered_df[filtered_df['type'] == type_filter]
             
             # Apply date filter
             if date_range != "All Time":
-                filtered_df['date'] = pd.to_datetime(filtered_df['date'])
                 
                 if date_range == "Last 30 Days":
                     cutoff_date = datetime.now() - timedelta(days=30)
@@ -219,11 +219,11 @@ def main():
                 for index, record in filtered_df.iterrows():
                     vehicle_info = f"{record['year']} {record['make']} {record['model']} ({record['license_plate']})"
                     
-                    with st.expander(f"{record['date']} - {record['type']} - {vehicle_info} - ${record['cost']:.2f}"):
+                    with st.expander(f"{format_date(record['date'])} - {record['type']} - {vehicle_info} - ${record['cost']:.2f}"):
                         col1, col2 = st.columns(2)
                         
                         with col1:
-                            st.write(f"**Date:** {record['date']}")
+                            st.write(f"**Date:** {format_date(record['date'])}")
                             st.write(f"**Type:** {record['type']}")
                             st.write(f"**Cost:** £{record['cost']:.2f}")
                             st.write(f"**Mileage:** {record['mileage']:,} miles")
@@ -240,7 +240,8 @@ def main():
                         col1, col2 = st.columns(2)
                         with col1:
                             if st.button(f"Edit", key=f"edit_maintenance_{record['maintenance_id']}"):
-                                st.session_state[f'edit_maintenance_{record["maintenance_id"]}'] = True
+                                # Remember the version being edited so a save can't overwrite someone else's changes
+                                st.session_state[f'edit_maintenance_{record["maintenance_id"]}'] = dm.row_version('maintenance', record)
                                 st.rerun()
                         
                         with col2:
@@ -262,7 +263,7 @@ def main():
                                 col1, col2 = st.columns(2)
                                 
                                 with col1:
-                                    new_date = st.date_input("Date", value=pd.to_datetime(record['date']).date())
+                                    new_date = st.date_input("Date", value=record['date'].date() if pd.notna(record['date']) else date.today())
                                     new_type = st.selectbox("Type", 
                                                           ["Oil Change", "Tire Rotation", "Brake Service", "Transmission Service", 
                                                            "Engine Repair", "General Maintenance", "Inspection", "Other"],
@@ -290,10 +291,14 @@ def main():
                                             'service_provider': new_service_provider,
                                             'next_due_mileage': new_next_due if new_next_due > 0 else None
                                         }
-                                        dm.update_maintenance(updated_maintenance)
-                                        st.success("Maintenance record updated successfully!")
-                                        del st.session_state[f'edit_maintenance_{record["maintenance_id"]}']
-                                        st.rerun()
+                                        try:
+                                            dm.update_maintenance(updated_maintenance, expected_version=st.session_state[f'edit_maintenance_{record["maintenance_id"]}'])
+                                        except ConcurrentEditError as e:
+                                            st.error(f"{e}. Cancel and edit again to see the latest details.")
+                                        else:
+                                            st.success("Maintenance record updated successfully!")
+                                            del st.session_state[f'edit_maintenance_{record["maintenance_id"]}']
+                                            st.rerun()
                                 
                                 with col2:
                                     if st.form_submit_button("Cancel"):
@@ -367,57 +372,147 @@ def main():
     with tab3:
         st.subheader("Upcoming Maintenance Due")
         
-        maintenance_df = dm.load_maintenance()
+        # Latest schedule per vehicle and type, kept up to date as records are logged
+        overdue, due_soon, upcoming = dm.get_maintenance_due(due_soon_miles=1000)
         
-        if not maintenance_df.empty:
-            # Get vehicles with next due mileage
-            due_maintenance = maintenance_df[maintenance_df['next_due_mileage'].notna()].copy()
+        if not (overdue.empty and due_soon.empty and upcoming.empty):
+            # Display overdue items
+            if not overdue.empty:
+                st.error("⚠️ Overdue Maintenance")
+                for _, item in overdue.iterrows():
+                    vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
+                    overdue_miles = abs(item['miles_until_due'])
+                    st.write(f"🔴 **{vehicle_info}** - {item['type']} - Overdue by {overdue_miles:,} miles")
             
-            if not due_maintenance.empty:
-                # Merge with vehicle data
-                due_maintenance = due_maintenance.merge(vehicles_df, on='vehicle_id', how='left')
-                
-                # Calculate how close each vehicle is to due maintenance
-                due_maintenance['miles_until_due'] = due_maintenance['next_due_mileage'] - due_maintenance['mileage']
-                
-                # Sort by miles until due (closest first)
-                due_maintenance = due_maintenance.sort_values('miles_until_due')
-                
-                # Categorize by urgency
-                overdue = due_maintenance[due_maintenance['miles_until_due'] <= 0]
-                due_soon = due_maintenance[(due_maintenance['miles_until_due'] > 0) & (due_maintenance['miles_until_due'] <= 1000)]
-                upcoming = due_maintenance[due_maintenance['miles_until_due'] > 1000]
-                
-                # Display overdue items
-                if not overdue.empty:
-                    st.error("⚠️ Overdue Maintenance")
-                    for _, item in overdue.iterrows():
-                        vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
-                        overdue_miles = abs(item['miles_until_due'])
-                        st.write(f"🔴 **{vehicle_info}** - {item['type']} - Overdue by {overdue_miles:,} miles")
-                
-                # Display due soon items
-                if not due_soon.empty:
-                    st.warning("⏰ Due Soon (Within 1,000 miles)")
-                    for _, item in due_soon.iterrows():
-                        vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
-                        st.write(f"🟡 **{vehicle_info}** - {item['type']} - Due in {item['miles_until_due']:,} miles")
-                
-                # Display upcoming items
-                if not upcoming.empty:
-                    st.info("📅 Upcoming Maintenance")
-                    for _, item in upcoming.iterrows():
-                        vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
-                        st.write(f"🟢 **{vehicle_info}** - {item['type']} - Due in {item['miles_until_due']:,} miles")
-                
-                if overdue.empty and due_soon.empty and upcoming.empty:
-                    st.success("✅ No upcoming maintenance scheduled!")
-            else:
-                st.info("No maintenance schedules found. Log maintenance with 'Next Due Mileage' to track upcoming services.")
+            # Display due soon items
+            if not due_soon.empty:
+                st.warning("⏰ Due Soon (Within 1,000 miles)")
+                for _, item in due_soon.iterrows():
+                    vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
+                    st.write(f"🟡 **{vehicle_info}** - {item['type']} - Due in {item['miles_until_due']:,} miles")
+            
+            # Display upcoming items
+            if not upcoming.empty:
+                st.info("📅 Upcoming Maintenance")
+                for _, item in upcoming.iterrows():
+                    vehicle_info = f"{item['year']} {item['make']} {item['model']} ({item['license_plate']})"
+                    st.write(f"🟢 **{vehicle_info}** - {item['type']} - Due in {item['miles_until_due']:,} miles")
         else:
-            st.info("No maintenance records found.")
+            st.info("No maintenance schedules found. Log maintenance with 'Next Due Mileage' to track upcoming services.")
     
     with tab4:
+        st.subheader("Service Schedules")
+        st.write("Recurring services by mileage, engine hours or calendar interval (MOT, LOLER, inspections...)")
+        
+        # What's due across the whole fleet
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            due_days = st.number_input("Due within (days)", min_value=0, value=30)
+        with col2:
+            due_miles = st.number_input("Due within (miles)", min_value=0, value=1000)
+        with col3:
+            due_hours = st.number_input("Due within (engine hours)", min_value=0, value=50)
+        
+        services_due = dm.get_services_due(days=due_days, miles=due_miles, hours=due_hours)
+        
+        if not services_due.empty:
+            for _, item in services_due.iterrows():
+                icon = "🔴" if item['status'] in ('Overdue', 'Not Yet Done') else "🟡"
+                remaining = []
+                if pd.notna(item['days_until_due']):
+                    remaining.append(f"{int(item['days_until_due'])} days (due {item['next_due_date']:%Y-%m-%d})")
+                if pd.notna(item['miles_until_due']):
+                    remaining.append(f"{item['miles_until_due']:,.0f} miles")
+                if pd.notna(item['hours_until_due']):
+                    remaining.append(f"{item['hours_until_due']:,.0f} hours")
+                if not remaining:
+                    remaining.append("no record of it being done")
+                
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    st.write(f"{icon} **{item['asset_name']}** - {item['service_type']} - {item['status']}: {', '.join(remaining)}")
+                with col2:
+                    if st.button("✅ Mark Done", key=f"complete_service_{item['schedule_id']}"):
+                        dm.complete_service(item['schedule_id'])
+                        st.success(f"{item['service_type']} marked as done")
+                        st.rerun()
+        else:
+            st.success("✅ Nothing due within these limits")
+        
+        st.markdown("---")
+        st.markdown("#### Add Service Schedule")
+        
+        machines_df = dm.load_machines()
+        
+        with st.form("add_service_schedule_form"):
+            # Vehicles and machines can both have schedules
+            asset_options = {}
+            for _, vehicle in vehicles_df.iterrows():
+                display_name = f"🚗 {vehicle['year']} {vehicle['make']} {vehicle['model']} ({vehicle['license_plate']})"
+                asset_options[display_name] = (vehicle['vehicle_id'], 'vehicle', vehicle['mileage'])
+            for _, machine in machines_df.iterrows():
+                display_name = f"🏗️ {machine['make']} {machine['model']} ({machine['whites_id']})"
+                asset_options[display_name] = (machine['machine_id'], 'machine', machine['hours'])
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                selected_asset = st.selectbox("Vehicle / Machine *", list(asset_options.keys()))
+                service_type = st.selectbox("Service *", [
+                    "MOT", "LOLER", "6-Weekly Inspection", "Annual Service", "Oil Change", "Tachograph Calibration", "Other"
+                ])
+                last_done_date = st.date_input("Last Done *", value=date.today())
+                last_done_reading = st.number_input("Mileage / Hours When Last Done", min_value=0, value=0,
+                                                    help="Leave at 0 to use the current reading")
+            
+            with col2:
+                interval_days = st.number_input("Every N Days (0 = not calendar based)", min_value=0, value=0)
+                interval_miles = st.number_input("Every N Miles (vehicles)", min_value=0, value=0)
+                interval_hours = st.number_input("Every N Engine Hours (machines)", min_value=0, value=0)
+            
+            if st.form_submit_button("Add Schedule", type="primary"):
+                asset_id, asset_type, current_reading = asset_options[selected_asset]
+                if not (interval_days or interval_miles or interval_hours):
+                    st.error("Please set at least one interval.")
+                else:
+                    reading = last_done_reading if last_done_reading > 0 else current_reading
+                    new_schedule = {
+                        'asset_id': asset_id,
+                        'asset_type': asset_type,
+                        'service_type': service_type,
+                        'interval_days': interval_days if interval_days > 0 else None,
+                        'interval_miles': interval_miles if interval_miles > 0 else None,
+                        'interval_hours': interval_hours if interval_hours > 0 else None,
+                        'last_done_date': last_done_date.strftime('%Y-%m-%d'),
+                        'last_done_mileage': reading if asset_type == 'vehicle' else None,
+                        'last_done_hours': reading if asset_type == 'machine' else None,
+                    }
+                    dm.add_service_schedule(new_schedule)
+                    st.success(f"{service_type} schedule added for {selected_asset}")
+                    st.rerun()
+        
+        # Existing schedules
+        schedules_df = dm.load_service_schedules()
+        if not schedules_df.empty:
+            st.markdown("#### All Schedules")
+            st.dataframe(
+                schedules_df[['service_type', 'asset_type', 'interval_days', 'interval_miles', 'interval_hours', 'last_done_date']],
+                use_container_width=True, hide_index=True
+            )
+            
+            schedule_options = {
+                f"{row['service_type']} ({row['schedule_id']})": row['schedule_id']
+                for _, row in schedules_df.iterrows()
+            }
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                schedule_to_delete = st.selectbox("Remove schedule", list(schedule_options.keys()))
+            with col2:
+                if st.button("🗑️ Delete Schedule"):
+                    dm.delete_service_schedule(schedule_options[schedule_to_delete])
+                    st.rerun()
+    
+    with tab5:
         st.subheader("Import/Export Maintenance Data")
         
         col1, col2 = st.columns(2)
@@ -451,7 +546,8 @@ def main():
             
             if uploaded_file is not None:
                 try:
-                    import_df = pd.read_csv(uploaded_file)
+                    # Only the first rows are read for the preview; the import streams the file
+                    import_df = pd.read_csv(uploaded_file, nrows=5)
                     
                     # Validate required columns
                     required_columns = ['vehicle_id', 'date', 'type', 'description', 'cost', 'mileage']
@@ -461,9 +557,18 @@ def main():
                         st.dataframe(import_df.head())
                         
                         if st.button("Import Maintenance Records"):
-                            success_count = dm.import_maintenance(import_df)
-                            st.success(f"Successfully imported {success_count} maintenance records!")
-                            st.rerun()
+                            uploaded_file.seek(0)
+                            progress_bar = st.progress(0.0, text="Importing...")
+                            report = dm.import_csv(
+                                'maintenance', uploaded_file,
+                                progress=lambda rows, done: progress_bar.progress(done, text=f"Imported {rows:,} rows...")
+                            )
+                            st.success(f"Successfully imported {report.accepted_count} maintenance records!")
+                            if report.rejected_count:
+                                st.warning(f"{report.rejected_count} rows were skipped:")
+                                st.dataframe(report.rejected[['row', 'reason']], hide_index=True)
+                            else:
+                                st.rerun()
                     else:
                         st.error(f"CSV must contain these columns: {', '.join(required_columns)}")
                         
@@ -6,9 +6,14 @@ from datetime import datetime, date, timedelta
 import sys
 import os
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_manager import DataManager
+from utils.services import get_data_manager
+from utils.schema import format_date
 from login import check_password, show_logout_button
 
 st.set_page_config(
@@ -18,11 +23,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
-
 def create_sidebar():
     """Create permanent sidebar navigation"""
     with st.sidebar:
@@ -211,20 +211,15 @@ def main():
         with col1:
             st.subheader("💰 Maintenance Costs Over Time")
             
-            # Prepare data for time series
-            maintenance_df_copy = maintenance_df.copy()
-            maintenance_df_copy['date'] = pd.to_datetime(maintenance_df_copy['date'])
-            maintenance_df_copy['year_month'] = maintenance_df_copy['date'].dt.to_period('M')
-            
-            monthly_costs = maintenance_df_copy.groupby('year_month')['cost'].sum().reset_index()
-            monthly_costs['year_month'] = monthly_costs['year_month'].astype(str)
+            # Monthly totals are kept rolled up by DataManager
+            monthly_costs = dm.get_monthly_maintenance_costs()
             
             fig_costs = px.line(
                 monthly_costs,
-                x='year_month',
+                x='month',
                 y='cost',
                 title="Monthly Maintenance Costs",
-                labels={'cost': 'Cost ($)', 'year_month': 'Month'}
+                labels={'cost': 'Cost ($)', 'month': 'Month'}
             )
             fig_costs.update_layout(xaxis_tickangle=-45)
             st.plotly_chart(fig_costs, use_container_width=True)
@@ -284,8 +279,10 @@ def main():
         st.markdown("---")
         st.subheader("🚙 Maintenance Analysis by Vehicle")
         
-        # Merge maintenance with vehicle data
-        maintenance_vehicle = maintenance_df.merge(vehicles_df, on='vehicle_id', how='left')
+        # Per-vehicle totals from the monthly rollup, merged with vehicle data
+        vehicle_totals = dm.get_monthly_maintenance_costs(by='vehicle_id', include_undated=True).groupby('vehicle_id')[['cost', 'count']].sum().reset_index()
+        vehicles_named = vehicles_df.assign(vehicle_id=vehicles_df['vehicle_id'].astype(str))
+        maintenance_vehicle = vehicle_totals.merge(vehicles_named, on='vehicle_id', how='left')
         maintenance_vehicle['vehicle_name'] = (
             maintenance_vehicle['year'].astype(str) + ' ' + 
             maintenance_vehicle['make'] + ' ' + 
@@ -311,7 +308,7 @@ def main():
         
         with col2:
             # Maintenance frequency by vehicle
-            vehicle_frequency = maintenance_vehicle.groupby('vehicle_name').size().sort_values(ascending=False).head(10)
+            vehicle_frequency = maintenance_vehicle.groupby('vehicle_name')['count'].sum().sort_values(ascending=False).head(10)
             
             fig_vehicle_freq = px.bar(
                 x=vehicle_frequency.values,
@@ -360,27 +357,22 @@ def main():
             
             with col1:
                 # Monthly rental revenue
-                rentals_copy = rentals_df.copy()
-                rentals_copy['start_date'] = pd.to_datetime(rentals_copy['start_date'])
-                rentals_copy['year_month'] = rentals_copy['start_date'].dt.to_period('M')
-                
-                monthly_revenue = rentals_copy.groupby('year_month')['rental_rate'].sum().reset_index()
-                monthly_revenue['year_month'] = monthly_revenue['year_month'].astype(str)
+                monthly_revenue = dm.get_monthly_rental_revenue()
                 
                 fig_revenue = px.line(
                     monthly_revenue,
-                    x='year_month',
+                    x='month',
                     y='rental_rate',
                     title="Monthly Rental Revenue",
-                    labels={'rental_rate': 'Revenue ($)', 'year_month': 'Month'}
+                    labels={'rental_rate': 'Revenue ($)', 'month': 'Month'}
                 )
                 fig_revenue.update_layout(xaxis_tickangle=-45)
                 st.plotly_chart(fig_revenue, use_container_width=True)
             
             with col2:
                 # Top earning equipment
-                equipment_revenue = rentals_df.merge(
-                    equipment_df[['equipment_id', 'name']], 
+                equipment_revenue = dm.get_monthly_rental_revenue(by='equipment_id', include_undated=True).merge(
+                    equipment_df[['equipment_id', 'name']].astype({'equipment_id': str}), 
                     on='equipment_id', 
                     how='left'
                 )
@@ -416,7 +408,7 @@ def main():
             
             for _, record in recent_with_vehicles.iterrows():
                 vehicle_info = f"{record['year']} {record['make']} {record['model']} ({record['license_plate']})"
-                st.write(f"**{record['date']}** - {record['type']} on {vehicle_info} - ${record['cost']:.2f}")
+                st.write(f"**{format_date(record['date'])}** - {record['type']} on {vehicle_info} - ${record['cost']:.2f}")
         else:
             st.info("No recent maintenance activity")
     
@@ -425,15 +417,9 @@ def main():
         
         if not maintenance_df.empty:
             # Check for overdue maintenance
-            due_maintenance = maintenance_df[maintenance_df['next_due_mileage'].notna()].copy()
+            overdue, due_soon, upcoming = dm.get_maintenance_due(due_soon_miles=1000)
             
-            if not due_maintenance.empty:
-                due_maintenance = due_maintenance.merge(vehicles_df, on='vehicle_id', how='left')
-                due_maintenance['miles_until_due'] = due_maintenance['next_due_mileage'] - due_maintenance['mileage']
-                
-                overdue = due_maintenance[due_maintenance['miles_until_due'] <= 0]
-                due_soon = due_maintenance[(due_maintenance['miles_until_due'] > 0) & (due_maintenance['miles_until_due'] <= 1000)]
-                
+            if not (overdue.empty and due_soon.empty and upcoming.empty):
                 if not overdue.empty:
                     st.error(f"🔴 {len(overdue)} vehicle(s) have overdue maintenance")
                     for _, item in overdue.head(3).iterrows():
@@ -4,9 +4,16 @@ from datetime import datetime, date, timedelta
 import sys
 import os
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_manager import DataManager
+from utils.data_manager import ConcurrentEditError
+from utils.services import get_data_manager
+from utils.pagination import show_paged_frame
+from utils.schema import format_date
 from login import check_password, show_logout_button
 
 st.set_page_config(
@@ -16,10 +23,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
+# Sort options for the list view, mapped to their columns
+EQUIPMENT_SORT_COLUMNS = {
+    "Date Added": None,
+    "Name": 'name',
+    "Category": 'category',
+    "Brand": 'brand',
+    "Whites ID": 'whites_id',
+    "Daily Rate": 'daily_rate',
+    "Status": 'status',
+}
 
 def create_sidebar():
     """Create permanent sidebar navigation"""
@@ -137,7 +150,7 @@ def main():
     dm = get_data_manager()
     
     # Tabs for different actions
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📋 View Equipment", "➕ Add Equipment", "📅 Active Rentals", "📊 Rental History", "💰 Import/Export"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📋 View Equipment", "➕ Add Equipment", "📅 Active Rentals", "🔎 Find Available", "📊 Rental History", "💰 Import/Export"])
     
     with tab1:
         st.markdown('<div class="section-header">Equipment Inventory</div>', unsafe_allow_html=True)
@@ -161,13 +174,10 @@ def main():
             filtered_df = equipment_df.copy()
             
             if search_term:
-                mask = (
-                    filtered_df['name'].str.contains(search_term, case=False, na=False) |
-                    filtered_df['category'].str.contains(search_term, case=False, na=False) |
-                    filtered_df['brand'].str.contains(search_term, case=False, na=False) |
-                    filtered_df['model'].str.contains(search_term, case=False, na=False)
-                )
-                filtered_df = filtered_df[mask]
+                # Matches name, category, brand, model, Whites ID or serial number
+                matches = dm.search('equipment', search_term)
+                if matches is not None:
+                    filtered_df = filtered_df[filtered_df['equipment_id'].astype(str).isin(matches)]
             
             if category_filter != "All":
                 filtered_df = filtered_df[filtered_df['category'] == category_filter]
@@ -192,8 +202,9 @@ def main():
                 else:
                     st.metric("Total Value", "£0.00")
             
-            # Display equipment
-            for index, equipment in filtered_df.iterrows():
+            # Display one page of equipment at a time
+            page_df = show_paged_frame(filtered_df, "equipment_list", EQUIPMENT_SORT_COLUMNS)
+            for index, equipment in page_df.iterrows():
                 status_color = {
                     'Available': '🟢',
                     'Rented': '🔴',
@@ -215,7 +226,7 @@ def main():
                         st.write(f"**Daily Rate:** £{equipment['daily_rate']:.2f}")
                         st.write(f"**Weekly Rate:** £{equipment['weekly_rate']:.2f}")
                         st.write(f"**Purchase Price:** £{equipment['purchase_price']:.2f}")
-                        st.write(f"**Purchase Date:** {equipment['purchase_date']}")
+                        st.write(f"**Purchase Date:** {format_date(equipment['purchase_date'])}")
                         st.write(f"**Last Service:** {equipment.get('last_service_date', 'N/A')}")
                     
                     if equipment.get('notes'):
@@ -275,8 +286,13 @@ def main():
                             col1, col2 = st.columns(2)
                             with col1:
                                 if st.form_submit_button("Create Rental"):
+                                    conflicts = dm.get_rental_conflicts(equipment['equipment_id'], start_date, expected_return)
                                     if not customer_name or not start_date or not expected_return:
                                         st.error("Please fill in all required fields")
+                                    elif expected_return < start_date:
+                                        st.error("Expected return date can't be before the start date")
+                                    elif conflicts:
+                                        st.error(f"This equipment is already booked for those dates (rental {', '.join(conflicts)})")
                                     else:
                                         # Calculate rental cost
                                         days = (expected_return - start_date).days + 1
@@ -301,11 +317,16 @@ def main():
                                             'notes': notes
                                         }
                                         
-                                        dm.add_rental(rental_data)
-                                        dm.update_equipment_status(equipment['equipment_id'], 'Rented')
-                                        st.success("Rental created successfully!")
-                                        del st.session_state[f'rent_equipment_{equipment["equipment_id"]}']
-                                        st.rerun()
+                                        try:
+                                            # Checked again under the table lock, in case another session booked in between
+                                            dm.add_rental(rental_data)
+                                        except ValueError as e:
+                                            st.error(str(e))
+                                        else:
+                                            dm.update_equipment_status(equipment['equipment_id'], 'Rented')
+                                            st.success("Rental created successfully!")
+                                            del st.session_state[f'rent_equipment_{equipment["equipment_id"]}']
+                                            st.rerun()
                             
                             with col2:
                                 if st.form_submit_button("Cancel"):
@@ -368,36 +389,26 @@ def main():
         st.subheader("Active Rentals")
         
         rentals_df = dm.load_rentals()
-        equipment_df = dm.load_equipment()
         
         if not rentals_df.empty:
-            active_rentals = rentals_df[rentals_df['status'] == 'Active'].copy()
+            # Joined to equipment and bucketed by days overdue, cached until rentals or equipment change
+            active_rentals = dm.get_active_rentals()
             
             if not active_rentals.empty:
-                # Merge with equipment data
-                active_rentals = active_rentals.merge(
-                    equipment_df[['equipment_id', 'name', 'category', 'brand', 'model']], 
-                    on='equipment_id', 
-                    how='left'
-                )
-                
-                # Calculate days overdue
-                active_rentals['expected_return_date'] = pd.to_datetime(active_rentals['expected_return_date'])
-                active_rentals['days_overdue'] = (pd.Timestamp.now() - active_rentals['expected_return_date']).dt.days
+                # Bucket summary and filter
+                bucket_counts = {bucket: count for bucket, count in dm.get_overdue_bucket_counts(active_rentals).items() if count}
+                metric_cols = st.columns(len(bucket_counts))
+                for metric_col, (bucket, count) in zip(metric_cols, bucket_counts.items()):
+                    with metric_col:
+                        st.metric(bucket, count)
                 
-                # Sort by overdue first, then by return date
-                active_rentals = active_rentals.sort_values(['days_overdue'], ascending=False)
+                bucket_filter = st.selectbox("Show", ["All"] + list(bucket_counts), key="active_rentals_bucket")
+                if bucket_filter != "All":
+                    active_rentals = active_rentals[active_rentals['overdue_bucket'] == bucket_filter]
                 
-                for index, rental in active_rentals.iterrows():
-                    equipment_name = f"{rental['name']} - {rental['brand']} {rental['model']}"
-                    
-                    # Color code based on status
-                    if rental['days_overdue'] > 0:
-                        status_indicator = f"🔴 OVERDUE ({rental['days_overdue']} days)"
-                    elif rental['days_overdue'] == 0:
-                        status_indicator = "🟡 DUE TODAY"
-                    else:
-                        status_indicator = f"🟢 {abs(rental['days_overdue'])} days remaining"
+                for rental in active_rentals.to_dict('records'):
+                    equipment_name = rental['equipment_name']
+                    status_indicator = rental['status_label']
                     
                     with st.expander(f"{status_indicator} - {equipment_name} - {rental['customer_name']}"):
                         col1, col2 = st.columns(2)
@@ -409,8 +420,8 @@ def main():
                             st.write(f"**Email:** {rental.get('customer_email', 'N/A')}")
                         
                         with col2:
-                            st.write(f"**Start Date:** {rental['start_date']}")
-                            st.write(f"**Expected Return:** {rental['expected_return_date'].strftime('%Y-%m-%d')}")
+                            st.write(f"**Start Date:** {format_date(rental['start_date'])}")
+                            st.write(f"**Expected Return:** {format_date(rental['expected_return_date'])}")
                             st.write(f"**Rental Rate:** £{rental['rental_rate']:.2f}")
                             st.write(f"**Deposit:** £{rental.get('deposit', 0):.2f}")
                         
@@ -422,7 +433,8 @@ def main():
                         
                         with col1:
                             if st.button(f"Return Equipment", key=f"return_{rental['rental_id']}"):
-                                st.session_state[f'return_rental_{rental["rental_id"]}'] = True
+                                # Remember the version being returned so two people can't process the same return
+                                st.session_state[f'return_rental_{rental["rental_id"]}'] = dm.row_version('rentals', rental)
                                 st.rerun()
                         
                         with col2:
@@ -453,25 +465,28 @@ def main():
                                 with col1:
                                     if st.form_submit_button("Process Return"):
                                         # Calculate final cost
-                                        actual_days = (return_date - pd.to_datetime(rental['start_date']).date()).days + 1
-                                        expected_days = (pd.to_datetime(rental['expected_return_date']).date() - pd.to_datetime(rental['start_date']).date()).days + 1
+                                        actual_days = (return_date - rental['start_date'].date()).days + 1
+                                        expected_days = (rental['expected_return_date'].date() - rental['start_date'].date()).days + 1
                                         
                                         # Update rental record
-                                        dm.return_rental(rental['rental_id'], {
-                                            'actual_return_date': return_date.strftime('%Y-%m-%d'),
-                                            'return_condition': return_condition,
-                                            'damage_notes': damage_notes,
-                                            'additional_charges': additional_charges,
-                                            'status': 'Returned'
-                                        })
-                                        
-                                        # Update equipment status
-                                        new_status = 'Available' if return_condition in ['Excellent', 'Good'] else 'Maintenance'
-                                        dm.update_equipment_status(rental['equipment_id'], new_status)
-                                        
-                                        st.success("Equipment returned successfully!")
-                                        del st.session_state[f'return_rental_{rental["rental_id"]}']
-                                        st.rerun()
+                                        try:
+                                            dm.return_rental(rental['rental_id'], {
+                                                'actual_return_date': return_date.strftime('%Y-%m-%d'),
+                                                'return_condition': return_condition,
+                                                'damage_notes': damage_notes,
+                                                'additional_charges': additional_charges,
+                                                'status': 'Returned'
+                                            }, expected_version=st.session_state[f'return_rental_{rental["rental_id"]}'])
+                                        except ConcurrentEditError as e:
+                                            st.error(f"{e}. Cancel to see the latest details.")
+                                        else:
+                                            # Update equipment status
+                                            new_status = 'Available' if return_condition in ['Excellent', 'Good'] else 'Maintenance'
+                                            dm.update_equipment_status(rental['equipment_id'], new_status)
+                                            
+                                            st.success("Equipment returned successfully!")
+                                            del st.session_state[f'return_rental_{rental["rental_id"]}']
+                                            st.rerun()
                                 
                                 with col2:
                                     if st.form_submit_button("Cancel"):
@@ -483,6 +498,43 @@ def main():
             st.info("No rental records found.")
     
     with tab4:
+        st.subheader("Find Available Equipment")
+        
+        equipment_df = dm.load_equipment()
+        
+        if not equipment_df.empty:
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                available_from = st.date_input("From", value=date.today(), key="available_from")
+            
+            with col2:
+                available_to = st.date_input("To", value=date.today() + timedelta(days=1), key="available_to")
+            
+            with col3:
+                available_category = st.selectbox("Category", ["All"] + sorted(equipment_df['category'].unique().tolist()), key="available_category")
+            
+            if available_to < available_from:
+                st.error("The end date can't be before the start date")
+            else:
+                # Equipment with no booking overlapping the dates, whatever its status today
+                available_df = dm.find_available_equipment(
+                    available_from, available_to,
+                    category=None if available_category == "All" else available_category
+                )
+                
+                st.metric("Available for these dates", len(available_df))
+                if not available_df.empty:
+                    st.dataframe(
+                        available_df[['name', 'category', 'brand', 'model', 'whites_id', 'daily_rate', 'weekly_rate', 'status']],
+                        use_container_width=True
+                    )
+                else:
+                    st.info("No equipment is free for the whole of that period.")
+        else:
+            st.info("No equipment in inventory.")
+    
+    with tab5:
         st.subheader("Rental History")
         
         rentals_df = dm.load_rentals()
@@ -545,7 +597,7 @@ def main():
         else:
             st.info("No rental history available.")
     
-    with tab5:
+    with tab6:
         st.subheader("Import/Export Data")
         
         col1, col2 = st.columns(2)
@@ -581,7 +633,8 @@ def main():
             
             if uploaded_file is not None:
                 try:
-                    import_df = pd.read_csv(uploaded_file)
+                    # Only the first rows are read for the preview; the import streams the file
+                    import_df = pd.read_csv(uploaded_file, nrows=5)
                     
                     # Check if it's equipment or rental data
                     equipment_columns = ['name', 'category', 'brand', 'model', 'daily_rate']
@@ -592,18 +645,36 @@ def main():
                         st.dataframe(import_df.head())
                         
                         if st.button("Import Equipment"):
-                            success_count = dm.import_equipment(import_df)
-                            st.success(f"Successfully imported {success_count} equipment items!")
-                            st.rerun()
+                            uploaded_file.seek(0)
+                            progress_bar = st.progress(0.0, text="Importing...")
+                            report = dm.import_csv(
+                                'equipment', uploaded_file,
+                                progress=lambda rows, done: progress_bar.progress(done, text=f"Imported {rows:,} rows...")
+                            )
+                            st.success(f"Successfully imported {report.accepted_count} equipment items!")
+                            if report.rejected_count:
+                                st.warning(f"{report.rejected_count} rows were skipped:")
+                                st.dataframe(report.rejected[['row', 'reason']], hide_index=True)
+                            else:
+                                st.rerun()
                     
                     elif all(col in import_df.columns for col in rental_columns):
                         st.write("Preview of rental data:")
                         st.dataframe(import_df.head())
                         
                         if st.button("Import Rentals"):
-                            success_count = dm.import_rentals(import_df)
-                            st.success(f"Successfully imported {success_count} rental records!")
-                            st.rerun()
+                            uploaded_file.seek(0)
+                            progress_bar = st.progress(0.0, text="Importing...")
+                            report = dm.import_csv(
+                                'rentals', uploaded_file,
+                                progress=lambda rows, done: progress_bar.progress(done, text=f"Imported {rows:,} rows...")
+                            )
+                            st.success(f"Successfully imported {report.accepted_count} rental records!")
+                            if report.rejected_count:
+                                st.warning(f"{report.rejected_count} rows were skipped:")
+                                st.dataframe(report.rejected[['row', 'reason']], hide_index=True)
+                            else:
+                                st.rerun()
                     
                     else:
                         st.error("CSV format not recognized. Please check column headers.")
@@ -6,9 +6,13 @@ from datetime import datetime, date, timedelta
 import sys
 import os
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_manager import DataManager
+from utils.services import get_data_manager
 from login import check_password, show_logout_button
 
 st.set_page_config(
@@ -18,11 +22,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
-
 def create_sidebar():
     """Create permanent sidebar navigation"""
     with st.sidebar:
@@ -227,7 +226,7 @@ def main():
                 st.markdown('<div class="chart-container">', unsafe_allow_html=True)
                 st.subheader("Fleet by Type")
                 if 'vehicle_type' in vehicles_df.columns:
-                    type_counts = vehicles_df['vehicle_type'].fillna('Unknown').value_counts()
+                    type_counts = vehicles_df['vehicle_type'].astype(object).fillna('Unknown').value_counts()
                     fig_type = px.bar(
                         x=type_counts.index,
                         y=type_counts.values,
@@ -315,7 +314,6 @@ def main():
             
             with col4:
                 # Recent maintenance (last 30 days)
-                maintenance_df['date'] = pd.to_datetime(maintenance_df['date'])
                 recent_maintenance = maintenance_df[maintenance_df['date'] >= datetime.now() - timedelta(days=30)]
                 recent_count = len(recent_maintenance)
                 st.markdown(f"""
@@ -348,9 +346,7 @@ def main():
             with col2:
                 st.markdown('<div class="chart-container">', unsafe_allow_html=True)
                 st.subheader("Monthly Maintenance Costs")
-                maintenance_df['month'] = maintenance_df['date'].dt.to_period('M')
-                monthly_costs = maintenance_df.groupby('month')['cost'].sum().reset_index()
-                monthly_costs['month'] = monthly_costs['month'].astype(str)
+                monthly_costs = dm.get_monthly_maintenance_costs()
                 fig_monthly = px.line(
                     monthly_costs,
                     x='month',
@@ -452,10 +448,7 @@ def main():
                 # Rental timeline
                 st.markdown('<div class="chart-container">', unsafe_allow_html=True)
                 st.subheader("Rental Timeline")
-                rentals_df['start_date'] = pd.to_datetime(rentals_df['start_date'])
-                rentals_df['month'] = rentals_df['start_date'].dt.to_period('M')
-                monthly_rentals = rentals_df.groupby('month').size().reset_index(name='count')
-                monthly_rentals['month'] = monthly_rentals['month'].astype(str)
+                monthly_rentals = dm.get_monthly_rental_revenue()
                 fig_timeline = px.bar(
                     monthly_rentals,
                     x='month',
@@ -520,14 +513,14 @@ def main():
             financial_data = []
             
             if not maintenance_df.empty:
-                maintenance_monthly = maintenance_df.groupby(maintenance_df['date'].dt.to_period('M'))['cost'].sum()
-                for month, cost in maintenance_monthly.items():
-                    financial_data.append({'Month': str(month), 'Type': 'Maintenance Cost', 'Amount': -cost})
+                maintenance_monthly = dm.get_monthly_maintenance_costs()
+                for month, cost in zip(maintenance_monthly['month'], maintenance_monthly['cost']):
+                    financial_data.append({'Month': month, 'Type': 'Maintenance Cost', 'Amount': -cost})
             
             if not rentals_df.empty:
-                rentals_monthly = rentals_df.groupby(rentals_df['start_date'].dt.to_period('M'))['rental_rate'].sum()
-                for month, revenue in rentals_monthly.items():
-                    financial_data.append({'Month': str(month), 'Type': 'Rental Revenue', 'Amount': revenue})
+                rentals_monthly = dm.get_monthly_rental_revenue()
+                for month, revenue in zip(rentals_monthly['month'], rentals_monthly['rental_rate']):
+                    financial_data.append({'Month': month, 'Type': 'Rental Revenue', 'Amount': revenue})
             
             if financial_data:
                 financial_df = pd.DataFrame(financial_data)
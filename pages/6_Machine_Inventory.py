@@ -4,10 +4,17 @@ from datetime import datetime, date
 import sys
 import os
 
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_manager import DataManager
+from utils.data_manager import ConcurrentEditError
+from utils.services import get_data_manager
+from utils.pagination import show_paged_frame
 from utils.validators import validate_weight, validate_year
+from utils.exports import EXPORT_QUEUE, EXCEL_MIME
 from login import check_password, show_logout_button
 
 st.set_page_config(
@@ -17,10 +24,29 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize data manager
-@st.cache_resource
-def get_data_manager():
-    return DataManager()
+# Sort options for the list view, mapped to their columns
+MACHINE_SORT_COLUMNS = {
+    "Date Added": None,
+    "Whites ID": 'whites_id',
+    "Make": 'make',
+    "Model": 'model',
+    "Year": 'year',
+    "Hours": 'hours',
+    "Status": 'status',
+}
+
+# Columns a bulk update upload can identify machines by
+BULK_MATCH_COLUMNS = {
+    "Whites ID": 'whites_id',
+    "VIN/Chassis": 'vin_chassis',
+    "Machine ID": 'machine_id',
+}
+
+# Columns a bulk update upload can set
+BULK_UPDATE_FIELDS = {
+    "Hours": 'hours',
+    "Status": 'status',
+}
 
 def create_sidebar():
     """Create permanent sidebar navigation"""
@@ -174,12 +200,10 @@ def main():
             filtered_df = filtered_df[filtered_df['machine_type'] == type_filter]
         
         if search_term:
-            mask = (
-                filtered_df['whites_id'].astype(str).str.contains(search_term, case=False, na=False) |
-                filtered_df['make'].astype(str).str.contains(search_term, case=False, na=False) |
-                filtered_df['model'].astype(str).str.contains(search_term, case=False, na=False)
-            )
-            filtered_df = filtered_df[mask]
+            # Matches Whites ID, make, model or VIN (spaces and dashes ignored)
+            matches = data_manager.search('machines', search_term)
+            if matches is not None:
+                filtered_df = filtered_df[filtered_df['machine_id'].astype(str).isin(matches)]
 
         # Display machines
         if filtered_df.empty:
@@ -187,7 +211,9 @@ def main():
         else:
             st.write(f"Showing {len(filtered_df)} of {len(machines_df)} machines")
             
-            for _, machine in filtered_df.iterrows():
+            # Display one page of machines at a time
+            page_df = show_paged_frame(filtered_df, "machine_list", MACHINE_SORT_COLUMNS)
+            for _, machine in page_df.iterrows():
                 with st.container():
                     st.markdown(f'<div class="machine-card">', unsafe_allow_html=True)
                     
@@ -217,6 +243,8 @@ def main():
                     with col4:
                         if st.button("Edit", key=f"edit_{machine['machine_id']}"):
                             st.session_state.edit_machine = machine.to_dict()
+                            # Remember the version being edited so a save can't overwrite someone else's changes
+                            st.session_state.edit_machine_version = data_manager.row_version('machines', machine)
                         if st.button("Delete", key=f"delete_{machine['machine_id']}", type="secondary"):
                             if st.session_state.get(f"confirm_delete_{machine['machine_id']}", False):
                                 data_manager.delete_machine(machine['machine_id'])
@@ -295,10 +323,14 @@ def main():
                             'notes': notes
                         }
                         
-                            data_manager.update_machine(updated_machine)
-                            st.success("Machine updated successfully!")
-                            del st.session_state.edit_machine
-                            st.rerun()
+                            try:
+                                data_manager.update_machine(updated_machine, expected_version=st.session_state.get('edit_machine_version'))
+                            except ConcurrentEditError as e:
+                                st.error(f"{e}. Cancel and edit again to see the latest details.")
+                            else:
+                                st.success("Machine updated successfully!")
+                                del st.session_state.edit_machine
+                                st.rerun()
                 
                 with col2:
                     if st.form_submit_button("Cancel"):
@@ -451,18 +483,14 @@ def main():
                     mime="text/csv"
                 )
                 
-                # Excel Export
-                from io import BytesIO
-                excel_buffer = BytesIO()
-                with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-                    machines_df.to_excel(writer, sheet_name='Machines', index=False)
-                excel_data = excel_buffer.getvalue()
+                # Excel Export, built once and reused until the machines change
+                excel_data = EXPORT_QUEUE.build(data_manager, 'machines')
                 
                 st.download_button(
                     label="Download as Excel",
                     data=excel_data,
                     file_name=f"whites_machines_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    mime=EXCEL_MIME
                 )
             else:
                 st.info("No machine data to export.")
@@ -474,26 +502,65 @@ def main():
             
             if uploaded_file is not None:
                 try:
-                    import_df = pd.read_csv(uploaded_file)
+                    # Only the first rows are read for the preview; the import streams the file
+                    import_df = pd.read_csv(uploaded_file, nrows=5)
                     st.write("Preview of uploaded data:")
                     st.dataframe(import_df.head())
                     
                     if st.button("Import Machines"):
-                        # Add import functionality for machines
-                        success_count = 0
-                        for _, row in import_df.iterrows():
-                            try:
-                                machine_data = row.to_dict()
-                                data_manager.add_machine(machine_data)
-                                success_count += 1
-                            except Exception as e:
-                                st.error(f"Error importing machine: {e}")
-                        
-                        st.success(f"Successfully imported {success_count} machines!")
-                        st.rerun()
+                        uploaded_file.seek(0)
+                        progress_bar = st.progress(0.0, text="Importing...")
+                        report = data_manager.import_csv(
+                            'machines', uploaded_file,
+                            progress=lambda rows, done: progress_bar.progress(done, text=f"Imported {rows:,} rows...")
+                        )
+                        st.success(f"Successfully imported {report.accepted_count} machines!")
+                        if report.rejected_count:
+                            st.warning(f"{report.rejected_count} rows were skipped:")
+                            st.dataframe(report.rejected[['row', 'reason']], hide_index=True)
+                        else:
+                            st.rerun()
                         
                 except Exception as e:
                     st.error(f"Error reading file: {e}")
+        
+        st.markdown("---")
+        st.subheader("Bulk Update Hours or Status")
+        st.caption("Upload a CSV with one column identifying each machine and one with its new hours or status.")
+        update_file = st.file_uploader("Choose a CSV file", type="csv", key="bulk_update_file")
+        
+        if update_file is not None:
+            try:
+                update_df = pd.read_csv(update_file)
+                file_columns = list(update_df.columns)
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    id_column = st.selectbox("Column identifying each machine", file_columns)
+                    match_label = st.selectbox("Identified by", list(BULK_MATCH_COLUMNS))
+                with col2:
+                    value_column = st.selectbox("Column with the new values", file_columns, index=len(file_columns) - 1)
+                    field_label = st.selectbox("Update", list(BULK_UPDATE_FIELDS))
+                
+                match_on, field = BULK_MATCH_COLUMNS[match_label], BULK_UPDATE_FIELDS[field_label]
+                updates = pd.DataFrame({match_on: update_df[id_column], field: update_df[value_column]})
+                st.write(f"Preview of {len(updates)} updates:")
+                st.dataframe(updates.head(), hide_index=True)
+                
+                if st.button("Apply Updates"):
+                    if field == 'status':
+                        report = data_manager.bulk_update_status('machines', updates, match_on, allowed=["Active", "Inactive", "Under Maintenance"])
+                    else:
+                        report = data_manager.bulk_update_machine_hours(updates, match_on)
+                    st.success(f"Updated {report.accepted_count} machines!")
+                    if report.rejected_count:
+                        st.warning(f"{report.rejected_count} rows were skipped:")
+                        st.dataframe(report.rejected[['row', 'reason']], hide_index=True)
+                    else:
+                        st.rerun()
+            
+            except Exception as e:
+                st.error(f"Error reading file: {e}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
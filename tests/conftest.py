@@ -0,0 +1,141 @@
+import os
+import subprocess
+import sys
+import textwrap
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from utils.data_manager import DataManager
+from utils.journal import COMPACTOR
+from utils.storage import get_storage_backend
+
+# Cached tables are shared between sessions; copy-on-write stops callers
+# mutating them, and snapshot-backed columns rely on it
+pd.set_option("mode.copy_on_write", True)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def make_dm(tmp_path, monkeypatch):
+    """Build DataManagers on an empty data directory of their own"""
+    monkeypatch.chdir(tmp_path)
+    
+    def make(backend='csv'):
+        return DataManager(get_storage_backend(backend, data_dir=str(tmp_path / 'data')))
+    
+    yield make
+    # Fold journaled changes in before the directory goes away
+    COMPACTOR.flush()
+
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def backend(request):
+    return request.param
+
+
+@pytest.fixture
+def dm(make_dm, backend):
+    return make_dm(backend)
+
+
+@pytest.fixture
+def other_process(tmp_path, backend):
+    """Run code against the same data directory in a separate Python process, with `dm` defined"""
+    def run(code):
+        script = (
+            "import pandas as pd\n"
+            "pd.set_option('mode.copy_on_write', True)\n"
+            "from utils.data_manager import DataManager\n"
+            "from utils.journal import COMPACTOR\n"
+            "from utils.storage import get_storage_backend\n"
+            f"dm = DataManager(get_storage_backend({backend!r}, data_dir={str(tmp_path / 'data')!r}))\n"
+            + textwrap.dedent(code)
+            + "\nCOMPACTOR.flush()\n"
+        )
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        result = subprocess.run([sys.executable, '-c', script], cwd=tmp_path, env=env, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        return result.stdout
+    
+    return run
+
+
+def vehicle(**values):
+    """A valid vehicle record, with any fields overridden"""
+    record = {
+        'whites_id': 'W001', 'make': 'Ford', 'model': 'Transit', 'year': 2020, 'weight': 3.5,
+        'license_plate': 'AB12CDE', 'vehicle_type': 'Van', 'status': 'Active', 'mileage': 10000,
+    }
+    record.update(values)
+    return record
+
+
+def maintenance(vehicle_id, date, **values):
+    """A valid maintenance record for a vehicle, with any fields overridden"""
+    record = {
+        'vehicle_id': vehicle_id, 'date': date, 'type': 'Service', 'description': 'Full service',
+        'cost': 150.0, 'mileage': 10000, 'service_provider': 'Whites', 'next_due_mileage': 20000,
+    }
+    record.update(values)
+    return record
+
+
+def equipment(**values):
+    """A valid equipment record, with any fields overridden"""
+    record = {
+        'whites_id': 'E001', 'name': 'Breaker', 'category': 'Power Tools', 'brand': 'Makita',
+        'model': 'HM1307', 'serial_number': 'SN1', 'daily_rate': 30.0, 'weekly_rate': 90.0, 'status': 'Available',
+    }
+    record.update(values)
+    return record
+
+
+def rental(equipment_id, start_date, expected_return_date, **values):
+    """A valid rental record for a piece of equipment, with any fields overridden"""
+    record = {
+        'equipment_id': equipment_id, 'customer_name': 'Acme', 'customer_phone': '0123',
+        'start_date': start_date, 'expected_return_date': expected_return_date,
+        'rental_rate': 30.0, 'deposit': 10.0, 'status': 'Active',
+    }
+    record.update(values)
+    return record
+
+
+@pytest.fixture
+def records():
+    """Factories for valid records: records.vehicle(...), records.maintenance(...), records.equipment(...), records.rental(...)"""
+    return SimpleNamespace(vehicle=vehicle, maintenance=maintenance, equipment=equipment, rental=rental)
+
+
+@pytest.fixture
+def rental_writes(dm, records):
+    """
+    Three pieces of equipment with a few rentals, and a function making
+    every kind of rental write: adds, an import, an edit, a return and
+    deletes by rental and by equipment. Returns (equipment_ids, write).
+    """
+    equipment_ids = [
+        dm.add_equipment(records.equipment(whites_id=f'E{n:03}', serial_number=f'SN{n}')) for n in range(3)
+    ]
+    rental_ids = [
+        dm.add_rental(records.rental(equipment_ids[0], '2030-01-01', '2030-01-05')),
+        dm.add_rental(records.rental(equipment_ids[0], '2030-02-01', '2030-02-10', rental_rate=45.0)),
+        dm.add_rental(records.rental(equipment_ids[1], '2030-01-03', '2030-01-04')),
+    ]
+    
+    def write():
+        dm.add_rental(records.rental(equipment_ids[1], '2030-03-01', '2030-03-09', rental_rate=55.5))
+        dm.import_table('rentals', pd.DataFrame([
+            records.rental(equipment_ids[2], '2030-01-10', '2030-01-20', customer_name='Imported'),
+            records.rental(equipment_ids[2], '2030-02-10', None, customer_name='Open-ended'),
+        ]))
+        rental = dm.load_rentals().set_index('rental_id').loc[rental_ids[1]].to_dict()
+        dm.update_rental({**rental, 'rental_id': rental_ids[1], 'start_date': '2030-04-01', 'expected_return_date': '2030-04-03'})
+        dm.return_rental(rental_ids[2], {'actual_return_date': '2030-01-06', 'status': 'Returned', 'return_condition': 'Good'})
+        dm.delete_records('rentals', [rental_ids[0]])
+        dm.delete_records('equipment', [equipment_ids[1]])
+    
+    return equipment_ids, write
@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+from utils.active_rentals import ACTIVE_RENTALS_VIEW, NO_RETURN_DATE
+from utils.table_cache import TABLE_CACHE
+
+TODAY = date(2030, 6, 15)
+
+# Days past the expected return date -> (bucket, status label)
+EXPECTED = {
+    40: ('Overdue 30+ days', '🔴 OVERDUE (40 days)'),
+    30: ('Overdue 30+ days', '🔴 OVERDUE (30 days)'),
+    29: ('Overdue 8-29 days', '🔴 OVERDUE (29 days)'),
+    8: ('Overdue 8-29 days', '🔴 OVERDUE (8 days)'),
+    7: ('Overdue 1-7 days', '🔴 OVERDUE (7 days)'),
+    1: ('Overdue 1-7 days', '🔴 OVERDUE (1 days)'),
+    0: ('Due Today', '🟡 DUE TODAY'),
+    -1: ('Due This Week', '🟢 1 days remaining'),
+    -7: ('Due This Week', '🟢 7 days remaining'),
+    -8: ('Due Later', '🟢 8 days remaining'),
+    None: (NO_RETURN_DATE, '⚪ no return date'),
+}
+
+
+def _customer(overdue_days):
+    return 'open-ended' if overdue_days is None else f'{overdue_days} days'
+
+
+def _hire_out(dm, records, overdue_days, n):
+    equipment_id = dm.add_equipment(records.equipment(whites_id=f'E{n:03}', serial_number=f'SN{n}'))
+    expected = None if overdue_days is None else (TODAY - timedelta(days=overdue_days)).strftime('%Y-%m-%d')
+    return dm.add_rental(records.rental(equipment_id, '2030-01-01', expected, customer_name=_customer(overdue_days)))
+
+
+def test_rentals_are_bucketed_by_days_overdue(dm, records):
+    for n, overdue_days in enumerate(EXPECTED):
+        _hire_out(dm, records, overdue_days, n)
+    returned = _hire_out(dm, records, 3, 99)
+    dm.return_rental(returned, {'actual_return_date': '2030-06-10', 'status': 'Returned'})
+    
+    active = ACTIVE_RENTALS_VIEW.view(dm, today=TODAY)
+    
+    # Most overdue first, with no return date last
+    assert active['customer_name'].tolist() == [_customer(days) for days in EXPECTED]
+    by_customer = active.set_index('customer_name')
+    for overdue_days, (bucket, label) in EXPECTED.items():
+        row = by_customer.loc[_customer(overdue_days)]
+        assert (row['overdue_bucket'], row['status_label']) == (bucket, label), overdue_days
+        assert pd.isna(row['days_overdue']) if overdue_days is None else row['days_overdue'] == overdue_days
+    assert (by_customer['equipment_name'] == 'Breaker - Makita HM1307').all()
+    
+    counts = ACTIVE_RENTALS_VIEW.bucket_counts(dm, today=TODAY)
+    assert counts == {
+        'Overdue 30+ days': 2, 'Overdue 8-29 days': 2, 'Overdue 1-7 days': 2, 'Due Today': 1,
+        'Due This Week': 2, 'Due Later': 1, NO_RETURN_DATE: 1,
+    }
+    assert dm.get_overdue_bucket_counts(active) == counts
+
+
+def test_view_after_writes_matches_one_built_from_the_files(dm, rental_writes):
+    _, write = rental_writes
+    ACTIVE_RENTALS_VIEW.view(dm, today=TODAY)
+    write()
+    
+    active = ACTIVE_RENTALS_VIEW.view(dm, today=TODAY)
+    # Drop the cached tables, so the next view is built from a fresh load
+    TABLE_CACHE.clear()
+    ACTIVE_RENTALS_VIEW.clear()
+    fresh = ACTIVE_RENTALS_VIEW.view(dm, today=TODAY)
+    
+    assert len(active) == 3
+    pd.testing.assert_frame_equal(active, fresh)
@@ -0,0 +1,68 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from utils.availability import AVAILABILITY_INDEX, _day
+
+
+def test_add_rental_refuses_overlapping_dates(dm, records):
+    equipment_id = dm.add_equipment(records.equipment())
+    rental_id = dm.add_rental(records.rental(equipment_id, '2030-01-10', '2030-01-15'))
+    
+    with pytest.raises(ValueError, match=rental_id):
+        dm.add_rental(records.rental(equipment_id, '2030-01-14', '2030-01-20'))
+    dm.add_rental(records.rental(equipment_id, '2030-01-16', '2030-01-20'))
+
+
+def test_unparseable_dates_raise_value_error(dm, records):
+    equipment_id = dm.add_equipment(records.equipment())
+    dm.add_rental(records.rental(equipment_id, '2030-01-10', '2030-01-15'))
+    
+    with pytest.raises(ValueError, match='start date'):
+        dm.get_rental_conflicts(equipment_id, 'soon', '2030-01-15')
+    with pytest.raises(ValueError, match='end date'):
+        dm.is_equipment_available(equipment_id, '2030-01-10', 'later')
+
+
+def test_import_rejects_rows_that_double_book(dm, records):
+    first = dm.add_equipment(records.equipment())
+    second = dm.add_equipment(records.equipment(whites_id='E002', serial_number='SN2'))
+    booked = dm.add_rental(records.rental(first, '2030-01-10', '2030-01-15'))
+    
+    report = dm.import_table('rentals', pd.DataFrame([
+        records.rental(first, '2030-01-12', '2030-01-13', customer_name='Clashes with existing'),
+        records.rental(second, '2030-01-12', '2030-01-20', customer_name='Free'),
+        records.rental(second, '2030-01-18', '2030-01-25', customer_name='Clashes with row 2'),
+        records.rental(first, '2030-01-16', '2030-01-17', customer_name='After the existing one'),
+    ]))
+    
+    results = report.results.set_index('row')
+    assert list(results['status']) == ['rejected', 'accepted', 'rejected', 'accepted']
+    assert booked in results.loc[1, 'reason']
+    assert results.loc[3, 'reason'] == "Equipment is booked for those dates by an earlier row"
+    assert results.loc[[1, 3], 'id'].isna().all()
+    
+    customers = set(dm.load_rentals()['customer_name'])
+    assert customers == {'Acme', 'Free', 'After the existing one'}
+
+
+def _booked(book, equipment_id, start, end):
+    bookings = book.equipment.get(equipment_id)
+    if bookings is None:
+        return []
+    return sorted(bookings.conflicts(_day(start), _day(end), date.today().toordinal()))
+
+
+def test_incremental_updates_match_a_rebuild(dm, rental_writes):
+    equipment_ids, write = rental_writes
+    state = AVAILABILITY_INDEX.get(dm, 'rentals')
+    write()
+    
+    assert AVAILABILITY_INDEX.get(dm, 'rentals') is state
+    rebuilt = AVAILABILITY_INDEX.build('rentals', dm.load_rentals())
+    assert set(state.rentals) == set(rebuilt.rentals)
+    for equipment_id in equipment_ids:
+        for start, end in [('2030-01-01', '2030-01-31'), ('2030-02-01', '2030-02-28'), ('2030-04-02', '2030-04-02')]:
+            assert _booked(state, equipment_id, start, end) == _booked(rebuilt, equipment_id, start, end)
+    assert len(_booked(state, equipment_ids[2], '2029-01-01', '2031-01-01')) == 2
@@ -0,0 +1,70 @@
+import pandas as pd
+
+
+def _by_id(df, key):
+    return df.set_index(key)
+
+
+def test_plates_match_ignoring_case_and_spaces(dm, records):
+    first = dm.add_vehicle(records.vehicle(license_plate='AB12 CDE', mileage=10000))
+    second = dm.add_vehicle(records.vehicle(whites_id='W002', license_plate='XY34FGH', mileage=20000))
+    
+    report = dm.bulk_update_vehicle_mileage([('ab12cde', 12000), (' xy34 fgh ', 25000)], match_on='license_plate')
+    
+    assert (report.accepted_count, report.rejected_count) == (2, 0)
+    assert report.results['id'].tolist() == [first, second]
+    mileage = _by_id(dm.load_vehicles(), 'vehicle_id')['mileage']
+    assert (mileage[first], mileage[second]) == (12000, 25000)
+
+
+def test_meter_readings_cannot_go_down(dm, records):
+    van = dm.add_vehicle(records.vehicle(mileage=10000))
+    digger = dm.add_machine({'whites_id': 'M001', 'make': 'JCB', 'model': '3CX', 'machine_type': 'Digger', 'status': 'Active', 'hours': 340})
+    
+    miles = dm.bulk_update_vehicle_mileage({van: 9999})
+    hours = dm.bulk_update_machine_hours(pd.DataFrame({'whites_id': ['m001'], 'hours': [340]}), match_on='whites_id')
+    
+    assert miles.rejected['reason'].tolist() == ["Mileage is lower than the current reading"]
+    assert hours.accepted_count == 1
+    assert _by_id(dm.load_vehicles(), 'vehicle_id').loc[van, 'mileage'] == 10000
+    assert _by_id(dm.load_machines(), 'machine_id').loc[digger, 'hours'] == 340
+
+
+def test_statuses_must_be_allowed_and_are_respelled(dm, records):
+    vans = [dm.add_vehicle(records.vehicle(whites_id=f'W00{n}', license_plate=f'AB{n}2CDE')) for n in range(1, 3)]
+    allowed = ["On Hire", "Off Hire", "Maintenance"]
+    
+    report = dm.bulk_update_status('vehicles', [(vans[0], ' off hire'), (vans[1], 'Scrapped')], allowed=allowed)
+    
+    assert report.results['status'].tolist() == ['accepted', 'rejected']
+    assert report.rejected['reason'].tolist() == ["status must be one of: On Hire, Off Hire, Maintenance"]
+    status = _by_id(dm.load_vehicles(), 'vehicle_id')['status']
+    assert (status[vans[0]], status[vans[1]]) == ('Off Hire', 'Active')
+
+
+def test_every_row_is_reported_with_its_reasons(dm, records):
+    van = dm.add_vehicle(records.vehicle(license_plate='AB12CDE', mileage=10000))
+    dm.add_vehicle(records.vehicle(whites_id='W002', license_plate='XY34FGH'))
+    dm.add_vehicle(records.vehicle(whites_id='W003', license_plate='XY34 FGH'))
+    
+    report = dm.bulk_update_vehicle_mileage([
+        ('AB12CDE', 11000),
+        ('ZZ99ZZZ', 11000),
+        ('xy34fgh', 11000),
+        ('AB12CDE', None),
+        (None, 11000),
+        ('AB12CDE', -1),
+        ('AB12CDE', 11500),
+    ], match_on='license_plate')
+    
+    results = report.results.set_index('row')
+    assert results.index.tolist() == list(range(1, 8))
+    assert (report.accepted_count, report.rejected_count) == (2, 5)
+    assert results.loc[2, 'reason'] == "No record with this license_plate"
+    assert results.loc[3, 'reason'] == "More than one record has this license_plate"
+    assert results.loc[4, 'reason'] == "Field 'mileage' is required"
+    assert results.loc[5, 'reason'] == "Field 'license_plate' is required"
+    assert "Mileage cannot be negative" in results.loc[6, 'reason']
+    assert results.loc[[1, 7], 'id'].tolist() == [van, van]
+    # The later row for the same van wins
+    assert _by_id(dm.load_vehicles(), 'vehicle_id').loc[van, 'mileage'] == 11500
@@ -0,0 +1,93 @@
+import glob
+import os
+
+import pytest
+
+from utils.journal import COMPACTOR
+from utils.storage import get_storage_backend
+
+
+def _schedule(asset_id, asset_type='vehicle'):
+    return {'asset_id': asset_id, 'asset_type': asset_type, 'service_type': 'Service', 'interval_days': 365}
+
+
+def _machine(whites_id):
+    return {'whites_id': whites_id, 'make': 'JCB', 'model': '3CX', 'machine_type': 'Digger', 'status': 'Active', 'hours': 340}
+
+
+def _ids(df, column):
+    return set(df[column].astype(str))
+
+
+def _pending(dm):
+    return glob.glob(os.path.join(dm.storage.data_dir, '.journal', 'pending-*.jsonl'))
+
+
+def test_deleting_a_vehicle_or_machine_takes_its_records_with_it(dm, make_dm, backend, records):
+    vans = [dm.add_vehicle(records.vehicle(whites_id=f'W00{n}', license_plate=f'AB{n}2CDE')) for n in range(2)]
+    diggers = [dm.add_machine(_machine(f'M00{n}')) for n in range(2)]
+    for asset_id in vans + diggers:
+        dm.add_maintenance(records.maintenance(asset_id, '2030-01-01'))
+        dm.add_service_schedule(_schedule(asset_id, 'vehicle' if asset_id in vans else 'machine'))
+    
+    dm.delete_vehicle(vans[0])
+    dm.delete_machine(diggers[0])
+    
+    # Both the session that deleted them and a fresh one reading the files agree
+    for manager in (dm, make_dm(backend)):
+        assert _ids(manager.load_vehicles(), 'vehicle_id') == {vans[1]}
+        assert _ids(manager.load_machines(), 'machine_id') == {diggers[1]}
+        assert _ids(manager.load_maintenance(), 'vehicle_id') == {vans[1], diggers[1]}
+        assert _ids(manager.load_service_schedules(), 'asset_id') == {vans[1], diggers[1]}
+
+
+def test_deleting_equipment_takes_its_rentals_with_it(dm, make_dm, backend, records):
+    breakers = [dm.add_equipment(records.equipment(whites_id=f'E00{n}', serial_number=f'SN{n}')) for n in range(2)]
+    for equipment_id in breakers:
+        returned = dm.add_rental(records.rental(equipment_id, '2030-01-01', '2030-01-05'))
+        dm.return_rental(returned, {'actual_return_date': '2030-01-05', 'status': 'Returned'})
+        dm.add_rental(records.rental(equipment_id, '2030-02-01', '2030-02-05'))
+    
+    dm.delete_equipment(breakers[0])
+    
+    for manager in (dm, make_dm(backend)):
+        assert _ids(manager.load_equipment(), 'equipment_id') == {breakers[1]}
+        rentals = manager.load_rentals()
+        assert len(rentals) == 2 and _ids(rentals, 'equipment_id') == {breakers[1]}
+    assert dm.get_active_rentals()['equipment_id'].astype(str).tolist() == [breakers[1]]
+    assert not _pending(dm)
+
+
+def test_recover_finishes_a_cascade_a_crash_cut_short(make_dm, records, monkeypatch):
+    dm = make_dm('csv')
+    vehicle_id = dm.add_vehicle(records.vehicle())
+    dm.add_maintenance(records.maintenance(vehicle_id, '2030-01-01'))
+    dm.add_service_schedule(_schedule(vehicle_id))
+    COMPACTOR.flush()
+    
+    # The vehicle's delete is journaled, then the process dies before its records'
+    storage_class = type(dm.storage)
+    delete = storage_class.delete
+    
+    def crash_after_vehicles(storage, table, column, values):
+        if table != 'vehicles':
+            raise SystemExit("crashed")
+        delete(storage, table, column, values)
+    
+    with monkeypatch.context() as patched:
+        patched.setattr(storage_class, 'delete', crash_after_vehicles)
+        with pytest.raises(SystemExit):
+            dm.delete_vehicle(vehicle_id)
+    
+    # Left half done: the vehicle is gone but its records aren't
+    storage = get_storage_backend('csv', data_dir=dm.storage.data_dir)
+    assert len(_pending(dm)) == 1
+    assert storage.load('vehicles').empty
+    assert len(storage.load('maintenance')) == 1 and len(storage.load('service_schedules')) == 1
+    
+    storage.recover()
+    
+    assert not _pending(dm)
+    assert storage.load('maintenance').empty and storage.load('service_schedules').empty
+    restarted = make_dm('csv')
+    assert restarted.load_maintenance().empty and restarted.load_service_schedules().empty
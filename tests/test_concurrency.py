@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.storage import ConcurrentEditError
+
+
+def _vehicle_row(dm, vehicle_id):
+    return dm.load_vehicles().set_index('vehicle_id').loc[vehicle_id].to_dict() | {'vehicle_id': vehicle_id}
+
+
+def test_edits_made_from_a_stale_copy_are_refused(dm, records):
+    vehicle_id = dm.add_vehicle(records.vehicle())
+    mine = _vehicle_row(dm, vehicle_id)
+    version = dm.row_version('vehicles', mine)
+    
+    # Someone else saves first
+    dm.update_vehicle({**mine, 'notes': 'Theirs'}, expected_version=version)
+    
+    with pytest.raises(ConcurrentEditError, match=vehicle_id):
+        dm.update_vehicle({**mine, 'notes': 'Mine'}, expected_version=version)
+    assert _vehicle_row(dm, vehicle_id)['notes'] == 'Theirs'
+    
+    # Starting again from the saved row works
+    current = _vehicle_row(dm, vehicle_id)
+    dm.update_vehicle({**current, 'notes': 'Mine'}, expected_version=dm.row_version('vehicles', current))
+    assert _vehicle_row(dm, vehicle_id)['notes'] == 'Mine'
+
+
+def test_edits_to_a_deleted_record_are_refused(dm, records):
+    vehicle_id = dm.add_vehicle(records.vehicle())
+    mine = _vehicle_row(dm, vehicle_id)
+    version = dm.row_version('vehicles', mine)
+    dm.delete_vehicle(vehicle_id)
+    
+    with pytest.raises(ConcurrentEditError):
+        dm.update_vehicle({**mine, 'notes': 'Mine'}, expected_version=version)
+    assert dm.load_vehicles().empty
+
+
+def test_edits_from_another_process_make_this_copy_stale(dm, records, other_process):
+    vehicle_id = dm.add_vehicle(records.vehicle())
+    mine = _vehicle_row(dm, vehicle_id)
+    version = dm.row_version('vehicles', mine)
+    
+    other_process(f"dm.update_vehicle_mileage({vehicle_id!r}, 12000)")
+    
+    with pytest.raises(ConcurrentEditError):
+        dm.update_vehicle({**mine, 'notes': 'Mine'}, expected_version=version)
+    assert _vehicle_row(dm, vehicle_id)['mileage'] == 12000
+
+
+def test_concurrent_writers_do_not_lose_rows(dm, records, other_process):
+    def add(n):
+        return dm.add_vehicle(records.vehicle(whites_id=f'W{n:03}', license_plate=f'AB{n:02}CDE'))
+    
+    script = """
+    for n in range(100, 110):
+        dm.add_vehicle({'whites_id': f'W{n}', 'make': 'Ford', 'model': 'Transit', 'license_plate': f'XY{n}ZZ'})
+    """
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        elsewhere = pool.submit(other_process, script)
+        ids = list(pool.map(add, range(40)))
+        elsewhere.result()
+    
+    vehicles = dm.load_vehicles()
+    assert len(set(ids)) == 40
+    assert len(vehicles) == 50
+    assert vehicles['vehicle_id'].is_unique
+    assert set(ids) <= set(vehicles['vehicle_id'])
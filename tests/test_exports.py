@@ -0,0 +1,104 @@
+import glob
+import os
+import time
+
+from utils.exports import ExportQueue
+
+
+def test_repeat_requests_share_a_job_until_the_data_changes(dm, records):
+    queue = ExportQueue()
+    dm.add_vehicle(records.vehicle())
+    
+    job = queue.submit(dm, 'vehicles').wait()
+    assert job.status == 'done'
+    assert queue.submit(dm, 'vehicles') is job
+    assert queue.get(dm, 'vehicles') == job.read()
+    
+    dm.add_vehicle(records.vehicle(whites_id='W002', license_plate='CD34EFG'))
+    assert queue.job(dm, 'vehicles') is None
+    assert queue.submit(dm, 'vehicles').wait() is not job
+
+
+def test_finished_workbook_is_served_from_memory(dm, records):
+    queue = ExportQueue()
+    dm.add_vehicle(records.vehicle())
+    job = queue.submit(dm, 'vehicles').wait()
+    data = job.read()
+    assert data.startswith(b'PK')
+    
+    os.remove(job.path)
+    assert job.read() == data
+
+
+def test_queues_only_delete_their_own_workbooks(dm, records):
+    mine, theirs = ExportQueue(), ExportQueue()
+    dm.add_vehicle(records.vehicle())
+    their_job = theirs.submit(dm, 'vehicles').wait()
+    mine.submit(dm, 'vehicles').wait()
+    
+    # A write supersedes both jobs; a new build here clears only this queue's files
+    dm.add_vehicle(records.vehicle(whites_id='W002', license_plate='CD34EFG'))
+    mine.submit(dm, 'vehicles').wait()
+    assert os.path.exists(their_job.path)
+    assert len(glob.glob(os.path.join(os.path.dirname(their_job.path), f"*_{mine.owner}_*.xlsx"))) == 1
+
+
+def test_superseded_workbooks_are_removed_but_not_ones_being_written(dm, records):
+    queue = ExportQueue()
+    dm.add_vehicle(records.vehicle())
+    old_job = queue.submit(dm, 'vehicles').wait()
+    assert f"_{queue.owner}_" in os.path.basename(old_job.path)
+    # Another export of this queue, mid-write
+    partial = os.path.join(os.path.dirname(old_job.path), f"machines_{queue.owner}_00000000.partial.xlsx")
+    open(partial, 'wb').close()
+    
+    dm.add_vehicle(records.vehicle(whites_id='W002', license_plate='CD34EFG'))
+    new_job = queue.submit(dm, 'vehicles').wait()
+    
+    assert not os.path.exists(old_job.path)
+    assert os.path.exists(new_job.path) and os.path.exists(partial)
+
+
+def test_orphaned_workbooks_are_removed_when_old(dm, records):
+    export_dir = os.path.join(dm.storage.data_dir, 'exports')
+    os.makedirs(export_dir)
+    old_paths = [
+        os.path.join(export_dir, 'vehicles_1-dead_00000000.xlsx'),
+        os.path.join(export_dir, 'all_data_1-dead_00000001.partial.xlsx'),
+    ]
+    kept_paths = [
+        os.path.join(export_dir, 'vehicles_2-live_00000000.xlsx'),
+        os.path.join(export_dir, 'notes.txt'),
+    ]
+    for path in old_paths + kept_paths:
+        open(path, 'wb').close()
+    stale = time.time() - ExportQueue.stale_after - 60
+    for path in old_paths + kept_paths[1:]:
+        os.utime(path, (stale, stale))
+    
+    dm.add_vehicle(records.vehicle())
+    ExportQueue().submit(dm, 'vehicles').wait()
+    assert not any(os.path.exists(path) for path in old_paths)
+    assert all(os.path.exists(path) for path in kept_paths)
+
+
+def test_workbooks_just_under_the_age_limit_are_kept(dm, records):
+    export_dir = os.path.join(dm.storage.data_dir, 'exports')
+    os.makedirs(export_dir)
+    path = os.path.join(export_dir, 'vehicles_1-other_00000000.xlsx')
+    open(path, 'wb').close()
+    recent = time.time() - ExportQueue.stale_after + 60
+    os.utime(path, (recent, recent))
+    
+    dm.add_vehicle(records.vehicle())
+    ExportQueue().submit(dm, 'vehicles').wait()
+    assert os.path.exists(path)
+
+
+def test_rebuild_replaces_a_finished_job(dm, records):
+    queue = ExportQueue()
+    dm.add_vehicle(records.vehicle())
+    job = queue.submit(dm, 'vehicles').wait()
+    rebuilt = queue.submit(dm, 'vehicles', rebuild=True).wait()
+    assert rebuilt is not job
+    assert rebuilt.read() is not None
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from utils.history_index import HISTORY_INDEX
+
+
+def _history(dm, state, table, asset_id):
+    """One asset's history from a state, typed like HistoryIndex.history returns it"""
+    return dm.storage.conform(table, pd.DataFrame(state.records(asset_id), columns=list(state.columns)))
+
+
+def _assert_matches_rebuild(dm, table, asset_ids):
+    state = HISTORY_INDEX.get(dm, table)
+    rebuilt = HISTORY_INDEX.build(table, dm.storage.cached(table))
+    for asset_id in asset_ids:
+        pd.testing.assert_frame_equal(_history(dm, state, table, asset_id), _history(dm, rebuilt, table, asset_id))
+
+
+def test_rental_history_is_newest_first(dm, rental_writes):
+    equipment_ids, write = rental_writes
+    write()
+    
+    history = dm.get_equipment_rental_history(equipment_ids[0])
+    assert history['start_date'].dt.strftime('%Y-%m-%d').tolist() == ['2030-04-01']
+    history = dm.get_equipment_rental_history(equipment_ids[2])
+    assert history['customer_name'].tolist() == ['Open-ended', 'Imported']
+    assert dm.get_equipment_rental_history(equipment_ids[1]).empty
+
+
+def test_rental_updates_match_a_rebuild(dm, rental_writes):
+    equipment_ids, write = rental_writes
+    state = HISTORY_INDEX.get(dm, 'rentals')
+    write()
+    
+    assert HISTORY_INDEX.get(dm, 'rentals') is state
+    _assert_matches_rebuild(dm, 'rentals', equipment_ids)
+
+
+def test_maintenance_updates_match_a_rebuild(dm, records):
+    vans = [dm.add_vehicle(records.vehicle(whites_id=f'W{n:03}', license_plate=f'AB{n}2CDE')) for n in range(2)]
+    first = dm.add_maintenance(records.maintenance(vans[0], '2030-01-01'))
+    dm.add_maintenance(records.maintenance(vans[0], '2030-03-01', type='MOT'))
+    state = HISTORY_INDEX.get(dm, 'maintenance')
+    
+    dm.add_maintenance(records.maintenance(vans[1], '2030-02-01', cost=None))
+    undated = dm.add_maintenance(records.maintenance(vans[0], '', description='Undated'))
+    record = dm.load_maintenance().set_index('maintenance_id').loc[first].to_dict()
+    dm.update_maintenance({**record, 'maintenance_id': first, 'date': '2030-05-01', 'cost': 99.5})
+    dm.delete_maintenance(undated)
+    
+    assert HISTORY_INDEX.get(dm, 'maintenance') is state
+    assert dm.get_vehicle_maintenance_history(vans[0])['cost'].tolist() == [99.5, 150.0]
+    _assert_matches_rebuild(dm, 'maintenance', vans)
@@ -0,0 +1,83 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import ids
+from utils.ids import ALPHABET, ID_INDEX, ID_LENGTH, IdGenerator, encode
+
+ID_PATTERN = re.compile(f'[{ALPHABET}]{{{ID_LENGTH}}}')
+
+
+class ScriptedGenerator:
+    """Hands out a fixed list of IDs, then defers to a real generator"""
+
+    def __init__(self, *planned):
+        self.planned = list(planned)
+        self.real = IdGenerator()
+
+    def next(self):
+        return self.planned.pop(0) if self.planned else self.real.next()
+
+
+def test_encoding_is_fixed_width_and_keeps_order():
+    numbers = [0, 1, 31, 32, 1 << 40, (1 << 60) - 1]
+    encoded = [encode(number) for number in numbers]
+    
+    assert all(ID_PATTERN.fullmatch(value) for value in encoded)
+    assert encoded == sorted(encoded)
+    assert encode(0) == '0' * ID_LENGTH and encode(33) == '0' * (ID_LENGTH - 2) + '11'
+
+
+def test_ids_keep_increasing_within_a_millisecond_and_when_the_clock_goes_back(monkeypatch):
+    clock = iter([5_000_000_000_000] * 3 + [4_000_000_000_000] * 3 + [6_000_000_000_000])
+    monkeypatch.setattr(ids.time, 'time_ns', lambda: next(clock) * 1_000_000)
+    generator = IdGenerator()
+    
+    made = [generator.next() for _ in range(7)]
+    assert made == sorted(made) and len(set(made)) == 7
+
+
+def test_counter_overflow_moves_on_to_the_next_millisecond(monkeypatch):
+    monkeypatch.setattr(ids.time, 'time_ns', lambda: 5_000_000_000_000 * 1_000_000)
+    generator = IdGenerator()
+    first = generator.next()
+    generator._counter = (1 << ids.COUNTER_BITS) - 1
+    
+    made = generator.next()
+    assert made > first
+    assert generator._last_ms == 5_000_000_000_001
+
+
+def test_ids_in_use_are_skipped(dm, records, monkeypatch):
+    taken = dm.add_vehicle(records.vehicle())
+    monkeypatch.setattr(ID_INDEX, 'generator', ScriptedGenerator(taken, taken, 'NEW000000001'))
+    
+    assert dm.add_vehicle(records.vehicle(whites_id='W002', license_plate='CD34EFG')) == 'NEW000000001'
+
+
+def test_ids_written_by_another_process_are_skipped(dm, records, other_process, monkeypatch):
+    dm.add_vehicle(records.vehicle())
+    theirs = other_process("""
+    print(dm.add_vehicle({'whites_id': 'W002', 'make': 'Ford', 'model': 'Transit', 'license_plate': 'CD34EFG'}))
+    """).strip()
+    monkeypatch.setattr(ID_INDEX, 'generator', ScriptedGenerator(theirs))
+    
+    mine = dm.add_vehicle(records.vehicle(whites_id='W003', license_plate='EF56GHI'))
+    assert mine != theirs and ID_PATTERN.fullmatch(mine)
+
+
+def test_allocated_ids_are_reserved_and_deleted_ids_are_not_reused(dm, records, monkeypatch):
+    reserved = ID_INDEX.allocate(dm, 'vehicles', 2)
+    deleted = dm.add_vehicle(records.vehicle())
+    dm.delete_vehicle(deleted)
+    monkeypatch.setattr(ID_INDEX, 'generator', ScriptedGenerator(*reserved, deleted))
+    
+    assert dm.add_vehicle(records.vehicle()) not in reserved + [deleted]
+
+
+def test_sessions_allocating_at_once_get_distinct_ids(dm):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        batches = list(pool.map(lambda _: ID_INDEX.allocate(dm, 'rentals', 50), range(16)))
+    
+    allocated = [new_id for batch in batches for new_id in batch]
+    assert len(set(allocated)) == 16 * 50
+    assert all(batch == sorted(batch) for batch in batches)
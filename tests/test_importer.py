@@ -0,0 +1,101 @@
+import io
+from datetime import datetime
+
+import pandas as pd
+
+
+def test_each_rejected_row_gives_its_reasons(dm, records):
+    report = dm.import_table('vehicles', pd.DataFrame([
+        records.vehicle(),
+        records.vehicle(whites_id='W002', make=''),
+        records.vehicle(whites_id='W003', year=1850, license_plate='NOT A PLATE'),
+        records.vehicle(whites_id='W004', mileage=-5),
+    ]))
+    
+    results = report.results.set_index('row')
+    assert (report.accepted_count, report.rejected_count) == (1, 3)
+    assert results.loc[2, 'reason'] == "Field 'make' is required"
+    assert results.loc[3, 'reason'] == (
+        f"Year must be between 1900 and {datetime.now().year + 1}; Invalid license plate format"
+    )
+    assert results.loc[4, 'reason'] == "Mileage cannot be negative"
+    assert results.loc[1, 'reason'] == '' and results.loc[2:, 'id'].isna().all()
+    
+    # Only the accepted row was written, under the ID in the report
+    assert dm.load_vehicles()['vehicle_id'].tolist() == [results.loc[1, 'id']]
+
+
+def test_duplicates_of_existing_records_and_earlier_rows_are_skipped(dm, records):
+    dm.add_vehicle(records.vehicle(vin_chassis='VIN1'))
+    
+    report = dm.import_table('vehicles', pd.DataFrame([
+        records.vehicle(whites_id='w001 ', license_plate='CD34EFG'),
+        records.vehicle(whites_id='W002', vin_chassis='VIN1', license_plate='CD34EFH'),
+        records.vehicle(whites_id='W003', license_plate='CD34EFI'),
+        records.vehicle(whites_id='W003', license_plate='CD34EFJ'),
+    ]))
+    
+    assert report.results['reason'].tolist() == ['Duplicate whites_id', 'Duplicate vin_chassis', '', 'Duplicate whites_id']
+
+
+def test_rows_must_refer_to_existing_records(dm, records):
+    vehicle_id = dm.add_vehicle(records.vehicle())
+    
+    report = dm.import_table('maintenance', pd.DataFrame([
+        records.maintenance(vehicle_id, '2030-01-01'),
+        records.maintenance('NOPE', '2030-01-01'),
+        records.maintenance(vehicle_id, '01/02/2030'),
+    ]))
+    
+    assert report.results['reason'].tolist() == [
+        '', 'Unknown vehicle_id', 'Invalid date format (use YYYY-MM-DD)'
+    ]
+
+
+def test_streamed_imports_number_rows_across_chunks(dm, records):
+    rows = [records.vehicle(whites_id=f'W{n:03}', license_plate=f'AB{n:02}CDE') for n in range(7)]
+    rows[1]['make'] = rows[4]['make'] = rows[5]['make'] = ''
+    source = io.StringIO(pd.DataFrame(rows).to_csv(index=False))
+    progress = []
+    
+    report = dm.import_csv('vehicles', source, chunksize=3, max_rejected=2,
+                           progress=lambda read, fraction: progress.append(read))
+    
+    assert (report.accepted_count, report.rejected_count) == (4, 3)
+    assert report.results['row'].tolist() == [2, 5]
+    assert progress[-1] == 7
+    assert len(dm.load_vehicles()) == 4
+
+
+def test_streamed_imports_keep_leading_zeros_on_ids(dm, records):
+    # Legacy records kept their zero-padded IDs
+    dm._write('insert', 'vehicles', pd.DataFrame([records.vehicle(vehicle_id='00123456')]))
+    source = io.StringIO(pd.DataFrame([
+        records.maintenance('00123456', '2030-01-01'),
+        records.maintenance('123456', '2030-02-01'),
+    ]).to_csv(index=False))
+    
+    report = dm.import_csv('maintenance', source)
+    
+    assert report.results['reason'].tolist() == ['Unknown vehicle_id']
+    assert dm.load_maintenance()['vehicle_id'].tolist() == ['00123456']
+
+
+def test_ids_read_as_numbers_are_matched_as_text(dm, records):
+    dm._write('insert', 'vehicles', pd.DataFrame([
+        records.vehicle(vehicle_id='00123456'),
+        records.vehicle(vehicle_id='777', whites_id='W002', license_plate='CD34EFG'),
+    ]))
+    csv = pd.DataFrame([
+        records.maintenance('00123456', '2030-01-01'),
+        records.maintenance('777', '2030-01-01'),
+        records.maintenance('999', '2030-01-01'),
+        records.maintenance(None, '2030-01-01'),
+    ]).to_csv(index=False)
+    
+    # What the upload pages pass: a frame from a plain read_csv, with the IDs parsed as numbers
+    # (floats here, as one is blank)
+    report = dm.import_maintenance(pd.read_csv(io.StringIO(csv)))
+    
+    assert report.results['reason'].tolist() == ['', '', 'Unknown vehicle_id', "Field 'vehicle_id' is required"]
+    assert sorted(dm.load_maintenance()['vehicle_id']) == ['00123456', '777']
@@ -0,0 +1,102 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from utils.journal import COMPACTOR
+
+
+@pytest.fixture
+def backend():
+    """Only the CSV backend journals its edits"""
+    return 'csv'
+
+
+def _file_rows(dm, table):
+    """The table's CSV file as written, without the journal"""
+    return pd.read_csv(dm.storage.path(table), dtype=str)
+
+
+def _journal_path(dm, table):
+    return dm.storage.journal(table).path
+
+
+def test_edits_are_journaled_until_compacted(dm, records):
+    first = dm.add_vehicle(records.vehicle())
+    second = dm.add_vehicle(records.vehicle(whites_id='W002', license_plate='CD34EFG'))
+    dm.update_vehicle_mileage(first, 15000)
+    dm.delete_vehicle(second)
+    
+    # Loads see the edits straight away; the file catches up on compaction
+    assert dm.load_vehicles()['mileage'].tolist() == [15000]
+    assert _file_rows(dm, 'vehicles')['mileage'].tolist() == ['10000', '10000']
+    assert os.path.exists(_journal_path(dm, 'vehicles'))
+    
+    COMPACTOR.flush()
+    assert _file_rows(dm, 'vehicles')['vehicle_id'].tolist() == [first]
+    assert _file_rows(dm, 'vehicles')['mileage'].tolist() == ['15000']
+    assert not os.path.exists(_journal_path(dm, 'vehicles'))
+    assert dm.load_vehicles()['mileage'].tolist() == [15000]
+
+
+def test_edits_journaled_before_a_crash_are_recovered(dm, make_dm, records, other_process):
+    vehicle_id = dm.add_vehicle(records.vehicle())
+    
+    # The other process exits without compacting, as if it had crashed
+    other_process(f"""
+    dm.update_vehicle_mileage({vehicle_id!r}, 15000)
+    import os; os._exit(0)
+    """)
+    assert _file_rows(dm, 'vehicles')['mileage'].tolist() == ['10000']
+    assert dm.load_vehicles()['mileage'].tolist() == [15000]
+    
+    # Startup folds the journal into the file
+    restarted = make_dm('csv')
+    assert _file_rows(restarted, 'vehicles')['mileage'].tolist() == ['15000']
+    assert not os.path.exists(_journal_path(restarted, 'vehicles'))
+
+
+def test_a_torn_journal_line_is_skipped(dm, records):
+    vehicle_id = dm.add_vehicle(records.vehicle())
+    dm.update_vehicle_mileage(vehicle_id, 15000)
+    with open(_journal_path(dm, 'vehicles'), 'a') as f:
+        f.write(json.dumps({'op': 'delete', 'column': 'vehicle_id', 'values': [vehicle_id]})[:20])
+    
+    assert [record['op'] for record in dm.storage.journal('vehicles').records()] == ['update']
+    assert dm.storage.load('vehicles')['mileage'].tolist() == [15000]
+
+
+def test_replaying_a_compacted_journal_changes_nothing(dm, records):
+    vehicle_id = dm.add_vehicle(records.vehicle())
+    dm.import_table('vehicles', pd.DataFrame([records.vehicle(whites_id='W002', license_plate='CD34EFG')]))
+    dm.update_vehicle_mileage(vehicle_id, 15000)
+    dm.delete_vehicle(vehicle_id)
+    with open(_journal_path(dm, 'vehicles')) as f:
+        journal = f.read()
+    
+    COMPACTOR.flush()
+    compacted = dm.storage.load('vehicles')
+    # A load that read the journal just before it was compacted replays it over the new file
+    with open(_journal_path(dm, 'vehicles'), 'w') as f:
+        f.write(journal)
+    pd.testing.assert_frame_equal(dm.storage.load('vehicles'), compacted)
+
+
+def test_an_interrupted_cascading_delete_is_finished_on_startup(dm, make_dm, records):
+    vehicle_id = dm.add_vehicle(records.vehicle())
+    dm.add_maintenance(records.maintenance(vehicle_id, '2030-01-01'))
+    COMPACTOR.flush()
+    
+    # Crashed after recording the change, before any table's journal had its delete
+    pending = os.path.join(dm.storage.data_dir, '.journal', 'pending-crashed.jsonl')
+    os.makedirs(os.path.dirname(pending), exist_ok=True)
+    with open(pending, 'w') as f:
+        f.write(json.dumps({'op': 'delete_many', 'deletes': [
+            ['vehicles', 'vehicle_id', [vehicle_id]], ['maintenance', 'vehicle_id', [vehicle_id]],
+        ]}) + '\n')
+    
+    restarted = make_dm('csv')
+    assert restarted.load_vehicles().empty
+    assert restarted.load_maintenance().empty
+    assert not os.path.exists(pending)
@@ -0,0 +1,51 @@
+import pandas as pd
+
+from utils.maintenance_due import MAINTENANCE_DUE_INDEX
+
+
+def _due(state):
+    return [frame.reset_index(drop=True) for frame in (state.between(high=0), state.between(low=0, high=1000), state.between(low=1000))]
+
+
+def _assert_matches_rebuild(dm, state):
+    rebuilt = MAINTENANCE_DUE_INDEX.build('due', dm.load_maintenance(), dm.load_vehicles())
+    for ours, theirs in zip(_due(state), _due(rebuilt)):
+        pd.testing.assert_frame_equal(ours, theirs)
+        # assert_frame_equal takes None and NaN as equal; gaps should be NaN on both paths
+        assert not ours.map(lambda value: value is None).any().any()
+
+
+def test_editing_a_schedule_with_its_date_as_text_updates_in_place(dm, records):
+    vehicle_id = dm.add_vehicle(records.vehicle(mileage=19500))
+    dm.add_maintenance(records.maintenance(vehicle_id, '2030-01-01', next_due_mileage=18000))
+    maintenance_id = dm.add_maintenance(records.maintenance(vehicle_id, '2030-03-01', next_due_mileage=20000))
+    state = MAINTENANCE_DUE_INDEX.get(dm, 'due')
+    
+    record = dm.load_maintenance().set_index('maintenance_id').loc[maintenance_id].to_dict()
+    dm.update_maintenance({**record, 'maintenance_id': maintenance_id, 'date': '2030-03-01', 'next_due_mileage': 30000})
+    
+    assert MAINTENANCE_DUE_INDEX.get(dm, 'due') is state
+    overdue, due_soon, upcoming = dm.get_maintenance_due()
+    assert overdue.empty and due_soon.empty
+    assert upcoming['miles_until_due'].tolist() == [10500]
+    _assert_matches_rebuild(dm, state)
+
+
+def test_incremental_updates_match_a_rebuild(dm, records):
+    vans = [dm.add_vehicle(records.vehicle(whites_id=f'W{n:03}', license_plate=f'AB{n}2CDE', mileage=10000 * n)) for n in range(1, 4)]
+    for n, vehicle_id in enumerate(vans):
+        dm.add_maintenance(records.maintenance(vehicle_id, f'2030-0{n + 1}-01', next_due_mileage=15000 * (n + 1)))
+    state = MAINTENANCE_DUE_INDEX.get(dm, 'due')
+    
+    dm.add_maintenance(records.maintenance(vans[0], '2030-06-01', next_due_mileage=40000))
+    dm.add_maintenance(records.maintenance(vans[1], '2030-06-01', type='MOT', next_due_mileage=20500))
+    dm.update_vehicle_mileage(vans[2], 46000)
+    dm.delete_vehicle(vans[1])
+    dm.add_vehicle(records.vehicle(whites_id='W010', license_plate='XY99ZZA'))
+    # A van with gaps in its details, and one whose schedule has no mileage yet
+    unplated = dm.add_vehicle(records.vehicle(whites_id='W011', license_plate=None, year=None, mileage=5000))
+    dm.add_maintenance(records.maintenance(unplated, '2030-07-01', next_due_mileage=5400.5))
+    dm.add_maintenance(records.maintenance(vans[2], '2030-07-01', type='Tyres', next_due_mileage=None))
+    
+    assert MAINTENANCE_DUE_INDEX.get(dm, 'due') is state
+    _assert_matches_rebuild(dm, state)
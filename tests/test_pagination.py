@@ -0,0 +1,52 @@
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from utils.pagination import clamp_page, get_page, page_count, sort_frame
+
+
+def _paged_list():
+    import pandas as pd
+    import streamlit as st
+
+    from utils.pagination import show_paged_frame
+
+    df = pd.DataFrame({'n': range(st.session_state.get('rows', 120))})
+    st.session_state['shown'] = show_paged_frame(df, 'list', {'File order': None, 'Number': 'n'})['n'].tolist()
+
+
+def test_pages_slice_the_rows_in_order():
+    df = pd.DataFrame({'n': range(60)})
+    
+    assert get_page(df, 1, 25)['n'].tolist() == list(range(25))
+    assert get_page(df, 3, 25)['n'].tolist() == list(range(50, 60))
+    assert get_page(df, 4, 25).empty
+    assert [page_count(rows, 25) for rows in (0, 1, 25, 26, 60)] == [1, 1, 1, 2, 3]
+
+
+def test_page_numbers_are_clamped_into_range():
+    assert clamp_page(5, 60, 25) == 3
+    assert clamp_page(5, 0, 25) == 1
+    assert clamp_page(0, 60, 25) == 1
+    assert clamp_page(2, 60, 25) == 2
+
+
+def test_sorting_puts_blanks_last_and_ignores_case():
+    df = pd.DataFrame({'name': ['b', None, 'A', 'c']})
+    
+    assert sort_frame(df, 'name')['name'].tolist() == ['A', 'b', 'c', None]
+    assert sort_frame(df, 'name', ascending=False)['name'].tolist() == ['c', 'b', 'A', None]
+    assert sort_frame(df, None, ascending=False).index.tolist() == [3, 2, 1, 0]
+
+
+def test_the_page_moves_back_when_the_results_shrink():
+    app = AppTest.from_function(_paged_list).run()
+    app.number_input(key='list_page').set_value(5).run()
+    assert app.session_state['shown'] == list(range(100, 120))
+    
+    # Filtering down to 30 rows leaves two pages, so page 5 becomes page 2
+    app.session_state['rows'] = 30
+    app.run()
+    
+    assert not app.exception
+    assert app.number_input(key='list_page').value == 2
+    assert app.session_state['shown'] == list(range(25, 30))
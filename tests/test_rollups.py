@@ -0,0 +1,52 @@
+import pandas as pd
+
+from utils.rollups import ROLLUP_INDEX
+
+
+def _assert_matches_rebuild(dm, table, dims):
+    state = ROLLUP_INDEX.get(dm, table)
+    rebuilt = ROLLUP_INDEX.build(table, dm.storage.cached(table))
+    for by in (None,) + dims:
+        pd.testing.assert_frame_equal(state.frame(by, True), rebuilt.frame(by, True))
+
+
+def test_monthly_revenue_sums_rentals_by_start_month(dm, rental_writes):
+    equipment_ids, write = rental_writes
+    write()
+    
+    revenue = dm.get_monthly_rental_revenue()
+    assert revenue['month'].tolist() == ['2030-01', '2030-02', '2030-04']
+    assert revenue['rental_rate'].tolist() == [30.0, 30.0, 45.0]
+    assert revenue['count'].tolist() == [1, 1, 1]
+    
+    # The deleted equipment's rentals went with it
+    by_equipment = dm.get_monthly_rental_revenue(by='equipment_id')
+    assert equipment_ids[1] not in set(by_equipment['equipment_id'])
+
+
+def test_rental_updates_match_a_rebuild(dm, rental_writes):
+    _, write = rental_writes
+    state = ROLLUP_INDEX.get(dm, 'rentals')
+    write()
+    
+    assert ROLLUP_INDEX.get(dm, 'rentals') is state
+    _assert_matches_rebuild(dm, 'rentals', ('equipment_id',))
+
+
+def test_maintenance_updates_match_a_rebuild(dm, records):
+    vans = [dm.add_vehicle(records.vehicle(whites_id=f'W{n:03}', license_plate=f'AB{n}2CDE')) for n in range(2)]
+    first = dm.add_maintenance(records.maintenance(vans[0], '2030-01-15', cost=100.0))
+    dm.add_maintenance(records.maintenance(vans[1], '2030-01-20', type='MOT', cost=40.0))
+    state = ROLLUP_INDEX.get(dm, 'maintenance')
+    
+    dm.add_maintenance(records.maintenance(vans[0], '2030-02-01', cost=None))
+    dm.add_maintenance(records.maintenance(vans[1], '', cost=25.0))
+    record = dm.load_maintenance().set_index('maintenance_id').loc[first].to_dict()
+    dm.update_maintenance({**record, 'maintenance_id': first, 'date': '2030-02-10', 'cost': 80.0})
+    dm.delete_vehicle(vans[1])
+    
+    assert ROLLUP_INDEX.get(dm, 'maintenance') is state
+    costs = dm.get_monthly_maintenance_costs(include_undated=True)
+    assert costs['month'].tolist() == ['2030-02']
+    assert (costs['cost'].tolist(), costs['count'].tolist(), costs['priced_count'].tolist()) == ([80.0], [2], [1])
+    _assert_matches_rebuild(dm, 'maintenance', ('type', 'vehicle_id'))
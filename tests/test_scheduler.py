@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+from utils.scheduler import SERVICE_SCHEDULE_INDEX
+
+
+def _days_ago(days):
+    return (date.today() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def _schedule(asset_id, asset_type='vehicle', **values):
+    record = {
+        'asset_id': asset_id, 'asset_type': asset_type, 'service_type': 'Service',
+        'interval_days': None, 'interval_miles': None, 'interval_hours': None,
+        'last_done_date': None, 'last_done_mileage': None, 'last_done_hours': None,
+    }
+    record.update(values)
+    return record
+
+
+def _machine(**values):
+    record = {'whites_id': 'M001', 'make': 'JCB', 'model': '3CX', 'machine_type': 'Digger', 'status': 'Active', 'hours': 340}
+    record.update(values)
+    return record
+
+
+def _due(dm, **limits):
+    return dm.get_services_due(**limits).set_index('schedule_id')
+
+
+def test_schedules_come_due_within_each_limit(dm, records):
+    van = dm.add_vehicle(records.vehicle(mileage=10000))
+    digger = dm.add_machine(_machine())
+    by_miles = dm.add_service_schedule(_schedule(van, interval_miles=5000, last_done_mileage=5500))
+    by_days = dm.add_service_schedule(_schedule(van, service_type='MOT', interval_days=365, last_done_date=_days_ago(360)))
+    by_hours = dm.add_service_schedule(_schedule(digger, 'machine', interval_hours=250, last_done_hours=100))
+    dm.add_service_schedule(_schedule(van, service_type='Tyres', interval_miles=20000, last_done_mileage=9000))
+    
+    assert list(_due(dm, days=5).index) == [by_days]
+    assert _due(dm, days=4).empty
+    assert list(_due(dm, miles=500).index) == [by_miles]
+    assert _due(dm, miles=499).empty
+    assert list(_due(dm, hours=10).index) == [by_hours]
+    assert set(_due(dm, days=5, miles=500, hours=10).index) == {by_miles, by_days, by_hours}
+    assert _due(dm).empty
+    
+    due = _due(dm, days=5, miles=500, hours=10)
+    assert due.loc[by_days, 'next_due_date'] == pd.Timestamp(date.today() + timedelta(days=5))
+    assert due.loc[by_miles, ['next_due_mileage', 'miles_until_due']].tolist() == [10500, 500]
+    assert due.loc[by_hours, ['next_due_hours', 'hours_until_due']].tolist() == [350, 10]
+    assert set(due['status']) == {'Due Soon'}
+
+
+def test_overdue_and_never_done_schedules_come_first(dm, records):
+    van = dm.add_vehicle(records.vehicle(mileage=10000))
+    soon = dm.add_service_schedule(_schedule(van, interval_miles=5000, last_done_mileage=5500))
+    overdue = dm.add_service_schedule(_schedule(van, service_type='MOT', interval_days=365, last_done_date=_days_ago(400)))
+    never_done = dm.add_service_schedule(_schedule(van, service_type='LOLER', interval_days=180))
+    dm.add_service_schedule(_schedule(van, service_type='Valet'))
+    
+    due = dm.get_services_due(miles=500)
+    assert due['schedule_id'].tolist() == [never_done, soon]
+    due = dm.get_services_due(days=0, miles=500)
+    assert due['schedule_id'].tolist() == [overdue, never_done, soon]
+    assert due['status'].tolist() == ['Overdue', 'Not Yet Done', 'Due Soon']
+    
+    # Once done it counts from then like any other
+    dm.complete_service(never_done, done_date=date.today())
+    assert never_done not in set(dm.get_services_due(days=179)['schedule_id'])
+    assert never_done in set(dm.get_services_due(days=180)['schedule_id'])
+
+
+def test_incremental_updates_match_a_rebuild(dm, records):
+    vans = [dm.add_vehicle(records.vehicle(whites_id=f'W{n:03}', license_plate=f'AB{n}2CDE', mileage=10000)) for n in range(2)]
+    digger = dm.add_machine(_machine())
+    first = dm.add_service_schedule(_schedule(vans[0], interval_miles=5000, last_done_mileage=5500))
+    dm.add_service_schedule(_schedule(digger, 'machine', interval_hours=250, last_done_hours=100))
+    state = SERVICE_SCHEDULE_INDEX.get(dm, 'schedules')
+    
+    second = dm.add_service_schedule(_schedule(vans[1], service_type='MOT', interval_days=365, last_done_date=_days_ago(300)))
+    dm.add_service_schedule(_schedule(vans[0], service_type='LOLER', interval_days=180))
+    dm.update_vehicle_mileage(vans[0], 10800)
+    dm.update_machine_hours(digger, 360)
+    dm.complete_service(first)
+    schedule = dm.load_service_schedules().set_index('schedule_id').loc[second].to_dict()
+    dm.update_service_schedule({**schedule, 'schedule_id': second, 'interval_days': 330})
+    dm.delete_vehicle(vans[1])
+    dm.add_vehicle(records.vehicle(whites_id='W010', license_plate='XY99ZZA'))
+    
+    assert SERVICE_SCHEDULE_INDEX.get(dm, 'schedules') is state
+    rebuilt = SERVICE_SCHEDULE_INDEX.build(
+        'schedules', dm.load_service_schedules(), dm.load_vehicles(), dm.load_machines()
+    )
+    limits = {'days': 10000, 'miles': 100000, 'hours': 10000}
+    due = state.describe(state.due_within(**limits))
+    pd.testing.assert_frame_equal(due, rebuilt.describe(rebuilt.due_within(**limits)))
+    # Schedules without a mileage or date point have NaN / NaT there, not None
+    assert not due.map(lambda value: value is None).any().any()
+    assert due['miles_until_due'].isna().any() and due['next_due_date'].isna().any()
+    # The deleted van's schedules went with it
+    assert len(state.due_within(**limits)) == 3
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from utils.search_index import RESULTS_CACHED, SEARCH_INDEX, SearchState, normalize
+
+QUERIES = ['W0', '12', 'C', 'FORD', 'transit', 'ab12 cde', 'XY99', 'nothing']
+
+
+def test_short_queries_match_anywhere_in_a_field(dm, records):
+    first = dm.add_vehicle(records.vehicle())
+    second = dm.add_vehicle(records.vehicle(whites_id='W002', make='Iveco', license_plate='XY99ZZA'))
+    
+    assert dm.search('vehicles', '12') == [first]
+    assert dm.search('vehicles', '9') == [second]
+    assert dm.search('vehicles', 'w') == [first, second]
+    assert dm.search('vehicles', ' ') is None
+
+
+def test_query_results_are_capped():
+    state = SearchState()
+    state.add('1', (normalize('AB12CDE'),))
+    for n in range(RESULTS_CACHED):
+        state.search(f'Q{n}')
+    state.search('Q0')
+    state.search('AB1')
+    
+    assert len(state.results) == RESULTS_CACHED
+    assert 'Q0' in state.results and 'Q1' not in state.results
+    
+    state.add('2', (normalize('AB13'),))
+    assert not state.results
+
+
+def test_incremental_updates_match_a_rebuild(dm, records):
+    ids = [
+        dm.add_vehicle(records.vehicle(whites_id=f'W{n:03}', license_plate=f'AB{n}2CDE'))
+        for n in range(5)
+    ]
+    state = SEARCH_INDEX.get(dm, 'vehicles')
+    
+    dm.add_vehicle(records.vehicle(whites_id='W100', make='Iveco', license_plate='XY99ZZA'))
+    vehicle = dm.load_vehicles().set_index('vehicle_id').loc[ids[1]].to_dict()
+    dm.update_vehicle({**vehicle, 'vehicle_id': ids[1], 'model': 'Daily', 'license_plate': 'C1'})
+    dm.delete_vehicle(ids[3])
+    dm.import_table('vehicles', pd.DataFrame([records.vehicle(whites_id='W200', license_plate='AB12CDF')]))
+    
+    # Every write was applied to the state in place, not rebuilt
+    assert SEARCH_INDEX.get(dm, 'vehicles') is state
+    rebuilt = SEARCH_INDEX.build('vehicles', dm.load_vehicles())
+    for query in QUERIES:
+        assert state.search(query) == rebuilt.search(query), query
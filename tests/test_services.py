@@ -0,0 +1,50 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.services import SERVICES, ServiceRegistry, get_data_manager
+
+
+@pytest.fixture
+def services(tmp_path, monkeypatch):
+    """The process registry, emptied, with data kept in a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('WHITES_STORAGE', raising=False)
+    SERVICES.clear()
+    yield SERVICES
+    SERVICES.clear()
+
+
+def test_each_storage_backend_has_one_shared_data_manager(services, monkeypatch):
+    dm = get_data_manager()
+    assert get_data_manager('CSV') is dm
+    assert dm.storage.name == 'csv'
+    
+    monkeypatch.setenv('WHITES_STORAGE', 'sqlite')
+    sqlite_dm = get_data_manager()
+    assert sqlite_dm is not dm and sqlite_dm.storage.name == 'sqlite'
+    assert get_data_manager('csv') is dm
+
+
+def test_clearing_the_registry_makes_new_services(services):
+    dm = get_data_manager()
+    services.clear()
+    assert get_data_manager() is not dm
+
+
+def test_a_service_is_created_once_however_many_threads_ask():
+    registry = ServiceRegistry()
+    created = []
+    
+    def factory():
+        time.sleep(0.05)
+        created.append(threading.get_ident())
+        return object()
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        services = list(pool.map(lambda _: registry.get('slow', factory), range(8)))
+    
+    assert len(created) == 1
+    assert all(service is services[0] for service in services)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.snapshots import read_snapshot, snapshots_available, write_snapshot
+from utils.storage import assign_value
+
+pytestmark = pytest.mark.skipif(not snapshots_available(), reason="pyarrow is not installed")
+
+SIGNATURE = (1, 2)
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    df = pd.DataFrame({
+        'count': [1, 2, 3],
+        'rate': [1.5, np.nan, 2.0],
+        'due': pd.to_datetime(['2030-01-01', None, '2030-02-01']),
+        'status': pd.Categorical(['Active', 'Sold', 'Active']),
+        'notes': ['a', None, 'c'],
+    })
+    path = str(tmp_path / 'table.arrow')
+    write_snapshot(path, df, SIGNATURE, {})
+    return path, df
+
+
+def test_snapshot_round_trips_only_for_its_signature(snapshot):
+    path, df = snapshot
+    loaded = read_snapshot(path, SIGNATURE, {})
+    pd.testing.assert_frame_equal(loaded, df.assign(notes=['a', np.nan, 'c']))
+    
+    assert read_snapshot(path, (1, 3), {}) is None
+    assert read_snapshot(path, SIGNATURE, {'count': 'int'}) is None
+
+
+@pytest.mark.parametrize('column, value', [
+    ('count', 7), ('rate', 0.5), ('due', '2031-01-01'), ('status', 'Sold'), ('status', 'Hired'), ('notes', 'b'),
+])
+def test_loaded_columns_can_be_written(snapshot, column, value):
+    path, _ = snapshot
+    loaded = read_snapshot(path, SIGNATURE, {})
+    assign_value(loaded, loaded.index == 0, column, value)
+    
+    assert loaded[column].iloc[0] == (pd.Timestamp(value) if column == 'due' else value)
+    # The write didn't reach the file
+    assert read_snapshot(path, SIGNATURE, {})[column].iloc[0] != loaded[column].iloc[0]
@@ -0,0 +1,47 @@
+from utils.table_cache import TABLE_CACHE
+
+
+def test_loads_are_shared_until_a_write(dm, records):
+    dm.add_vehicle(records.vehicle())
+    version = dm.table_version('vehicles')
+    first = dm.load_vehicles()
+    assert dm.table_version('vehicles') == version
+    
+    dm.add_vehicle(records.vehicle(whites_id='W002', license_plate='CD34EFG'))
+    assert dm.table_version('vehicles') == version + 1
+    assert len(dm.load_vehicles()) == 2
+    # Frames already handed out are not changed by the write
+    assert len(first) == 1
+
+
+def test_other_process_writes_reach_version_and_indexes(dm, records, other_process):
+    assert dm.search('vehicles', 'Zeta') == []
+    # Applied to the built index in place; on SQLite it also drops the cache entry
+    vehicle_id = dm.add_vehicle(records.vehicle())
+    version = dm.table_version('vehicles')
+    
+    other_process("""
+        dm.add_vehicle({'whites_id': 'W002', 'make': 'Zeta', 'model': 'Van', 'year': 2021, 'weight': 3.0,
+                        'license_plate': 'ZZ99ZZZ', 'status': 'Active', 'mileage': 5})
+    """)
+    assert dm.table_version('vehicles') > version
+    assert len(dm.search('vehicles', 'Zeta')) == 1
+    
+    other_process(f"""
+        dm.update_vehicle_mileage({vehicle_id!r}, 25000)
+    """)
+    vehicles = dm.load_vehicles().set_index('vehicle_id')
+    assert vehicles.loc[vehicle_id, 'mileage'] == 25000
+
+
+def test_other_process_write_seen_after_entry_dropped(dm, records, other_process):
+    dm.add_vehicle(records.vehicle())
+    dm.load_vehicles()
+    TABLE_CACHE.invalidate(dm.storage, 'vehicles')
+    version = dm.table_version('vehicles')
+    
+    other_process("""
+        dm.add_vehicle({'whites_id': 'W002', 'make': 'Zeta', 'model': 'Van', 'year': 2021, 'weight': 3.0,
+                        'license_plate': 'ZZ99ZZZ', 'status': 'Active', 'mileage': 5})
+    """)
+    assert dm.table_version('vehicles') == version + 1
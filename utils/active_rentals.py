@@ -0,0 +1,83 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from utils.table_index import TableIndex, register_index
+
+# Equipment columns joined onto each rental
+EQUIPMENT_JOIN_COLUMNS = ['name', 'category', 'brand', 'model', 'whites_id']
+
+# (label, icon, lowest days overdue) from most to least urgent; a rental falls
+# in the first bucket whose lower bound it reaches
+OVERDUE_BUCKETS = [
+    ('Overdue 30+ days', '🔴', 30),
+    ('Overdue 8-29 days', '🔴', 8),
+    ('Overdue 1-7 days', '🔴', 1),
+    ('Due Today', '🟡', 0),
+    ('Due This Week', '🟢', -7),
+    ('Due Later', '🟢', None),
+]
+NO_RETURN_DATE = 'No Return Date'
+
+EPOCH = pd.Timestamp('1970-01-01')
+
+
+class ActiveRentalsView(TableIndex):
+    """
+    Active rentals joined to their equipment, with expected return dates
+    parsed once. Rebuilt only when rentals or equipment change; overdue
+    days and buckets are worked out per call so they stay right across
+    midnight without a rebuild.
+    """
+
+    tables = ('rentals', 'equipment')
+
+    def sources(self, name):
+        return self.tables
+
+    def build(self, name, rentals_df, equipment_df):
+        active = rentals_df[rentals_df['status'] == 'Active']
+        equipment = equipment_df.reindex(columns=['equipment_id'] + EQUIPMENT_JOIN_COLUMNS).drop_duplicates('equipment_id')
+        active = active.merge(equipment, on='equipment_id', how='left')
+        active['equipment_name'] = (
+            active['name'].fillna('Unknown equipment').astype(str) + ' - '
+            + active['brand'].fillna('').astype(str) + ' ' + active['model'].fillna('').astype(str)
+        ).str.strip()
+        expected = pd.to_datetime(active['expected_return_date'], errors='coerce').dt.normalize()
+        active['expected_return_day'] = (expected - EPOCH).dt.days + EPOCH.toordinal()
+        return active
+
+    def view(self, data_manager, today=None):
+        """Active rentals with days_overdue, overdue_bucket and status_label columns, most overdue first"""
+        today = (today or date.today()).toordinal()
+        with self._lock:
+            active = self.get(data_manager, 'active').copy()
+
+        days = today - active['expected_return_day']
+        known = days.notna()
+        conditions = [known & (days >= low) for _, _, low in OVERDUE_BUCKETS[:-1]] + [known]
+        active['days_overdue'] = days.astype('Int64')
+        active['overdue_bucket'] = np.select(conditions, [label for label, _, _ in OVERDUE_BUCKETS], NO_RETURN_DATE)
+        icons = np.select(conditions, [icon for _, icon, _ in OVERDUE_BUCKETS], '⚪')
+
+        # Same wording the Active Rentals list has always used
+        whole_days = days.fillna(0).astype(int).abs().astype(str)
+        labels = np.select(
+            [known & (days > 0), known & (days == 0), known],
+            ['OVERDUE (' + whole_days + ' days)', 'DUE TODAY', whole_days + ' days remaining'],
+            'no return date'
+        )
+        active['status_label'] = pd.Series(icons, index=active.index) + ' ' + labels
+        return active.sort_values('days_overdue', ascending=False, na_position='last', ignore_index=True)
+
+    def bucket_counts(self, data_manager, active=None, today=None):
+        """Number of active rentals in each overdue bucket, in bucket order"""
+        if active is None:
+            active = self.view(data_manager, today)
+        counts = active['overdue_bucket'].value_counts()
+        labels = [label for label, _, _ in OVERDUE_BUCKETS] + [NO_RETURN_DATE]
+        return {label: int(counts.get(label, 0)) for label in labels}
+
+# Shared by every DataManager in the process
+ACTIVE_RENTALS_VIEW = register_index(ActiveRentalsView())
@@ -0,0 +1,225 @@
+import bisect
+from datetime import date
+
+import pandas as pd
+
+from utils.table_index import TableIndex, register_index
+
+# Equipment that can't be hired out whatever its bookings
+UNAVAILABLE_STATUSES = ['Maintenance', 'Out of Service']
+
+
+def _day(value):
+    """Day number (date ordinal) of a date value, or None"""
+    day = pd.to_datetime(value, errors='coerce')
+    return None if pd.isna(day) else day.date().toordinal()
+
+
+def _date_range(start_date, end_date):
+    """Day numbers of a start and end date, raising ValueError if either doesn't parse"""
+    start, end = _day(start_date), _day(end_date)
+    if start is None:
+        raise ValueError(f"Invalid start date: {start_date!r}")
+    if end is None:
+        raise ValueError(f"Invalid end date: {end_date!r}")
+    return start, end
+
+
+class EquipmentBookings:
+    """
+    Booked date ranges for one piece of equipment.
+    Closed bookings are sorted by start day with a running maximum of their
+    end days, so whether a range is free is one bisect plus one comparison.
+    Bookings still out (active, not yet returned) are kept aside as they
+    run until today at least, even once past their expected return.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.ends = []
+        self.max_ends = []
+        self.open = {}
+
+    def _refresh_max_ends(self, start):
+        running = self.max_ends[start - 1] if start > 0 else None
+        for i in range(start, len(self.ends)):
+            running = self.ends[i] if running is None else max(running, self.ends[i])
+            self.max_ends[i] = running
+
+    def add(self, rental_id, start, end, still_out):
+        if still_out:
+            self.open[rental_id] = (start, end)
+            return
+        i = bisect.bisect_right(self.keys, (start, rental_id))
+        self.keys.insert(i, (start, rental_id))
+        self.ends.insert(i, end)
+        self.max_ends.insert(i, end)
+        self._refresh_max_ends(i)
+
+    def remove(self, rental_id, start):
+        if self.open.pop(rental_id, None) is not None:
+            return
+        i = bisect.bisect_left(self.keys, (start, rental_id))
+        if i < len(self.keys) and self.keys[i] == (start, rental_id):
+            del self.keys[i], self.ends[i], self.max_ends[i]
+            self._refresh_max_ends(i)
+
+    def conflicts(self, start, end, today, exclude=None):
+        """IDs of bookings overlapping the days start..end (inclusive)"""
+        found = [
+            rental_id for rental_id, (open_start, expected_end) in self.open.items()
+            if open_start <= end and max(expected_end, today) >= start and rental_id != exclude
+        ]
+        # Only bookings starting by `end` can overlap; walk back while any could still reach `start`
+        i = bisect.bisect_right(self.keys, (end, chr(0x10ffff))) - 1
+        while i >= 0 and self.max_ends[i] >= start:
+            if self.ends[i] >= start and self.keys[i][1] != exclude:
+                found.append(self.keys[i][1])
+            i -= 1
+        return found
+
+    def is_free(self, start, end, today):
+        """Whether no booking overlaps start..end, in O(log n)"""
+        i = bisect.bisect_right(self.keys, (end, chr(0x10ffff))) - 1
+        if i >= 0 and self.max_ends[i] >= start:
+            return False
+        return not any(
+            open_start <= end and max(expected_end, today) >= start
+            for open_start, expected_end in self.open.values()
+        )
+
+
+class BookingBook:
+    """Bookings for every piece of equipment, built from the rentals table"""
+
+    def __init__(self):
+        self.equipment = {}
+        self.rentals = {}
+
+    def set_rental(self, record):
+        rental_id = str(record.get('rental_id'))
+        self.remove_rental(rental_id)
+        start = _day(record.get('start_date'))
+        if start is None:
+            return
+        returned = _day(record.get('actual_return_date'))
+        expected = _day(record.get('expected_return_date'))
+        still_out = returned is None and record.get('status') == 'Active'
+        end = returned if returned is not None else (expected if expected is not None else start)
+
+        equipment_id = str(record.get('equipment_id'))
+        self.rentals[rental_id] = (equipment_id, start, record)
+        self.equipment.setdefault(equipment_id, EquipmentBookings()).add(rental_id, start, max(end, start), still_out)
+
+    def remove_rental(self, rental_id):
+        entry = self.rentals.pop(rental_id, None)
+        if entry is not None:
+            equipment_id, start, _ = entry
+            self.equipment[equipment_id].remove(rental_id, start)
+
+    def remove_equipment(self, equipment_id):
+        bookings = self.equipment.pop(equipment_id, None)
+        if bookings is not None:
+            for _, rental_id in bookings.keys:
+                self.rentals.pop(rental_id, None)
+            for rental_id in bookings.open:
+                self.rentals.pop(rental_id, None)
+
+
+class AvailabilityIndex(TableIndex):
+    """
+    Per-equipment booking calendar over start, expected and actual return
+    dates, kept current as rentals are added, extended and returned.
+    """
+
+    tables = ('rentals',)
+
+    def build(self, name, rentals_df):
+        state = BookingBook()
+        for record in rentals_df.to_dict('records'):
+            state.set_rental(record)
+        return state
+
+    def insert(self, state, table, rows):
+        for record in rows.to_dict('records'):
+            state.set_rental(record)
+        return True
+
+    def update(self, state, table, key, key_value, values):
+        entry = state.rentals.get(str(key_value))
+        if key != 'rental_id' or entry is None:
+            return False
+        record = dict(entry[2])
+        record.update(values)
+        state.set_rental(record)
+        return True
+
+    def delete(self, state, table, column, values):
+        for value in values:
+            if column == 'rental_id':
+                state.remove_rental(str(value))
+            elif column == 'equipment_id':
+                state.remove_equipment(str(value))
+            else:
+                return False
+        return True
+
+    def conflicts(self, data_manager, equipment_id, start_date, end_date, exclude_rental_id=None):
+        """Rental IDs booked on equipment_id at any point between the two dates"""
+        start, end = _date_range(start_date, end_date)
+        with self._lock:
+            bookings = self.get(data_manager, 'rentals').equipment.get(str(equipment_id))
+            if bookings is None:
+                return []
+            exclude = None if exclude_rental_id is None else str(exclude_rental_id)
+            return bookings.conflicts(start, max(end, start), date.today().toordinal(), exclude)
+
+    def free(self, data_manager, equipment_ids, start_date, end_date):
+        """Which of equipment_ids have no booking between the two dates"""
+        start, end = _date_range(start_date, end_date)
+        today = date.today().toordinal()
+        with self._lock:
+            equipment = self.get(data_manager, 'rentals').equipment
+            return [
+                equipment_id for equipment_id in equipment_ids
+                if str(equipment_id) not in equipment
+                or equipment[str(equipment_id)].is_free(start, max(end, start), today)
+            ]
+
+    def import_clashes(self, data_manager, rentals_df, candidates):
+        """
+        Check the candidate rows of a rentals import in order against the
+        bookings already made and the earlier rows that passed. Returns a
+        reason per row, '' for rows that can be booked.
+        """
+        reasons = {}
+        incoming = BookingBook()
+        today = date.today().toordinal()
+        with self._lock:
+            existing = self.get(data_manager, 'rentals').equipment
+            rows = rentals_df[candidates]
+            for row, record in zip(rows.index, rows.to_dict('records')):
+                start = _day(record.get('start_date'))
+                if start is None:
+                    reasons[row] = "Invalid start date format (use YYYY-MM-DD)"
+                    continue
+                # Booked until it came back, else until it's due back, as add_rental checks
+                end = next((day for day in (
+                    _day(record.get('actual_return_date')), _day(record.get('expected_return_date'))
+                ) if day is not None), start)
+                equipment_id = str(record.get('equipment_id'))
+                booked = existing.get(equipment_id)
+                clashes = booked.conflicts(start, max(end, start), today) if booked is not None else []
+                if clashes:
+                    reasons[row] = f"Equipment is already booked for those dates (rental {', '.join(clashes)})"
+                    continue
+                earlier = incoming.equipment.get(equipment_id)
+                if earlier is not None and earlier.conflicts(start, max(end, start), today):
+                    reasons[row] = "Equipment is booked for those dates by an earlier row"
+                    continue
+                incoming.set_rental({**record, 'rental_id': f'row-{row}'})
+        return pd.Series(reasons, index=rentals_df.index, dtype=object).fillna('')
+
+
+# Shared by every DataManager in the process
+AVAILABILITY_INDEX = register_index(AvailabilityIndex())
@@ -1,296 +1,497 @@
 import pandas as pd
 import os
-import uuid
-from datetime import datetime
+from datetime import date, datetime
+from utils.storage import ConcurrentEditError, get_storage_backend, row_version
+from utils.table_cache import TABLE_CACHE
+from utils.table_index import TABLE_INDEXES
+from utils.search_index import SEARCH_INDEX
+from utils.maintenance_due import MAINTENANCE_DUE_INDEX
+from utils.scheduler import SERVICE_SCHEDULE_INDEX
+from utils.availability import AVAILABILITY_INDEX, UNAVAILABLE_STATUSES
+from utils.active_rentals import ACTIVE_RENTALS_VIEW
+from utils.rollups import ROLLUP_INDEX
+from utils.history_index import HISTORY_INDEX
+from utils.ids import ID_INDEX
+from utils.importer import ImportReport, prepare_bulk_update, prepare_import, stream_position, stream_size
+
+# Columns for each table, in file order
+TABLE_COLUMNS = {
+    # Road Vehicles
+    'vehicles': [
+        'vehicle_id', 'whites_id', 'vin_chassis', 'make', 'model', 'year', 'weight', 'license_plate', 
+        'vehicle_type', 'status', 'mileage', 'defects', 'notes'
+    ],
+    # Plant Vehicles
+    'machines': [
+        'machine_id', 'whites_id', 'vin_chassis', 'make', 'model', 'year', 'weight', 
+        'machine_type', 'daily_rate', 'weekly_rate', 'status', 'hours', 'defects', 'notes'
+    ],
+    'maintenance': [
+        'maintenance_id', 'vehicle_id', 'date', 'type', 'description', 
+        'cost', 'mileage', 'service_provider', 'next_due_mileage'
+    ],
+    'equipment': [
+        'equipment_id', 'name', 'category', 'daily_rate', 'status', 'whites_id', 'brand', 'model', 
+        'serial_number', 'weekly_rate', 'purchase_price', 'purchase_date', 
+        'last_service_date', 'description', 'notes'
+    ],
+    'rentals': [
+        'rental_id', 'equipment_id', 'customer_name', 'customer_phone', 'customer_email',
+        'start_date', 'expected_return_date', 'actual_return_date', 'rental_rate', 
+        'deposit', 'additional_charges', 'status', 'return_condition', 'damage_notes', 'notes'
+    ],
+    # Recurring services by mileage, engine hours and/or calendar days
+    'service_schedules': [
+        'schedule_id', 'asset_id', 'asset_type', 'service_type', 'interval_days', 'interval_miles',
+        'interval_hours', 'last_done_date', 'last_done_mileage', 'last_done_hours', 'notes'
+    ],
+}
+
+# Declared type of each non-text column ('category', 'int', 'float' or 'date').
+# Columns not listed, including every ID, are read as text. Dates are parsed
+# once at load, so callers get datetime64 columns.
+COLUMN_TYPES = {
+    'vehicles': {
+        'year': 'int', 'weight': 'float', 'vehicle_type': 'category', 'status': 'category', 'mileage': 'int'
+    },
+    'machines': {
+        'year': 'int', 'weight': 'float', 'machine_type': 'category', 'daily_rate': 'float',
+        'weekly_rate': 'float', 'status': 'category', 'hours': 'int'
+    },
+    'maintenance': {
+        'date': 'date', 'type': 'category', 'cost': 'float', 'mileage': 'int', 'next_due_mileage': 'float'
+    },
+    'equipment': {
+        'category': 'category', 'daily_rate': 'float', 'status': 'category', 'weekly_rate': 'float',
+        'purchase_price': 'float', 'purchase_date': 'date', 'last_service_date': 'date'
+    },
+    'rentals': {
+        'start_date': 'date', 'expected_return_date': 'date', 'actual_return_date': 'date',
+        'rental_rate': 'float', 'deposit': 'float', 'additional_charges': 'float',
+        'status': 'category', 'return_condition': 'category'
+    },
+    'service_schedules': {
+        'asset_type': 'category', 'service_type': 'category', 'interval_days': 'float',
+        'interval_miles': 'float', 'interval_hours': 'float', 'last_done_date': 'date',
+        'last_done_mileage': 'float', 'last_done_hours': 'float'
+    },
+}
+
+# Primary key column for each table
+PRIMARY_KEYS = {
+    'vehicles': 'vehicle_id',
+    'machines': 'machine_id',
+    'maintenance': 'maintenance_id',
+    'equipment': 'equipment_id',
+    'rentals': 'rental_id',
+    'service_schedules': 'schedule_id',
+}
+
+# Rows per chunk when streaming CSV imports
+IMPORT_CHUNK_ROWS = 5000
+
+# Foreign key columns that are looked up or deleted by
+FOREIGN_KEYS = {
+    'maintenance': ['vehicle_id'],
+    'rentals': ['equipment_id'],
+    'service_schedules': ['asset_id'],
+}
+
+# Rows deleted along with a record: (child table, column holding the record's ID)
+CASCADES = {
+    'vehicles': [('maintenance', 'vehicle_id'), ('service_schedules', 'asset_id')],
+    'machines': [('maintenance', 'vehicle_id'), ('service_schedules', 'asset_id')],
+    'equipment': [('rentals', 'equipment_id')],
+}
 
 class DataManager:
-    def __init__(self):
+    def __init__(self, storage=None):
         self.vehicles_file = "data/vehicles.csv"
         self.machines_file = "data/machines.csv"
         self.maintenance_file = "data/maintenance.csv"
         self.equipment_file = "data/equipment.csv"
         self.rentals_file = "data/rentals.csv"
+        self.service_schedules_file = "data/service_schedules.csv"
         self.ensure_data_directory()
+        
+        # Storage backend (CSV by default, set WHITES_STORAGE=sqlite for SQLite)
+        if storage is None or isinstance(storage, str):
+            storage = get_storage_backend(storage, data_dir="data")
+        self.storage = storage
         self.ensure_csv_files()
     
     def ensure_data_directory(self):
         """Create data directory if it doesn't exist"""
-        if not os.path.exists("data"):
-            os.makedirs("data")
+        os.makedirs("data", exist_ok=True)
     
     def ensure_csv_files(self):
-        """Create CSV files with headers if they don't exist"""
-        # Vehicle CSV headers (Road Vehicles)
-        if not os.path.exists(self.vehicles_file):
-            vehicle_columns = [
-                'vehicle_id', 'whites_id', 'vin_chassis', 'make', 'model', 'year', 'weight', 'license_plate', 
-                'vehicle_type', 'status', 'mileage', 'defects', 'notes'
-            ]
-            empty_df = pd.DataFrame(columns=vehicle_columns)
-            empty_df.to_csv(self.vehicles_file, index=False)
-        
-        # Machine CSV headers (Plant Vehicles)
-        if not os.path.exists(self.machines_file):
-            machine_columns = [
-                'machine_id', 'whites_id', 'vin_chassis', 'make', 'model', 'year', 'weight', 
-                'machine_type', 'daily_rate', 'weekly_rate', 'status', 'hours', 'defects', 'notes'
-            ]
-            empty_df = pd.DataFrame(columns=machine_columns)
-            empty_df.to_csv(self.machines_file, index=False)
-        
-        # Maintenance CSV headers
-        if not os.path.exists(self.maintenance_file):
-            maintenance_columns = [
-                'maintenance_id', 'vehicle_id', 'date', 'type', 'description', 
-                'cost', 'mileage', 'service_provider', 'next_due_mileage'
-            ]
-            empty_df = pd.DataFrame(columns=maintenance_columns)
-            empty_df.to_csv(self.maintenance_file, index=False)
+        """Create tables with headers if they don't exist"""
+        for table, columns in TABLE_COLUMNS.items():
+            self.storage.ensure_table(
+                table, columns, PRIMARY_KEYS[table], FOREIGN_KEYS.get(table, ()), COLUMN_TYPES.get(table)
+            )
         
-        # Equipment CSV headers
-        if not os.path.exists(self.equipment_file):
-            equipment_columns = [
-                'equipment_id', 'name', 'category', 'daily_rate', 'status', 'whites_id', 'brand', 'model', 
-                'serial_number', 'weekly_rate', 'purchase_price', 'purchase_date', 
-                'last_service_date', 'description', 'notes'
-            ]
-            empty_df = pd.DataFrame(columns=equipment_columns)
-            empty_df.to_csv(self.equipment_file, index=False)
-        
-        # Rentals CSV headers
-        if not os.path.exists(self.rentals_file):
-            rental_columns = [
-                'rental_id', 'equipment_id', 'customer_name', 'customer_phone', 'customer_email',
-                'start_date', 'expected_return_date', 'actual_return_date', 'rental_rate', 
-                'deposit', 'additional_charges', 'status', 'return_condition', 'damage_notes', 'notes'
-            ]
-            empty_df = pd.DataFrame(columns=rental_columns)
-            empty_df.to_csv(self.rentals_file, index=False)
+        # Finish any cascading delete a crash interrupted
+        self.storage.recover()
     
-    def load_vehicles(self):
-        """Load vehicles from CSV (Road Vehicles)"""
+    def _load_table(self, table):
+        """Load a table through the shared table cache"""
         try:
-            df = pd.read_csv(self.vehicles_file)
-            return df
+            return self.storage.cached(table)
         except (FileNotFoundError, pd.errors.EmptyDataError):
-            return pd.DataFrame(columns=[
-                'vehicle_id', 'whites_id', 'vin_chassis', 'make', 'model', 'year', 'weight', 'license_plate', 
-                'vehicle_type', 'status', 'mileage', 'defects', 'notes'
-            ])
+            return self.storage.conform(table, pd.DataFrame(columns=TABLE_COLUMNS[table]))
+    
+    def _write(self, op, table, *args, expected_version=None):
+        """
+        Run a storage write and pass the change on to the derived indexes.
+        The table is locked for the write, so concurrent sessions can't
+        interleave their read-modify-write cycles. For updates,
+        `expected_version` is the row_version() the caller started from;
+        if the stored row has changed since, ConcurrentEditError is raised
+        and nothing is written.
+        """
+        with self.storage.lock(table):
+            if expected_version is not None:
+                key, key_value = args[0], args[1]
+                current = self.storage.fetch_row(table, key, key_value)
+                if current is None or self.row_version(table, current) != expected_version:
+                    raise ConcurrentEditError(
+                        f"This record was changed or deleted by someone else after you opened it ({key} {key_value})"
+                    )
+            
+            before = self.table_version(table)
+            getattr(self.storage, op)(table, *args)
+            after = self.table_version(table)
+            for index in TABLE_INDEXES:
+                index.apply(self, table, op, args, before, after)
+    
+    def _write_deletes(self, deletes):
+        """
+        Run (table, column, values) deletes across several tables as one
+        atomic storage write and pass each on to the derived indexes
+        """
+        with self.storage.lock_tables(table for table, _, _ in deletes):
+            before = {table: self.table_version(table) for table, _, _ in deletes}
+            self.storage.delete_many(deletes)
+            for table, column, values in deletes:
+                after = self.table_version(table)
+                for index in TABLE_INDEXES:
+                    index.apply(self, table, 'delete', (column, values), before[table], after)
+    
+    def delete_records(self, table, record_ids):
+        """
+        Delete records by ID together with the rows that belong to them
+        (maintenance and service schedules for vehicles and machines, rentals
+        for equipment). However many IDs are given, each table gets a single
+        delete and all of them commit together.
+        """
+        record_ids = list(record_ids)
+        if not record_ids:
+            return
+        deletes = [(table, PRIMARY_KEYS[table], record_ids)]
+        deletes += [(child, column, record_ids) for child, column in CASCADES.get(table, [])]
+        self._write_deletes(deletes)
+    
+    def row_version(self, table, record):
+        """Version of a record for optimistic updates: pass it back as `expected_version` when saving edits"""
+        return row_version({col: record.get(col) for col in TABLE_COLUMNS[table] if col in record})
+    
+    def search(self, table, query):
+        """IDs (as strings) of vehicles, machines or equipment matching a search query"""
+        return SEARCH_INDEX.search(self, table, query)
+    
+    def table_version(self, table):
+        """Version counter for a table, bumped on every write"""
+        return TABLE_CACHE.version(self.storage, table)
+    
+    def load_vehicles(self):
+        """Load vehicles from CSV (Road Vehicles)"""
+        return self._load_table('vehicles')
     
     def load_machines(self):
         """Load machines from CSV (Plant Vehicles)"""
-        try:
-            df = pd.read_csv(self.machines_file)
-            return df
-        except (FileNotFoundError, pd.errors.EmptyDataError):
-            return pd.DataFrame(columns=[
-                'machine_id', 'whites_id', 'vin_chassis', 'make', 'model', 'year', 'weight', 
-                'machine_type', 'daily_rate', 'weekly_rate', 'status', 'hours', 'defects', 'notes'
-            ])
+        return self._load_table('machines')
     
     def load_maintenance(self):
         """Load maintenance records from CSV"""
-        try:
-            df = pd.read_csv(self.maintenance_file)
-            return df
-        except (FileNotFoundError, pd.errors.EmptyDataError):
-            return pd.DataFrame(columns=[
-                'maintenance_id', 'vehicle_id', 'date', 'type', 'description', 
-                'cost', 'mileage', 'service_provider', 'next_due_mileage'
-            ])
+        return self._load_table('maintenance')
     
     def add_vehicle(self, vehicle_data):
         """Add a new vehicle (Road Vehicle)"""
-        df = self.load_vehicles()
-        
         # Generate unique vehicle ID
-        vehicle_data['vehicle_id'] = str(uuid.uuid4())[:8]
-        
-        # Convert to DataFrame and append
-        new_vehicle = pd.DataFrame([vehicle_data])
-        df = pd.concat([df, new_vehicle], ignore_index=True)
+        vehicle_data['vehicle_id'] = self._generate_ids('vehicles', 1)[0]
         
-        # Save to CSV
-        df.to_csv(self.vehicles_file, index=False)
+        # Insert the new row
+        self._write('insert', 'vehicles', pd.DataFrame([vehicle_data]))
         return vehicle_data['vehicle_id']
     
     def add_machine(self, machine_data):
         """Add a new machine (Plant Vehicle)"""
-        df = self.load_machines()
-        
         # Generate unique machine ID
-        machine_data['machine_id'] = str(uuid.uuid4())[:8]
-        
-        # Convert to DataFrame and append
-        new_machine = pd.DataFrame([machine_data])
-        df = pd.concat([df, new_machine], ignore_index=True)
+        machine_data['machine_id'] = self._generate_ids('machines', 1)[0]
         
-        # Save to CSV
-        df.to_csv(self.machines_file, index=False)
+        # Insert the new row
+        self._write('insert', 'machines', pd.DataFrame([machine_data]))
         return machine_data['machine_id']
     
-    def update_vehicle(self, updated_vehicle):
+    def update_vehicle(self, updated_vehicle, expected_version=None):
         """Update an existing vehicle (Road Vehicle)"""
-        df = self.load_vehicles()
-        
-        # Find and update the vehicle
-        vehicle_id = updated_vehicle['vehicle_id']
-        mask = df['vehicle_id'] == vehicle_id
-        
         # Update only the columns that exist in the updated_vehicle dictionary
-        for col in df.columns:
-            if col in updated_vehicle:
-                df.loc[mask, col] = updated_vehicle[col]
-        
-        # Save to CSV
-        df.to_csv(self.vehicles_file, index=False)
+        vehicle_id = updated_vehicle['vehicle_id']
+        self._write('update', 'vehicles', 'vehicle_id', vehicle_id, dict(updated_vehicle), expected_version=expected_version)
     
-    def update_machine(self, updated_machine):
+    def update_machine(self, updated_machine, expected_version=None):
         """Update an existing machine (Plant Vehicle)"""
-        df = self.load_machines()
-        
-        # Find and update the machine
-        machine_id = updated_machine['machine_id']
-        mask = df['machine_id'] == machine_id
-        
         # Update only the columns that exist in the updated_machine dictionary
-        for col in df.columns:
-            if col in updated_machine:
-                df.loc[mask, col] = updated_machine[col]
-        
-        # Save to CSV
-        df.to_csv(self.machines_file, index=False)
+        machine_id = updated_machine['machine_id']
+        self._write('update', 'machines', 'machine_id', machine_id, dict(updated_machine), expected_version=expected_version)
     
     def update_vehicle_mileage(self, vehicle_id, new_mileage):
         """Update vehicle mileage"""
-        df = self.load_vehicles()
-        df.loc[df['vehicle_id'] == vehicle_id, 'mileage'] = new_mileage
-        df.to_csv(self.vehicles_file, index=False)
+        self._write('update', 'vehicles', 'vehicle_id', vehicle_id, {'mileage': new_mileage})
     
     def update_machine_hours(self, machine_id, new_hours):
         """Update machine hours"""
-        df = self.load_machines()
-        df.loc[df['machine_id'] == machine_id, 'hours'] = new_hours
-        df.to_csv(self.machines_file, index=False)
+        self._write('update', 'machines', 'machine_id', machine_id, {'hours': new_hours})
     
     def delete_vehicle(self, vehicle_id):
-        """Delete a vehicle"""
-        df = self.load_vehicles()
-        df = df[df['vehicle_id'] != vehicle_id]
-        df.to_csv(self.vehicles_file, index=False)
-        
-        # Also delete associated maintenance records
-        maintenance_df = self.load_maintenance()
-        maintenance_df = maintenance_df[maintenance_df['vehicle_id'] != vehicle_id]
-        maintenance_df.to_csv(self.maintenance_file, index=False)
+        """Delete a vehicle with its maintenance records and service schedules"""
+        self.delete_records('vehicles', [vehicle_id])
     
     def delete_machine(self, machine_id):
-        """Delete a machine"""
-        df = self.load_machines()
-        df = df[df['machine_id'] != machine_id]
-        df.to_csv(self.machines_file, index=False)
-        
-        # Also delete associated maintenance records for machines
-        maintenance_df = self.load_maintenance()
-        maintenance_df = maintenance_df[maintenance_df['vehicle_id'] != machine_id]
-        maintenance_df.to_csv(self.maintenance_file, index=False)
+        """Delete a machine with its maintenance records and service schedules"""
+        self.delete_records('machines', [machine_id])
     
     def add_maintenance(self, maintenance_data):
         """Add a new maintenance record"""
-        df = self.load_maintenance()
-        
         # Generate unique maintenance ID
-        maintenance_data['maintenance_id'] = str(uuid.uuid4())[:8]
-        
-        # Convert to DataFrame and append
-        new_maintenance = pd.DataFrame([maintenance_data])
-        df = pd.concat([df, new_maintenance], ignore_index=True)
+        maintenance_data['maintenance_id'] = self._generate_ids('maintenance', 1)[0]
         
-        # Save to CSV
-        df.to_csv(self.maintenance_file, index=False)
+        # Insert the new row
+        self._write('insert', 'maintenance', pd.DataFrame([maintenance_data]))
         return maintenance_data['maintenance_id']
     
-    def update_maintenance(self, updated_maintenance):
+    def update_maintenance(self, updated_maintenance, expected_version=None):
         """Update an existing maintenance record"""
-        df = self.load_maintenance()
-        
-        # Find and update the maintenance record
         maintenance_id = updated_maintenance['maintenance_id']
-        df.loc[df['maintenance_id'] == maintenance_id, df.columns] = [updated_maintenance[col] for col in df.columns]
-        
-        # Save to CSV
-        df.to_csv(self.maintenance_file, index=False)
+        self._write('update', 'maintenance', 'maintenance_id', maintenance_id, dict(updated_maintenance), expected_version=expected_version)
     
     def delete_maintenance(self, maintenance_id):
         """Delete a maintenance record"""
-        df = self.load_maintenance()
-        df = df[df['maintenance_id'] != maintenance_id]
-        df.to_csv(self.maintenance_file, index=False)
+        self._write('delete', 'maintenance', 'maintenance_id', [maintenance_id])
+    
+    def import_table(self, table, import_df, row_offset=0, known_references=None):
+        """
+        Bulk import a DataFrame into a table.
+        The whole frame is validated and deduped at once, IDs are generated
+        in bulk and accepted rows are written in a single insert.
+        Returns an ImportReport with the outcome of every row.
+        """
+        if known_references is None:
+            known_references = self._known_references(table)
+        
+        # Dedupe against the table as it is when the rows are written
+        with self.storage.lock(table):
+            existing_df = self._load_table(table)
+            columns = TABLE_COLUMNS[table] + [col for col in existing_df.columns if col not in TABLE_COLUMNS[table]]
+            
+            rows, report = prepare_import(
+                table, import_df, existing_df, columns,
+                lambda count: self._generate_ids(table, count),
+                known_references=known_references,
+                row_offset=row_offset,
+                check=self._rental_import_clashes if table == 'rentals' else None
+            )
+            
+            # Write all accepted rows at once
+            if not rows.empty:
+                self._write('insert', table, rows)
+        return report
+    
+    def import_csv(self, table, source, chunksize=IMPORT_CHUNK_ROWS, progress=None, max_rejected=1000):
+        """
+        Stream a CSV file or upload into a table in fixed-size chunks.
+        Each chunk is validated and committed before the next is read, so
+        memory stays bounded however large the file is. `progress` is called
+        with (rows_read, fraction_done) after each chunk.
+        Returns an ImportReport with counts for every row and the first
+        `max_rejected` rejected rows.
+        """
+        report = ImportReport(table)
+        total_size = stream_size(source)
+        known_references = self._known_references(table)
+        rows_read = 0
+        
+        # Everything but numbers is read as text, so IDs like "00123" keep their zeros
+        types = COLUMN_TYPES.get(table, {})
+        dtype = {col: str for col in TABLE_COLUMNS[table] if types.get(col) not in ('int', 'float')}
+        
+        with pd.read_csv(source, chunksize=chunksize, dtype=dtype) as reader:
+            for chunk in reader:
+                chunk_report = self.import_table(
+                    table, chunk, row_offset=rows_read, known_references=known_references
+                )
+                report.extend(chunk_report, keep_accepted=False, max_rejected=max_rejected)
+                rows_read += len(chunk)
+                
+                if progress:
+                    position = stream_position(source, reader)
+                    fraction = min(position / total_size, 1.0) if position and total_size else 0.0
+                    progress(rows_read, fraction)
+        
+        if progress:
+            progress(rows_read, 1.0)
+        return report
+    
+    def bulk_update(self, table, updates, column=None, match_on=None, allowed=None):
+        """
+        Update many records of a table in one write.
+        `updates` is a DataFrame with an identifying column and the columns
+        to set, or (id, value) pairs (or a dict) for `column`. Records are
+        matched on the table's ID column, or on `match_on` such as 'whites_id'
+        or 'license_plate' ignoring case and spaces. `allowed` maps columns
+        to their permitted values, and meter readings can't go below the
+        current reading. Returns an ImportReport with the outcome of every row.
+        """
+        primary_key = PRIMARY_KEYS[table]
+        match_on = match_on or primary_key
+        if not isinstance(updates, pd.DataFrame):
+            pairs = updates.items() if isinstance(updates, dict) else updates
+            updates = pd.DataFrame(list(pairs), columns=[match_on, column])
+        
+        # Check readings against the table as it is when the rows are written
+        with self.storage.lock(table):
+            existing_df = self._load_table(table)
+            rows, report = prepare_bulk_update(table, updates, existing_df, primary_key, match_on, allowed)
+            
+            # Later rows for the same record win
+            rows = rows.drop_duplicates(primary_key, keep='last')
+            if not rows.empty:
+                self._write('update_many', table, primary_key, rows)
+        return report
+    
+    def bulk_update_vehicle_mileage(self, readings, match_on=None):
+        """Update the mileage of many vehicles from (vehicle, mileage) pairs or a DataFrame"""
+        return self.bulk_update('vehicles', readings, 'mileage', match_on)
+    
+    def bulk_update_machine_hours(self, readings, match_on=None):
+        """Update the hours of many machines from (machine, hours) pairs or a DataFrame"""
+        return self.bulk_update('machines', readings, 'hours', match_on)
+    
+    def bulk_update_status(self, table, statuses, match_on=None, allowed=None):
+        """Update the status of many records from (record, status) pairs or a DataFrame"""
+        return self.bulk_update(table, statuses, 'status', match_on, {'status': allowed} if allowed else None)
+    
+    def _generate_ids(self, table, count):
+        """Generate `count` new IDs for a table, checked against every ID in use"""
+        return ID_INDEX.allocate(self, table, count)
+    
+    def _known_references(self, table):
+        """IDs that imported rows of a table may refer to"""
+        if table == 'maintenance':
+            # Maintenance records are kept for both vehicles and machines
+            return set(self.load_vehicles()['vehicle_id'].astype(str)) | set(self.load_machines()['machine_id'].astype(str))
+        if table == 'rentals':
+            return set(self.load_equipment()['equipment_id'].astype(str))
+        return None
     
     def import_vehicles(self, import_df):
         """Import vehicles from DataFrame"""
-        existing_df = self.load_vehicles()
-        
-        success_count = 0
-        for _, row in import_df.iterrows():
-            try:
-                # Check if VIN already exists
-                if not existing_df.empty and row['vin'] in existing_df['vin'].values:
-                    continue
-                
-                # Generate unique vehicle ID
-                vehicle_data = row.to_dict()
-                vehicle_data['vehicle_id'] = str(uuid.uuid4())[:8]
-                
-                # Add to existing DataFrame
-                new_vehicle = pd.DataFrame([vehicle_data])
-                existing_df = pd.concat([existing_df, new_vehicle], ignore_index=True)
-                success_count += 1
-                
-            except Exception as e:
-                print(f"Error importing vehicle: {e}")
-                continue
-        
-        # Save updated DataFrame
-        existing_df.to_csv(self.vehicles_file, index=False)
-        return success_count
+        return self.import_table('vehicles', import_df)
+    
+    def import_machines(self, import_df):
+        """Import machines from DataFrame"""
+        return self.import_table('machines', import_df)
     
     def import_maintenance(self, import_df):
         """Import maintenance records from DataFrame"""
-        existing_df = self.load_maintenance()
-        
-        success_count = 0
-        for _, row in import_df.iterrows():
-            try:
-                # Generate unique maintenance ID
-                maintenance_data = row.to_dict()
-                maintenance_data['maintenance_id'] = str(uuid.uuid4())[:8]
-                
-                # Add to existing DataFrame
-                new_maintenance = pd.DataFrame([maintenance_data])
-                existing_df = pd.concat([existing_df, new_maintenance], ignore_index=True)
-                success_count += 1
-                
-            except Exception as e:
-                print(f"Error importing maintenance record: {e}")
-                continue
-        
-        # Save updated DataFrame
-        existing_df.to_csv(self.maintenance_file, index=False)
-        return success_count
+        return self.import_table('maintenance', import_df)
     
     def get_vehicle_maintenance_history(self, vehicle_id):
-        """Get maintenance history for a specific vehicle"""
-        maintenance_df = self.load_maintenance()
-        return maintenance_df[maintenance_df['vehicle_id'] == vehicle_id].sort_values('date', ascending=False)
+        """Get maintenance history for a specific vehicle, newest first"""
+        return HISTORY_INDEX.history(self, 'maintenance', vehicle_id)
+    
+    def get_maintenance_due(self, due_soon_miles=1000):
+        """
+        Latest mileage schedule per vehicle and maintenance type, split into
+        (overdue, due_soon, upcoming) DataFrames sorted by miles until due
+        """
+        return MAINTENANCE_DUE_INDEX.due(self, due_soon_miles)
+    
+    # Service schedule methods
+    def load_service_schedules(self):
+        """Load recurring service schedules"""
+        return self._load_table('service_schedules')
+    
+    def add_service_schedule(self, schedule_data):
+        """Add a recurring service schedule for a vehicle or machine"""
+        # Generate unique schedule ID
+        schedule_data['schedule_id'] = self._generate_ids('service_schedules', 1)[0]
+        
+        # Insert the new row
+        self._write('insert', 'service_schedules', pd.DataFrame([schedule_data]))
+        return schedule_data['schedule_id']
+    
+    def update_service_schedule(self, updated_schedule, expected_version=None):
+        """Update an existing service schedule"""
+        schedule_id = updated_schedule['schedule_id']
+        self._write('update', 'service_schedules', 'schedule_id', schedule_id, dict(updated_schedule), expected_version=expected_version)
+    
+    def delete_service_schedule(self, schedule_id):
+        """Delete a service schedule"""
+        self._write('delete', 'service_schedules', 'schedule_id', [schedule_id])
+    
+    def complete_service(self, schedule_id, done_date=None):
+        """Mark a scheduled service done today, restarting its intervals from the asset's current readings"""
+        schedule = SERVICE_SCHEDULE_INDEX.schedule(self, schedule_id)
+        if schedule is None:
+            return
+        
+        values = {'last_done_date': (done_date or date.today()).strftime('%Y-%m-%d')}
+        if schedule['asset_type'] == 'machine':
+            machines_df = self.load_machines()
+            asset = machines_df[machines_df['machine_id'].astype(str) == str(schedule['asset_id'])]
+            if not asset.empty:
+                values['last_done_hours'] = asset.iloc[0]['hours']
+        else:
+            vehicles_df = self.load_vehicles()
+            asset = vehicles_df[vehicles_df['vehicle_id'].astype(str) == str(schedule['asset_id'])]
+            if not asset.empty:
+                values['last_done_mileage'] = asset.iloc[0]['mileage']
+        
+        self._write('update', 'service_schedules', 'schedule_id', schedule_id, values)
+    
+    def get_services_due(self, days=None, miles=None, hours=None):
+        """
+        Scheduled services due within `days` days, `miles` miles or `hours`
+        engine hours (whichever are given), overdue first
+        """
+        return SERVICE_SCHEDULE_INDEX.due(self, days, miles, hours)
+    
+    def get_monthly_maintenance_costs(self, by=None, include_undated=False):
+        """
+        Maintenance cost and record count per month, optionally per 'type' or
+        'vehicle_id' too. Undated records have a month of None and are left
+        out unless include_undated is set
+        """
+        return ROLLUP_INDEX.monthly(self, 'maintenance', by, include_undated)
     
     def get_maintenance_cost_summary(self, start_date=None, end_date=None):
         """Get maintenance cost summary for a date range"""
+        if not (start_date and end_date):
+            # All-time figures come straight from the monthly rollup
+            by_type = self.get_monthly_maintenance_costs(by='type', include_undated=True)
+            priced_count = by_type['priced_count'].sum()
+            return {
+                'total_cost': by_type['cost'].sum(),
+                'average_cost': by_type['cost'].sum() / priced_count if priced_count else float('nan'),
+                'record_count': int(by_type['count'].sum()),
+                'cost_by_type': by_type.groupby('type')['cost'].sum().to_dict()
+            }
+        
         maintenance_df = self.load_maintenance()
         
         if start_date and end_date:
-            maintenance_df['date'] = pd.to_datetime(maintenance_df['date'])
             maintenance_df = maintenance_df[
                 (maintenance_df['date'] >= pd.to_datetime(start_date)) &
                 (maintenance_df['date'] <= pd.to_datetime(end_date))
@@ -300,174 +501,139 @@ class DataManager:
             'total_cost': maintenance_df['cost'].sum(),
             'average_cost': maintenance_df['cost'].mean(),
             'record_count': len(maintenance_df),
-            'cost_by_type': maintenance_df.groupby('type')['cost'].sum().to_dict()
+            'cost_by_type': maintenance_df.groupby('type', observed=True)['cost'].sum().to_dict()
         }
     
     # Equipment management methods
     def load_equipment(self):
         """Load equipment from CSV"""
-        try:
-            df = pd.read_csv(self.equipment_file)
-            return df
-        except (FileNotFoundError, pd.errors.EmptyDataError):
-            return pd.DataFrame(columns=[
-                'equipment_id', 'name', 'category', 'daily_rate', 'status', 'whites_id', 'brand', 'model', 
-                'serial_number', 'weekly_rate', 'purchase_price', 'purchase_date', 
-                'last_service_date', 'description', 'notes'
-            ])
+        return self._load_table('equipment')
     
     def add_equipment(self, equipment_data):
         """Add a new piece of equipment"""
-        df = self.load_equipment()
-        
         # Generate unique equipment ID
-        equipment_data['equipment_id'] = str(uuid.uuid4())[:8]
-        
-        # Convert to DataFrame and append
-        new_equipment = pd.DataFrame([equipment_data])
-        df = pd.concat([df, new_equipment], ignore_index=True)
+        equipment_data['equipment_id'] = self._generate_ids('equipment', 1)[0]
         
-        # Save to CSV
-        df.to_csv(self.equipment_file, index=False)
+        # Insert the new row
+        self._write('insert', 'equipment', pd.DataFrame([equipment_data]))
         return equipment_data['equipment_id']
     
-    def update_equipment(self, updated_equipment):
+    def update_equipment(self, updated_equipment, expected_version=None):
         """Update an existing piece of equipment"""
-        df = self.load_equipment()
-        
-        # Find and update the equipment
         equipment_id = updated_equipment['equipment_id']
-        df.loc[df['equipment_id'] == equipment_id, df.columns] = [updated_equipment[col] for col in df.columns]
-        
-        # Save to CSV
-        df.to_csv(self.equipment_file, index=False)
+        self._write('update', 'equipment', 'equipment_id', equipment_id, dict(updated_equipment), expected_version=expected_version)
     
     def update_equipment_status(self, equipment_id, new_status):
         """Update equipment status"""
-        df = self.load_equipment()
-        df.loc[df['equipment_id'] == equipment_id, 'status'] = new_status
-        df.to_csv(self.equipment_file, index=False)
+        self._write('update', 'equipment', 'equipment_id', equipment_id, {'status': new_status})
     
     def delete_equipment(self, equipment_id):
-        """Delete equipment"""
-        df = self.load_equipment()
-        df = df[df['equipment_id'] != equipment_id]
-        df.to_csv(self.equipment_file, index=False)
-        
-        # Also delete associated rental records
-        rentals_df = self.load_rentals()
-        rentals_df = rentals_df[rentals_df['equipment_id'] != equipment_id]
-        rentals_df.to_csv(self.rentals_file, index=False)
+        """Delete equipment with its rental records"""
+        self.delete_records('equipment', [equipment_id])
     
     def import_equipment(self, import_df):
         """Import equipment from DataFrame"""
-        existing_df = self.load_equipment()
-        
-        success_count = 0
-        for _, row in import_df.iterrows():
-            try:
-                # Generate unique equipment ID
-                equipment_data = row.to_dict()
-                equipment_data['equipment_id'] = str(uuid.uuid4())[:8]
-                
-                # Add to existing DataFrame
-                new_equipment = pd.DataFrame([equipment_data])
-                existing_df = pd.concat([existing_df, new_equipment], ignore_index=True)
-                success_count += 1
-                
-            except Exception as e:
-                print(f"Error importing equipment: {e}")
-                continue
-        
-        # Save updated DataFrame
-        existing_df.to_csv(self.equipment_file, index=False)
-        return success_count
+        return self.import_table('equipment', import_df)
     
     # Rental management methods
     def load_rentals(self):
         """Load rentals from CSV"""
-        try:
-            df = pd.read_csv(self.rentals_file)
-            return df
-        except (FileNotFoundError, pd.errors.EmptyDataError):
-            return pd.DataFrame(columns=[
-                'rental_id', 'equipment_id', 'customer_name', 'customer_phone', 'customer_email',
-                'start_date', 'expected_return_date', 'actual_return_date', 'rental_rate', 
-                'deposit', 'additional_charges', 'status', 'return_condition', 'damage_notes', 'notes'
-            ])
+        return self._load_table('rentals')
     
     def add_rental(self, rental_data):
-        """Add a new rental record"""
-        df = self.load_rentals()
-        
-        # Generate unique rental ID
-        rental_data['rental_id'] = str(uuid.uuid4())[:8]
-        
-        # Convert to DataFrame and append
-        new_rental = pd.DataFrame([rental_data])
-        df = pd.concat([df, new_rental], ignore_index=True)
-        
-        # Save to CSV
-        df.to_csv(self.rentals_file, index=False)
+        """Add a new rental record; raises ValueError if the equipment is already booked for those dates"""
+        # Hold the rentals lock from the check to the insert so two sessions can't both book the same dates
+        with self.storage.lock('rentals'):
+            # Refuse double bookings
+            conflicts = self.get_rental_conflicts(
+                rental_data['equipment_id'], rental_data['start_date'],
+                rental_data.get('expected_return_date') or rental_data['start_date']
+            )
+            if conflicts:
+                raise ValueError(f"Equipment is already booked for those dates (rental {', '.join(conflicts)})")
+            
+            # Generate unique rental ID
+            rental_data['rental_id'] = self._generate_ids('rentals', 1)[0]
+            
+            # Insert the new row
+            self._write('insert', 'rentals', pd.DataFrame([rental_data]))
         return rental_data['rental_id']
     
-    def update_rental(self, updated_rental):
+    def update_rental(self, updated_rental, expected_version=None):
         """Update an existing rental record"""
-        df = self.load_rentals()
-        
-        # Find and update the rental record
         rental_id = updated_rental['rental_id']
-        df.loc[df['rental_id'] == rental_id, df.columns] = [updated_rental[col] for col in df.columns]
-        
-        # Save to CSV
-        df.to_csv(self.rentals_file, index=False)
+        self._write('update', 'rentals', 'rental_id', rental_id, dict(updated_rental), expected_version=expected_version)
     
-    def return_rental(self, rental_id, return_data):
+    def return_rental(self, rental_id, return_data, expected_version=None):
         """Process equipment return"""
-        df = self.load_rentals()
-        
         # Update rental with return information
-        for key, value in return_data.items():
-            df.loc[df['rental_id'] == rental_id, key] = value
-        
-        # Save to CSV
-        df.to_csv(self.rentals_file, index=False)
+        self._write('update', 'rentals', 'rental_id', rental_id, dict(return_data), expected_version=expected_version)
     
     def import_rentals(self, import_df):
         """Import rentals from DataFrame"""
-        existing_df = self.load_rentals()
-        
-        success_count = 0
-        for _, row in import_df.iterrows():
-            try:
-                # Generate unique rental ID
-                rental_data = row.to_dict()
-                rental_data['rental_id'] = str(uuid.uuid4())[:8]
-                
-                # Add to existing DataFrame
-                new_rental = pd.DataFrame([rental_data])
-                existing_df = pd.concat([existing_df, new_rental], ignore_index=True)
-                success_count += 1
-                
-            except Exception as e:
-                print(f"Error importing rental: {e}")
-                continue
+        return self.import_table('rentals', import_df)
+    
+    def get_active_rentals(self):
+        """
+        Active rentals joined to their equipment, most overdue first, with
+        days_overdue, overdue_bucket and status_label columns
+        """
+        return ACTIVE_RENTALS_VIEW.view(self)
+    
+    def get_overdue_bucket_counts(self, active_rentals=None):
+        """Number of active rentals in each overdue bucket, from get_active_rentals() if not given"""
+        return ACTIVE_RENTALS_VIEW.bucket_counts(self, active_rentals)
+    
+    def get_rental_conflicts(self, equipment_id, start_date, end_date, exclude_rental_id=None):
+        """IDs of rentals that have equipment_id booked at any point from start_date to end_date"""
+        return AVAILABILITY_INDEX.conflicts(self, equipment_id, start_date, end_date, exclude_rental_id)
+    
+    def _rental_import_clashes(self, rentals_df, candidates):
+        """Why each candidate row of a rentals import can't be booked, '' if it can"""
+        return AVAILABILITY_INDEX.import_clashes(self, rentals_df, candidates)
+    
+    def is_equipment_available(self, equipment_id, start_date, end_date):
+        """Whether equipment_id is free to hire for the whole date range"""
+        return not self.get_rental_conflicts(equipment_id, start_date, end_date)
+    
+    def find_available_equipment(self, start_date, end_date, category=None):
+        """Equipment in hireable condition with no bookings between the two dates"""
+        equipment_df = self.load_equipment()
+        equipment_df = equipment_df[~equipment_df['status'].isin(UNAVAILABLE_STATUSES)]
+        if category:
+            equipment_df = equipment_df[equipment_df['category'] == category]
         
-        # Save updated DataFrame
-        existing_df.to_csv(self.rentals_file, index=False)
-        return success_count
+        free_ids = AVAILABILITY_INDEX.free(self, equipment_df['equipment_id'].astype(str), start_date, end_date)
+        return equipment_df[equipment_df['equipment_id'].astype(str).isin(free_ids)]
     
     def get_equipment_rental_history(self, equipment_id):
-        """Get rental history for a specific piece of equipment"""
-        rentals_df = self.load_rentals()
-        return rentals_df[rentals_df['equipment_id'] == equipment_id].sort_values('start_date', ascending=False)
+        """Get rental history for a specific piece of equipment, newest first"""
+        return HISTORY_INDEX.history(self, 'rentals', equipment_id)
+    
+    def get_monthly_rental_revenue(self, by=None, include_undated=False):
+        """
+        Rental revenue and rental count per month of start date, optionally
+        per 'equipment_id' too. Undated rentals have a month of None and are
+        left out unless include_undated is set
+        """
+        return ROLLUP_INDEX.monthly(self, 'rentals', by, include_undated)
     
     def get_rental_revenue_summary(self, start_date=None, end_date=None):
         """Get rental revenue summary for a date range"""
+        if not (start_date and end_date):
+            # All-time figures come straight from the monthly rollup
+            by_equipment = self.get_monthly_rental_revenue(by='equipment_id', include_undated=True)
+            priced_count = by_equipment['priced_count'].sum()
+            return {
+                'total_revenue': by_equipment['rental_rate'].sum(),
+                'average_rental': by_equipment['rental_rate'].sum() / priced_count if priced_count else float('nan'),
+                'rental_count': int(by_equipment['count'].sum()),
+                'revenue_by_equipment': by_equipment.groupby('equipment_id')['rental_rate'].sum().to_dict()
+            }
+        
         rentals_df = self.load_rentals()
         
         if start_date and end_date:
-            rentals_df['start_date'] = pd.to_datetime(rentals_df['start_date'])
             rentals_df = rentals_df[
                 (rentals_df['start_date'] >= pd.to_datetime(start_date)) &
                 (rentals_df['start_date'] <= pd.to_datetime(end_date))
@@ -0,0 +1,198 @@
+import glob
+import io
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# Sheets in each export, mapped to the table they are read from
+EXPORTS = {
+    'vehicles': {'Vehicles': 'vehicles'},
+    'machines': {'Machines': 'machines'},
+    'maintenance': {'Maintenance': 'maintenance'},
+    'equipment': {'Equipment': 'equipment'},
+    'all_data': {
+        'Vehicles': 'vehicles',
+        'Machines': 'machines',
+        'Maintenance': 'maintenance',
+        'Equipment': 'equipment',
+    },
+}
+
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def create_excel_export(dataframes, filename=None, progress=None):
+    """
+    Create an Excel workbook with one sheet per non-empty DataFrame.
+    Writes to `filename` if given, otherwise returns the workbook bytes.
+    `progress` is called with the fraction of sheets written so far.
+    """
+    output = filename or io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        for i, (sheet_name, df) in enumerate(dataframes.items()):
+            if not df.empty:
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+            if progress:
+                progress((i + 1) / len(dataframes))
+
+    return None if filename else output.getvalue()
+
+
+class ExportJob:
+    """A single export build, shared by every request for the same data"""
+
+    def __init__(self, name, versions, path):
+        self.job_id = uuid.uuid4().hex[:8]
+        self.name = name
+        self.versions = versions
+        self.path = path
+        self.status = 'queued'
+        self.progress = 0.0
+        self.error = None
+        self.future = None
+        self.data = None
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def wait(self):
+        """Block until the job has finished"""
+        if self.future is not None:
+            self.future.result()
+        return self
+
+    def read(self):
+        """Workbook bytes, once the job is done (read from disk once, when it finished)"""
+        if self.status != 'done':
+            return None
+        return self.data
+
+    def __repr__(self):
+        return f"<ExportJob {self.name} {self.status} {self.progress:.0%}>"
+
+
+class ExportQueue:
+    """
+    Process-wide queue of Excel exports built on background worker threads.
+    Jobs are keyed on the export name and the versions of the tables it
+    reads, so repeat requests for the same data share one job and its
+    workbook is only rebuilt after one of those tables has been written to.
+    Finished workbooks are stored under `<data_dir>/exports/`, named with
+    an owner tag for this queue so processes sharing the directory only
+    ever delete their own files.
+    """
+
+    max_workers = 2
+
+    # Workbooks older than this were left by a process that has gone away
+    stale_after = 24 * 60 * 60
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._export_dirs = set()
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    @staticmethod
+    def versions(data_manager, name):
+        """Current versions of the tables an export reads"""
+        return tuple(data_manager.table_version(table) for table in EXPORTS[name].values())
+
+    def _export_dir(self, data_manager):
+        export_dir = os.path.join(data_manager.storage.data_dir, 'exports')
+        if export_dir not in self._export_dirs:
+            # Other processes may still be serving their workbooks, so only
+            # clear out ones old enough to have been orphaned
+            os.makedirs(export_dir, exist_ok=True)
+            cutoff = time.time() - self.stale_after
+            for path in glob.glob(os.path.join(export_dir, '*.xlsx')):
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._export_dirs.add(export_dir)
+        return export_dir
+
+    def job(self, data_manager, name):
+        """Return the job for the current data, or None if none was requested"""
+        job = self._jobs.get((data_manager.storage.cache_key, name))
+        if job is not None and job.versions == self.versions(data_manager, name):
+            return job
+        return None
+
+    def submit(self, data_manager, name, rebuild=False):
+        """
+        Queue an export, or return the job already building the same data.
+        `rebuild` queues a new job even if one for the same data finished.
+        """
+        key = (data_manager.storage.cache_key, name)
+        versions = self.versions(data_manager, name)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.versions == versions and job.status != 'failed':
+                if not (rebuild and job.finished):
+                    return job
+
+            path = os.path.join(self._export_dir(data_manager), f"{name}_{self.owner}_{uuid.uuid4().hex[:8]}.xlsx")
+            new_job = ExportJob(name, versions, path)
+            self._jobs[key] = new_job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='export')
+            new_job.future = self._executor.submit(self._run, new_job, data_manager)
+
+            # This queue's workbooks for superseded snapshots are no longer reachable
+            live = {current.path for current in self._jobs.values()}
+            for path in glob.glob(os.path.join(self._export_dir(data_manager), f"*_{self.owner}_*.xlsx")):
+                if path not in live and not path.endswith('.partial.xlsx'):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+        return new_job
+
+    def _run(self, job, data_manager):
+        job.status = 'running'
+        temp_path = job.path[:-len('.xlsx')] + '.partial.xlsx'
+        try:
+            dataframes = {
+                sheet: getattr(data_manager, f"load_{table}")()
+                for sheet, table in EXPORTS[job.name].items()
+            }
+
+            def update_progress(fraction):
+                job.progress = fraction
+
+            create_excel_export(dataframes, temp_path, progress=update_progress)
+            os.replace(temp_path, job.path)
+            # Kept in memory so reruns showing the download don't reread the file
+            with open(job.path, 'rb') as f:
+                job.data = f.read()
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get(self, data_manager, name):
+        """Return the built export if it is ready and current, without building it"""
+        job = self.job(data_manager, name)
+        return job.read() if job is not None else None
+
+    def build(self, data_manager, name):
+        """Return the export, waiting for a build if its tables changed"""
+        job = self.submit(data_manager, name).wait()
+        if job.status == 'failed':
+            raise RuntimeError(f"Export '{name}' failed: {job.error}")
+        return job.read()
+
+
+# Shared by every session in the process
+EXPORT_QUEUE = ExportQueue()
@@ -0,0 +1,128 @@
+import pandas as pd
+
+from utils.table_index import SortedIndex, TableIndex, register_index
+
+# For each history table: (row ID column, asset column, date column)
+HISTORY_TABLES = {
+    'maintenance': ('maintenance_id', 'vehicle_id', 'date'),
+    'rentals': ('rental_id', 'equipment_id', 'start_date'),
+}
+
+
+def _value(value):
+    """A stored value as a fresh load would give it; blank text is missing"""
+    if isinstance(value, str) and not value.strip():
+        return None
+    return value
+
+
+def _sort_key(value):
+    """Newest first; rows without a date go last"""
+    date = pd.to_datetime(value, errors='coerce')
+    return float('inf') if pd.isna(date) else -date.value
+
+
+class AssetHistory:
+    """
+    Rows of one table grouped by the asset they belong to, each group kept
+    sorted newest first, so one asset's history is found without scanning
+    the table.
+    """
+
+    def __init__(self, row_key, asset_key, date_key, columns):
+        self.row_key = row_key
+        self.asset_key = asset_key
+        self.date_key = date_key
+        self.columns = list(columns)
+        self.rows = {}
+        self.assets = {}
+
+    def add(self, record, sort_key=None):
+        """Store a row, replacing any earlier version of it"""
+        if sort_key is None:
+            sort_key = _sort_key(record.get(self.date_key))
+        row_id = str(record.get(self.row_key))
+        self.remove(row_id)
+        self.rows[row_id] = record
+        asset_id = str(record.get(self.asset_key))
+        self.assets.setdefault(asset_id, SortedIndex()).set(row_id, sort_key)
+
+    def remove(self, row_id):
+        record = self.rows.pop(row_id, None)
+        if record is None:
+            return
+        asset_id = str(record.get(self.asset_key))
+        order = self.assets.get(asset_id)
+        if order is not None:
+            order.remove(row_id)
+            if not len(order):
+                del self.assets[asset_id]
+
+    def remove_asset(self, asset_id):
+        for _, row_id in self.assets.pop(asset_id, SortedIndex()).between():
+            self.rows.pop(row_id, None)
+
+    def records(self, asset_id):
+        """One asset's rows, newest first"""
+        order = self.assets.get(str(asset_id))
+        if order is None:
+            return []
+        return [self.rows[row_id] for _, row_id in order.between()]
+
+
+class HistoryIndex(TableIndex):
+    """
+    Per-asset maintenance and rental histories: maintenance rows by
+    vehicle_id and rentals by equipment_id, pre-sorted by date. Writes
+    move only the rows they touch, so a history costs O(k log n) for k
+    rows instead of a mask over the whole table.
+    """
+
+    tables = tuple(HISTORY_TABLES)
+
+    def build(self, name, df):
+        state = AssetHistory(*HISTORY_TABLES[name], df.columns)
+        dates = pd.to_datetime(df[state.date_key], errors='coerce')
+        sort_keys = (-dates.astype('int64')).astype('float64').where(dates.notna(), float('inf'))
+        for record, sort_key in zip(df.to_dict('records'), sort_keys):
+            state.add(record, sort_key)
+        return state
+
+    def insert(self, state, table, rows):
+        for record in rows.to_dict('records'):
+            state.add({col: _value(value) for col, value in record.items()})
+        return True
+
+    def update(self, state, table, key, key_value, values):
+        if key != state.row_key:
+            return False
+        record = state.rows.get(str(key_value))
+        if record is None:
+            # Nothing stored matches, so the update changed nothing
+            return True
+        # Like storage, only columns the table has are updated
+        state.add({**record, **{col: _value(value) for col, value in values.items() if col in state.columns}})
+        return True
+
+    def delete(self, state, table, column, values):
+        if column == state.row_key:
+            for value in values:
+                state.remove(str(value))
+            return True
+        if column == state.asset_key:
+            for value in values:
+                state.remove_asset(str(value))
+            return True
+        return False
+
+    def history(self, data_manager, table, asset_id):
+        """Rows of a history table for one asset, newest first, typed like a load"""
+        with self._lock:
+            state = self.get(data_manager, table)
+            records = state.records(asset_id)
+            columns = list(state.columns)
+        return data_manager.storage.conform(table, pd.DataFrame(records, columns=columns))
+
+
+# Shared by every DataManager in the process
+HISTORY_INDEX = register_index(HistoryIndex())
@@ -0,0 +1,111 @@
+import secrets
+import threading
+import time
+
+from utils.table_index import TableIndex, register_index
+
+# Crockford base32: no I, L, O or U, so IDs can't be misread or spell words
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+# 12 characters hold 60 bits: milliseconds since 1970 then a 16-bit counter
+ID_LENGTH = 12
+COUNTER_BITS = 16
+
+# Primary key column of each table that gets generated IDs
+ID_COLUMNS = {
+    'vehicles': 'vehicle_id',
+    'machines': 'machine_id',
+    'maintenance': 'maintenance_id',
+    'equipment': 'equipment_id',
+    'rentals': 'rental_id',
+    'service_schedules': 'schedule_id',
+}
+
+
+def encode(number, width=ID_LENGTH):
+    """Write a number as fixed-width Crockford base32"""
+    chars = []
+    for _ in range(width):
+        number, digit = divmod(number, 32)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+class IdGenerator:
+    """
+    Fixed-width IDs that sort in the order they were made. Each holds the
+    time in milliseconds and a counter that starts at a random point every
+    millisecond and counts up within it, so IDs from one process never
+    repeat and IDs from different processes rarely meet.
+    """
+
+    def __init__(self):
+        self._last_ms = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._counter = secrets.randbelow(1 << (COUNTER_BITS - 1))
+            else:
+                # Same millisecond, or the clock went back: keep counting up
+                self._counter += 1
+                if self._counter >> COUNTER_BITS:
+                    self._last_ms += 1
+                    self._counter = secrets.randbelow(1 << (COUNTER_BITS - 1))
+            return encode((self._last_ms << COUNTER_BITS) | self._counter)
+
+
+class IdIndex(TableIndex):
+    """
+    Set of the IDs in use in each table, kept up to date on every write so
+    new IDs are checked for collisions with a hash lookup instead of a scan.
+    Deleted IDs stay in the set until the next rebuild, so they aren't
+    handed out again straight away.
+    """
+
+    tables = tuple(ID_COLUMNS)
+
+    def __init__(self):
+        super().__init__()
+        self.generator = IdGenerator()
+
+    def build(self, name, df):
+        return set(df[ID_COLUMNS[name]].dropna().astype(str))
+
+    def insert(self, state, table, rows):
+        key = ID_COLUMNS[table]
+        if key in rows.columns:
+            state.update(rows[key].dropna().astype(str))
+        return True
+
+    def update(self, state, table, key, key_value, values):
+        # Changing a record's ID isn't something the app does; rebuild if it happens
+        id_column = ID_COLUMNS[table]
+        return id_column not in values or str(values[id_column]) == str(key_value)
+
+    def delete(self, state, table, column, values):
+        return True
+
+    def allocate(self, data_manager, table, count=1):
+        """
+        `count` new IDs for a table, none of them in use. They are reserved
+        straight away, so sessions adding records at the same time never get
+        the same ID.
+        """
+        with self._lock:
+            used = self.get(data_manager, table)
+            ids = []
+            while len(ids) < count:
+                new_id = self.generator.next()
+                if new_id not in used:
+                    used.add(new_id)
+                    ids.append(new_id)
+            return ids
+
+
+# Shared by every DataManager in the process
+ID_INDEX = register_index(IdIndex())
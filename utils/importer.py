@@ -0,0 +1,288 @@
+import os
+
+import pandas as pd
+
+from utils.validators import (
+    validate_vehicle_frame, validate_machine_frame, validate_maintenance_frame,
+    validate_equipment_frame, validate_rental_frame,
+    blank_rows, collect_errors, column_numbers, optional_number_checks
+)
+
+# Row validator for each table
+IMPORT_VALIDATORS = {
+    'vehicles': validate_vehicle_frame,
+    'machines': validate_machine_frame,
+    'maintenance': validate_maintenance_frame,
+    'equipment': validate_equipment_frame,
+    'rentals': validate_rental_frame,
+}
+
+# Column groups that identify a record; a row matching an existing record
+# (or an earlier row in the same import) on any group is skipped
+DEDUPE_KEYS = {
+    'vehicles': [['vin_chassis'], ['whites_id']],
+    'machines': [['vin_chassis'], ['whites_id']],
+    'maintenance': [['vehicle_id', 'date', 'type', 'cost', 'mileage']],
+    'equipment': [['whites_id'], ['serial_number']],
+    'rentals': [['equipment_id', 'customer_name', 'start_date']],
+}
+
+# Columns that must point at an existing record
+REFERENCE_COLUMNS = {
+    'maintenance': 'vehicle_id',
+    'rentals': 'equipment_id',
+}
+
+# Meter readings that bulk updates may only move forwards
+METER_COLUMNS = {
+    'vehicles': 'mileage',
+    'machines': 'hours',
+}
+
+
+class ImportReport:
+    """
+    Per-row outcome of a bulk import.
+    `results` has one row per imported row with its row number, status
+    ('accepted' or 'rejected'), the ID it was given and the rejection reason.
+    """
+
+    columns = ['row', 'status', 'id', 'reason']
+
+    def __init__(self, table, results=None):
+        self.table = table
+        self.results = results if results is not None else pd.DataFrame(columns=self.columns)
+        self.accepted_count = int((self.results['status'] == 'accepted').sum())
+        self.rejected_count = int((self.results['status'] == 'rejected').sum())
+
+    @property
+    def accepted(self):
+        return self.results[self.results['status'] == 'accepted']
+
+    @property
+    def rejected(self):
+        return self.results[self.results['status'] == 'rejected']
+
+    def extend(self, other, keep_accepted=True, max_rejected=None):
+        """
+        Add the results of another chunk of the same import.
+        Streaming imports drop accepted rows and cap the rejected rows
+        kept so the report stays small; the counts still cover every row.
+        """
+        self.accepted_count += other.accepted_count
+        self.rejected_count += other.rejected_count
+        new_results = other.results if keep_accepted else other.rejected
+        if max_rejected is not None:
+            room = max(max_rejected - len(self.rejected), 0)
+            rejected = new_results['status'] == 'rejected'
+            new_results = new_results[~rejected | (rejected.cumsum() <= room)]
+        if not new_results.empty:
+            self.results = new_results if self.results.empty else pd.concat([self.results, new_results], ignore_index=True)
+
+    def __len__(self):
+        return self.accepted_count + self.rejected_count
+
+    def __repr__(self):
+        return f"<ImportReport {self.table}: {self.accepted_count} accepted, {self.rejected_count} rejected>"
+
+
+def _key_part(series):
+    """Normalise a column so equal values compare equal across files"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime('%Y-%m-%d')
+    numbers = pd.to_numeric(series, errors='coerce')
+    text = series.astype(str).str.strip().str.upper()
+    text = text.where(series.notna() & (text != ''))
+    return text.where(numbers.isna(), numbers.astype('float64').astype(str))
+
+
+def _record_keys(df, columns):
+    """One combined key per row, or NaN if any key column is empty"""
+    if not all(col in df.columns for col in columns):
+        return pd.Series(pd.NA, index=df.index, dtype=object)
+    parts = [_key_part(df[col]) for col in columns]
+    keys = parts[0]
+    for part in parts[1:]:
+        keys = keys + '|' + part
+    return keys
+
+
+def _id_text(series):
+    """
+    IDs as the tables store them, as text. read_csv turns an ID like "123"
+    into a number, or 123.0 next to blanks; those are written back without
+    the decimal point.
+    """
+    if not pd.api.types.is_numeric_dtype(series):
+        return series.where(series.isna(), series.astype(str).str.strip())
+    return series.map(
+        lambda value: None if pd.isna(value) else str(int(value)) if float(value).is_integer() else str(value)
+    ).astype(object)
+
+
+def _restore_zeros(series, known_ids):
+    """Match IDs read as numbers back to the one known zero-padded ID each could be"""
+    candidates = {}
+    for known_id in known_ids:
+        if known_id.isdigit():
+            candidates.setdefault(known_id.lstrip('0') or '0', []).append(known_id)
+    lookup = {value: ids[0] for value, ids in candidates.items() if len(ids) == 1}
+    return series.map(lambda value: lookup.get(value, value) if isinstance(value, str) else value)
+
+
+def prepare_import(table, import_df, existing_df, columns, generate_ids,
+                   known_references=None, row_offset=0, check=None):
+    """
+    Validate, dedupe and assign IDs to a whole import in one pass.
+    `check(df, candidates)`, if given, runs last over the rows still accepted
+    and returns a rejection reason per row ('' to keep it).
+    Returns the rows to insert and an ImportReport for every input row.
+    """
+    primary_key = columns[0]
+    df = import_df.reset_index(drop=True)
+    df = df.drop(columns=[primary_key], errors='ignore')
+
+    # A frame from a plain read_csv can hold IDs as numbers; compare them as stored text
+    reference = REFERENCE_COLUMNS.get(table)
+    if reference in df.columns:
+        lost_zeros = pd.api.types.is_numeric_dtype(df[reference])
+        df[reference] = _id_text(df[reference])
+        if lost_zeros and known_references is not None:
+            df[reference] = _restore_zeros(df[reference], known_references)
+    errors = IMPORT_VALIDATORS[table](df)
+
+    # Reject rows that point at records that don't exist
+    if reference and known_references is not None and reference in df.columns:
+        missing = ~df[reference].astype(str).isin(known_references) & df[reference].notna()
+        errors = errors.where(~missing | (errors != ''), f"Unknown {reference}")
+
+    # Skip rows that duplicate existing records or earlier rows in the import
+    for key_columns in DEDUPE_KEYS.get(table, []):
+        keys = _record_keys(df, key_columns)
+        existing_keys = set(_record_keys(existing_df, key_columns).dropna())
+        candidates = (errors == '') & keys.notna()
+        duplicate = candidates & (keys.isin(existing_keys) | keys.where(candidates).duplicated(keep='first'))
+        errors = errors.where(~duplicate, f"Duplicate {', '.join(key_columns)}")
+
+    if check is not None:
+        reasons = check(df, errors == '')
+        errors = errors.where((errors != '') | (reasons == ''), reasons)
+
+    accepted = errors == ''
+    ids = pd.Series(pd.NA, index=df.index, dtype=object)
+    ids[accepted] = generate_ids(int(accepted.sum()))
+
+    # Only keep columns the table knows about
+    keep = [col for col in df.columns if col in columns]
+    rows = df.loc[accepted, keep]
+    rows.insert(0, primary_key, ids[accepted])
+
+    results = pd.DataFrame({
+        'row': df.index + 1 + row_offset,
+        'status': accepted.map({True: 'accepted', False: 'rejected'}),
+        'id': ids,
+        'reason': errors,
+    })
+    return rows, ImportReport(table, results)
+
+
+def _match_key(series):
+    """Normalise identifiers so 'ab12 cde' matches 'AB12CDE'"""
+    return _key_part(series).str.replace(' ', '', regex=False)
+
+
+def prepare_bulk_update(table, updates_df, existing_df, key, match_on=None, allowed=None):
+    """
+    Match bulk update rows to existing records and validate them in one pass.
+    Each row names a record by its `match_on` column (the primary key by
+    default) and gives the values to set. `allowed` maps columns to their
+    permitted values, matched ignoring case. Returns the rows to write, keyed
+    on the primary key, and an ImportReport for every input row.
+    """
+    match_on = match_on or key
+    df = updates_df.reset_index(drop=True)
+    value_columns = [col for col in df.columns if col in existing_df.columns and col not in (key, match_on)]
+    checks = [
+        (pd.Series(match_on not in df.columns, index=df.index), f"Column '{match_on}' is required"),
+        (pd.Series(not value_columns, index=df.index), "No columns to update"),
+    ]
+
+    # Values shared by several records can't say which one to update
+    ids = pd.Series(pd.NA, index=df.index, dtype=object)
+    if match_on in df.columns and match_on in existing_df.columns:
+        existing_keys = _match_key(existing_df[match_on])
+        lookup = pd.Series(existing_df[key].to_numpy(), index=existing_keys.to_numpy())
+        lookup = lookup[existing_keys.notna().to_numpy()]
+        ambiguous = set(lookup.index[lookup.index.duplicated()])
+        lookup = lookup[~lookup.index.duplicated()]
+        wanted = _match_key(df[match_on])
+        ids = wanted.map(lookup)
+        checks += [
+            (blank_rows(df, match_on), f"Field '{match_on}' is required"),
+            (wanted.notna() & ids.isna(), f"No record with this {match_on}"),
+            (wanted.isin(ambiguous), f"More than one record has this {match_on}"),
+        ]
+
+    checks += [(blank_rows(df, col), f"Field '{col}' is required") for col in value_columns]
+    rows = df[value_columns].copy()
+
+    # Spell permitted values the way the app does
+    for col, values in (allowed or {}).items():
+        if col in value_columns:
+            spellings = {str(value).lower(): value for value in values}
+            rows[col] = df[col].astype(str).str.strip().str.lower().map(spellings)
+            checks.append((~blank_rows(df, col) & rows[col].isna(), f"{col} must be one of: {', '.join(values)}"))
+
+    # Meter readings must be numbers and can only go up
+    meter = METER_COLUMNS.get(table)
+    if meter in value_columns:
+        checks += optional_number_checks(df, meter, 0, f"{meter.capitalize()} cannot be negative")
+        current = pd.to_numeric(existing_df[meter], errors='coerce').astype('float64')
+        current = ids.map(current.set_axis(existing_df[key].to_numpy()).groupby(level=0).first())
+        readings = column_numbers(df, meter)
+        checks.append((readings < current, f"{meter.capitalize()} is lower than the current reading"))
+        rows[meter] = readings
+
+    errors = collect_errors(df, checks)
+    accepted = errors == ''
+    rows = rows[accepted]
+    rows.insert(0, key, ids[accepted])
+
+    results = pd.DataFrame({
+        'row': df.index + 1,
+        'status': accepted.map({True: 'accepted', False: 'rejected'}),
+        'id': ids,
+        'reason': errors,
+    })
+    return rows, ImportReport(table, results)
+
+
+def stream_size(source):
+    """Total size in bytes of an uploaded file or path, if it can be found"""
+    size = getattr(source, 'size', None)
+    if size:
+        return size
+    if isinstance(source, str):
+        try:
+            return os.path.getsize(source)
+        except OSError:
+            return None
+    try:
+        position = source.tell()
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+        source.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return None
+
+
+def stream_position(source, reader):
+    """Bytes consumed so far by a chunked CSV reader"""
+    handle = source
+    if isinstance(source, str):
+        handle = getattr(getattr(reader, 'handles', None), 'handle', None)
+    try:
+        return handle.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
@@ -0,0 +1,119 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+
+class TableJournal:
+    """
+    Write-ahead log of changes to one table that haven't been folded into
+    its file yet, one JSON record per line. Each append is flushed to disk
+    before it returns, so an acknowledged change survives a crash; a line
+    torn by a crash mid-append was never acknowledged and is skipped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def signature(self):
+        """(mtime, size) of the journal, or None when it is empty"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size) if stat.st_size else None
+
+    def append(self, record):
+        """Durably append a record; returns it as it will be replayed"""
+        line = json.dumps(record, default=str) + '\n'
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        return json.loads(line)
+
+    def records(self):
+        """Every complete record in the journal, oldest first"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return records
+
+    def clear(self):
+        """Drop the journal once its records are in the table file"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class JournalCompactor:
+    """
+    Background thread that folds journaled changes into their table files
+    (group commit). A table is compacted `delay` seconds after its first
+    pending change, or straight away once `max_records` are waiting, so a
+    burst of edits costs one file rewrite instead of one each.
+    """
+
+    delay = 2.0
+    max_records = 200
+
+    def __init__(self):
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, storage, table):
+        """Note a journaled change to a table that needs compacting"""
+        key = (storage.cache_key, table)
+        with self._condition:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = [storage, table, time.monotonic() + self.delay, 0]
+            entry[3] += 1
+            if entry[3] >= self.max_records:
+                entry[2] = 0
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='journal-compactor', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                due = [key for key, entry in self._pending.items() if entry[2] <= now]
+                if not due:
+                    timeout = min((entry[2] for entry in self._pending.values()), default=now + 60) - now
+                    self._condition.wait(timeout)
+                    continue
+                jobs = [self._pending.pop(key) for key in due]
+            for storage, table, _, _ in jobs:
+                try:
+                    storage.compact(table)
+                except Exception:
+                    # The journal is still replayed on load; try again later
+                    self.schedule(storage, table)
+
+    def flush(self):
+        """Compact every table with pending changes now"""
+        with self._condition:
+            jobs = list(self._pending.values())
+            self._pending.clear()
+        for storage, table, _, _ in jobs:
+            storage.compact(table)
+
+
+# Shared by every storage backend in the process
+COMPACTOR = JournalCompactor()
+atexit.register(COMPACTOR.flush)
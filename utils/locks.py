@@ -0,0 +1,60 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows; locks then only cover threads in this process
+    fcntl = None
+
+
+class TableLock:
+    """
+    Advisory lock on one table, shared by every thread in the process and,
+    through flock on a lock file, by every process using the same data
+    directory. Re-entrant, so a write can call other writes on the same
+    table while holding it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._file = open(self.path, 'a')
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            except OSError:
+                # A read-only data directory still gets the in-process lock
+                if self._file is not None:
+                    self._file.close()
+                self._file = None
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._lock.release()
+        return False
+
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def table_lock(lock_dir, table):
+    """The process-wide lock for a table, with its lock file in lock_dir"""
+    path = os.path.abspath(os.path.join(lock_dir, f"{table}.lock"))
+    with _locks_lock:
+        if path not in _locks:
+            _locks[path] = TableLock(path)
+        return _locks[path]
@@ -0,0 +1,215 @@
+import math
+
+import pandas as pd
+
+from utils.table_index import SortedIndex, TableIndex, register_index
+
+# Vehicle columns shown alongside each due item
+VEHICLE_INFO_COLUMNS = ['year', 'make', 'model', 'license_plate']
+
+DUE_COLUMNS = [
+    'vehicle_id', 'type', 'maintenance_id', 'date', 'next_due_mileage',
+    'mileage', 'miles_until_due'
+] + VEHICLE_INFO_COLUMNS
+
+
+def _number(value):
+    """A finite number, or None"""
+    number = pd.to_numeric(value, errors='coerce')
+    if number is None or pd.isna(number) or not math.isfinite(number):
+        return None
+    return int(number) if float(number).is_integer() else float(number)
+
+
+def _cell(value):
+    """A due-list value, with None and NA as NaN like the loaded tables"""
+    return math.nan if value is None or pd.isna(value) else value
+
+
+def _date(value):
+    """A timestamp to order records by; unknown dates sort first"""
+    date = pd.to_datetime(value, errors='coerce')
+    return pd.Timestamp.min if pd.isna(date) else date
+
+
+class DueList:
+    """
+    Latest mileage schedule for each (vehicle, maintenance type), with the
+    scheduled items kept sorted by miles until due.
+    """
+
+    def __init__(self):
+        self.latest = {}
+        self.schedule_keys = {}
+        self.types = {}
+        self.mileage = {}
+        self.info = {}
+        self.order = SortedIndex()
+
+    def _place(self, key):
+        """Re-sort one (vehicle, type) item after its schedule or mileage changed"""
+        record = self.latest.get(key)
+        mileage = self.mileage.get(key[0])
+        if record is None or record['next_due_mileage'] is None or mileage is None:
+            self.order.remove(key)
+        else:
+            self.order.set(key, record['next_due_mileage'] - mileage)
+
+    def add_record(self, record):
+        """Take a maintenance record as the schedule if it's the newest of its type"""
+        key = (str(record.get('vehicle_id')), str(record.get('type')))
+        current = self.latest.get(key)
+        if current is not None:
+            if record['sort_date'] < current['sort_date']:
+                return
+            self.schedule_keys.pop(str(current['maintenance_id']), None)
+        self.latest[key] = record
+        self.schedule_keys[str(record['maintenance_id'])] = key
+        self.types.setdefault(key[0], set()).add(key[1])
+        self._place(key)
+
+    def remove_vehicle_records(self, vehicle_id):
+        for maintenance_type in self.types.pop(vehicle_id, set()):
+            key = (vehicle_id, maintenance_type)
+            self.order.remove(key)
+            record = self.latest.pop(key, None)
+            if record is not None:
+                self.schedule_keys.pop(str(record['maintenance_id']), None)
+
+    def set_vehicle(self, vehicle_id, mileage, info):
+        self.mileage[vehicle_id] = mileage
+        self.info[vehicle_id] = info
+        for maintenance_type in self.types.get(vehicle_id, ()):
+            self._place((vehicle_id, maintenance_type))
+
+    def remove_vehicle(self, vehicle_id):
+        self.mileage.pop(vehicle_id, None)
+        self.info.pop(vehicle_id, None)
+        for maintenance_type in self.types.get(vehicle_id, ()):
+            self.order.remove((vehicle_id, maintenance_type))
+
+    def between(self, low=None, high=None):
+        """
+        Due items with low < miles until due <= high, closest first.
+        Found by bisecting the sorted list, so cost depends on the matches.
+        """
+        rows = []
+        for miles_until_due, key in self.order.between(low, high):
+            record = self.latest[key]
+            info = self.info.get(key[0], {})
+            rows.append({
+                'vehicle_id': key[0],
+                'type': record.get('type'),
+                'maintenance_id': record.get('maintenance_id'),
+                'date': record.get('date'),
+                'next_due_mileage': record['next_due_mileage'],
+                'mileage': self.mileage.get(key[0]),
+                'miles_until_due': miles_until_due,
+                **{col: _cell(info.get(col)) for col in VEHICLE_INFO_COLUMNS},
+            })
+        return pd.DataFrame(rows, columns=DUE_COLUMNS)
+
+
+class MaintenanceDueIndex(TableIndex):
+    """
+    Materialised due-list built from maintenance records and vehicle mileage.
+    New maintenance records and mileage updates re-sort only the items they
+    touch, so overdue / due-soon / upcoming lookups don't merge the tables.
+    """
+
+    tables = ('maintenance', 'vehicles')
+
+    def sources(self, name):
+        return self.tables
+
+    @staticmethod
+    def _record(record):
+        # New rows arrive with the dates they were entered as; loaded tables hold timestamps
+        return {
+            'maintenance_id': record.get('maintenance_id'),
+            'vehicle_id': record.get('vehicle_id'),
+            'type': record.get('type'),
+            'date': pd.to_datetime(record.get('date'), errors='coerce'),
+            'sort_date': _date(record.get('date')),
+            'next_due_mileage': _number(record.get('next_due_mileage')),
+        }
+
+    @staticmethod
+    def _vehicle(record):
+        return _number(record.get('mileage')), {col: record.get(col) for col in VEHICLE_INFO_COLUMNS}
+
+    def build(self, name, maintenance_df, vehicles_df):
+        state = DueList()
+        for record in vehicles_df.to_dict('records'):
+            state.set_vehicle(str(record.get('vehicle_id')), *self._vehicle(record))
+        # Later rows win ties on date, as they were logged later
+        for record in maintenance_df.to_dict('records'):
+            state.add_record(self._record(record))
+        return state
+
+    def insert(self, state, table, rows):
+        for record in rows.to_dict('records'):
+            if table == 'maintenance':
+                state.add_record(self._record(record))
+            else:
+                state.set_vehicle(str(record.get('vehicle_id')), *self._vehicle(record))
+        return True
+
+    def update(self, state, table, key, key_value, values):
+        if table == 'vehicles':
+            vehicle_id = str(key_value)
+            if key != 'vehicle_id' or vehicle_id not in state.mileage:
+                return False
+            info = dict(state.info[vehicle_id])
+            info.update({col: values[col] for col in VEHICLE_INFO_COLUMNS if col in values})
+            mileage = _number(values['mileage']) if 'mileage' in values else state.mileage[vehicle_id]
+            state.set_vehicle(vehicle_id, mileage, info)
+            return True
+
+        if key != 'maintenance_id':
+            return False
+        schedule_key = state.schedule_keys.get(str(key_value))
+        if schedule_key is None:
+            # Older records aren't anyone's schedule, unless the edit moves them
+            return not any(col in values for col in ('vehicle_id', 'type', 'date'))
+
+        record = state.latest[schedule_key]
+        if any(col in values and str(values[col]) != str(record[col]) for col in ('vehicle_id', 'type')):
+            return False
+        # Edits pass dates as text while loaded records hold timestamps
+        if 'date' in values and _date(values['date']) != record['sort_date']:
+            return False
+        if 'next_due_mileage' in values:
+            record['next_due_mileage'] = _number(values['next_due_mileage'])
+            state._place(schedule_key)
+        return True
+
+    def delete(self, state, table, column, values):
+        values = {str(value) for value in values}
+        if table == 'vehicles':
+            if column != 'vehicle_id':
+                return False
+            for vehicle_id in values:
+                state.remove_vehicle(vehicle_id)
+            return True
+
+        if column == 'vehicle_id':
+            for vehicle_id in values:
+                state.remove_vehicle_records(vehicle_id)
+            return True
+        # Deleting a current schedule would need the record before it
+        return column == 'maintenance_id' and not any(value in state.schedule_keys for value in values)
+
+    def due(self, data_manager, due_soon_miles=1000):
+        """Overdue, due-soon and upcoming items as three DataFrames"""
+        with self._lock:
+            state = self.get(data_manager, 'due')
+            return (
+                state.between(high=0),
+                state.between(low=0, high=due_soon_miles),
+                state.between(low=due_soon_miles),
+            )
+
+
+# Shared by every DataManager in the process
+MAINTENANCE_DUE_INDEX = register_index(MaintenanceDueIndex())
@@ -0,0 +1,69 @@
+import math
+
+import streamlit as st
+
+# Page sizes offered by the list controls
+PAGE_SIZES = [25, 50, 100]
+
+
+def sort_frame(df, column=None, ascending=True):
+    """
+    Sort a DataFrame by one column, keeping file order when column is None.
+    Text columns sort case-insensitively and blanks always go last.
+    """
+    if column is None or column not in df.columns:
+        return df if ascending else df.iloc[::-1]
+
+    key = None
+    if df[column].dtype == object:
+        key = lambda values: values.astype(str).str.lower().where(values.notna())
+    return df.sort_values(column, ascending=ascending, kind='stable', na_position='last', key=key)
+
+
+def page_count(row_count, page_size):
+    """Number of pages needed for row_count rows, never less than 1"""
+    return max(math.ceil(row_count / page_size), 1)
+
+
+def clamp_page(page, row_count, page_size):
+    """A 1-based page number moved into range for row_count rows"""
+    return min(max(int(page), 1), page_count(row_count, page_size))
+
+
+def get_page(df, page, page_size):
+    """Rows on a 1-based page"""
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+
+def show_paged_frame(df, key, sort_columns):
+    """
+    Show sort and paging controls and return the rows on the current page.
+    `sort_columns` maps the labels offered in the "Sort by" box to column
+    names (None keeps file order). Only the returned rows should be
+    rendered, so the page costs the same however many records match.
+    """
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+
+    with col1:
+        sort_label = st.selectbox("Sort by", list(sort_columns), key=f"{key}_sort")
+
+    with col2:
+        order = st.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order")
+
+    with col3:
+        page_size = st.selectbox("Per page", PAGE_SIZES, key=f"{key}_page_size")
+
+    # Keep the current page in range when filters shrink the results
+    pages = page_count(len(df), page_size)
+    page_key = f"{key}_page"
+    current = st.session_state.get(page_key, 1)
+    if clamp_page(current, len(df), page_size) != current:
+        st.session_state[page_key] = clamp_page(current, len(df), page_size)
+
+    with col4:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+
+    st.caption(f"Page {int(page)} of {pages}")
+    sorted_df = sort_frame(df, sort_columns[sort_label], ascending=order == "Ascending")
+    return get_page(sorted_df, int(page), page_size)
@@ -0,0 +1,145 @@
+import pandas as pd
+
+from utils.table_index import TableIndex, register_index
+
+# What each rolled-up table is summed by: its ID column, the date that
+# picks the month, the amount summed and the columns it's broken down by
+ROLLUP_SPECS = {
+    'maintenance': {
+        'id': 'maintenance_id',
+        'date': 'date',
+        'amount': 'cost',
+        'dims': ('type', 'vehicle_id'),
+    },
+    'rentals': {
+        'id': 'rental_id',
+        'date': 'start_date',
+        'amount': 'rental_rate',
+        'dims': ('equipment_id',),
+    },
+}
+
+
+class MonthlyRollup:
+    """
+    Running monthly totals for one table: an amount sum, a record count and
+    a count of records with an amount, per month and per month x dimension.
+    Each record's contribution is kept so edits and deletes subtract
+    exactly what was added.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.records = {}
+        self.totals = {}
+        self.by_dim = {dim: {} for dim in spec['dims']}
+
+    @staticmethod
+    def _bump(totals, key, amount, sign):
+        entry = totals.setdefault(key, [0.0, 0, 0])
+        if amount is not None:
+            entry[0] += sign * amount
+            entry[2] += sign
+        entry[1] += sign
+        if entry[1] == 0:
+            del totals[key]
+
+    def _apply(self, contribution, sign):
+        month, dims, amount = contribution
+        self._bump(self.totals, month, amount, sign)
+        for dim, value in dims.items():
+            self._bump(self.by_dim[dim], (month, value), amount, sign)
+
+    def _contribution(self, record):
+        # Undated records count towards all-time totals under a month of None
+        date = pd.to_datetime(record.get(self.spec['date']), errors='coerce')
+        amount = pd.to_numeric(record.get(self.spec['amount']), errors='coerce')
+        return (
+            None if pd.isna(date) else date.strftime('%Y-%m'),
+            {dim: str(record.get(dim)) for dim in self.spec['dims']},
+            None if pd.isna(amount) else float(amount),
+        )
+
+    def set_record(self, record):
+        record_id = str(record.get(self.spec['id']))
+        self.remove_record(record_id)
+        contribution = self._contribution(record)
+        self.records[record_id] = (record, contribution)
+        self._apply(contribution, 1)
+
+    def remove_record(self, record_id):
+        entry = self.records.pop(record_id, None)
+        if entry is not None:
+            self._apply(entry[1], -1)
+
+    def frame(self, by=None, include_undated=False):
+        """Monthly rows (month[, by], amount, count, priced_count), oldest month first"""
+        amount = self.spec['amount']
+        if by is None:
+            rows = [(month, total, count, priced) for month, (total, count, priced) in self.totals.items()]
+            columns = ['month']
+        else:
+            rows = [(month, value, total, count, priced) for (month, value), (total, count, priced) in self.by_dim[by].items()]
+            columns = ['month', by]
+        df = pd.DataFrame(rows, columns=columns + [amount, 'count', 'priced_count'])
+        # An empty rollup has no values to infer the numeric dtypes from
+        df = df.astype({amount: 'float64', 'count': 'int64', 'priced_count': 'int64'})
+        if not include_undated:
+            df = df[df['month'].notna()]
+        df[amount] = df[amount].round(2)
+        return df.sort_values(columns, na_position='first', ignore_index=True)
+
+
+class RollupIndex(TableIndex):
+    """
+    Monthly cost and revenue rollups for the maintenance and rentals
+    tables, updated record by record so charts read a few hundred rows
+    however long the history grows.
+    """
+
+    tables = tuple(ROLLUP_SPECS)
+
+    def build(self, name, df):
+        spec = ROLLUP_SPECS[name]
+        state = MonthlyRollup(spec)
+        for record in df.to_dict('records'):
+            state.set_record(record)
+        return state
+
+    def insert(self, state, table, rows):
+        for record in rows.to_dict('records'):
+            state.set_record(record)
+        return True
+
+    def update(self, state, table, key, key_value, values):
+        entry = state.records.get(str(key_value))
+        if key != state.spec['id'] or entry is None:
+            return False
+        record = dict(entry[0])
+        record.update(values)
+        state.set_record(record)
+        return True
+
+    def delete(self, state, table, column, values):
+        values = {str(value) for value in values}
+        if column == state.spec['id']:
+            record_ids = values
+        elif column in state.spec['dims']:
+            record_ids = [
+                record_id for record_id, (record, _) in state.records.items()
+                if str(record.get(column)) in values
+            ]
+        else:
+            return False
+        for record_id in list(record_ids):
+            state.remove_record(record_id)
+        return True
+
+    def monthly(self, data_manager, table, by=None, include_undated=False):
+        """Rolled-up monthly totals for table, optionally broken down by one of its dimensions"""
+        with self._lock:
+            return self.get(data_manager, table).frame(by, include_undated)
+
+
+# Shared by every DataManager in the process
+ROLLUP_INDEX = register_index(RollupIndex())
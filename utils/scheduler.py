@@ -0,0 +1,266 @@
+import math
+from datetime import date
+
+import pandas as pd
+
+from utils.table_index import SortedIndex, TableIndex, register_index
+
+# Interval column, last-done column and reading column for each kind of interval
+INTERVAL_KINDS = {
+    'miles': ('interval_miles', 'last_done_mileage', 'mileage'),
+    'hours': ('interval_hours', 'last_done_hours', 'hours'),
+}
+
+SCHEDULE_DUE_COLUMNS = [
+    'schedule_id', 'asset_id', 'asset_type', 'asset_name', 'service_type', 'status',
+    'next_due_date', 'days_until_due', 'next_due_mileage', 'miles_until_due',
+    'next_due_hours', 'hours_until_due'
+]
+
+
+def _number(value):
+    """A finite number, or None"""
+    number = pd.to_numeric(value, errors='coerce')
+    if number is None or pd.isna(number) or not math.isfinite(number):
+        return None
+    return int(number) if float(number).is_integer() else float(number)
+
+
+def _day(value):
+    """Day number (date ordinal) of a date value, or None"""
+    day = pd.to_datetime(value, errors='coerce')
+    return None if pd.isna(day) else day.date().toordinal()
+
+
+class ScheduleBook:
+    """
+    Next-due points of every service schedule, one sorted index per
+    interval kind. Calendar schedules are ordered by due date, so "due in
+    the next N days" is a range read that needs no update as days pass;
+    mileage and hours schedules are ordered by what's left on the asset's
+    current reading and move when that reading changes. Schedules with
+    intervals but nothing recorded as last done have no next-due point, so
+    they are kept aside and count as due now.
+    """
+
+    def __init__(self):
+        self.schedules = {}
+        self.by_asset = {}
+        self.assets = {}
+        self.by_date = SortedIndex()
+        self.by_reading = {kind: SortedIndex() for kind in INTERVAL_KINDS}
+        self.never_done = set()
+
+    def set_schedule(self, schedule):
+        schedule_id = str(schedule['schedule_id'])
+        self.remove_schedule(schedule_id)
+        self.schedules[schedule_id] = schedule
+        self.by_asset.setdefault(str(schedule['asset_id']), set()).add(schedule_id)
+        self._place(schedule_id)
+
+    def remove_schedule(self, schedule_id):
+        schedule = self.schedules.pop(schedule_id, None)
+        if schedule is None:
+            return
+        self.by_asset.get(str(schedule['asset_id']), set()).discard(schedule_id)
+        self.by_date.remove(schedule_id)
+        self.never_done.discard(schedule_id)
+        for index in self.by_reading.values():
+            index.remove(schedule_id)
+
+    def remove_asset_schedules(self, asset_id):
+        for schedule_id in list(self.by_asset.pop(asset_id, ())):
+            self.remove_schedule(schedule_id)
+
+    def set_asset(self, asset_id, readings):
+        """Record an asset's current readings and re-sort its schedules"""
+        self.assets[asset_id] = readings
+        for schedule_id in self.by_asset.get(asset_id, ()):
+            self._place(schedule_id)
+
+    def remove_asset(self, asset_id):
+        self.assets.pop(asset_id, None)
+        for schedule_id in self.by_asset.get(asset_id, ()):
+            self._place(schedule_id)
+
+    def _place(self, schedule_id):
+        schedule = self.schedules[schedule_id]
+        if schedule['never_done']:
+            self.never_done.add(schedule_id)
+        self.by_date.set(schedule_id, schedule['next_due_day'])
+        readings = self.assets.get(str(schedule['asset_id']), {})
+        for kind, (_, _, reading_column) in INTERVAL_KINDS.items():
+            next_due = schedule[f'next_due_{kind}']
+            reading = readings.get(reading_column)
+            remaining = None if next_due is None or reading is None else next_due - reading
+            self.by_reading[kind].set(schedule_id, remaining)
+
+    def due_within(self, days=None, miles=None, hours=None, today=None):
+        """IDs of schedules due within any of the given limits"""
+        today = (today or date.today()).toordinal()
+        if days is None and miles is None and hours is None:
+            return set()
+        due = set(self.never_done)
+        if days is not None:
+            due.update(schedule_id for _, schedule_id in self.by_date.between(high=today + days))
+        for kind, limit in (('miles', miles), ('hours', hours)):
+            if limit is not None:
+                due.update(schedule_id for _, schedule_id in self.by_reading[kind].between(high=limit))
+        return due
+
+    def describe(self, schedule_ids, today=None):
+        """DataFrame of schedules with what's left until each is due, most urgent first"""
+        today = (today or date.today()).toordinal()
+        rows = []
+        for schedule_id in schedule_ids:
+            schedule = self.schedules[schedule_id]
+            readings = self.assets.get(str(schedule['asset_id']), {})
+            day = schedule['next_due_day']
+            row = {
+                'schedule_id': schedule_id,
+                'asset_id': schedule['asset_id'],
+                'asset_type': schedule['asset_type'],
+                'asset_name': readings.get('name', schedule['asset_id']),
+                'service_type': schedule['service_type'],
+                'next_due_date': None if day is None else date.fromordinal(day),
+                'days_until_due': None if day is None else day - today,
+            }
+            miles = self.by_reading['miles'].positions.get(schedule_id)
+            hours = self.by_reading['hours'].positions.get(schedule_id)
+            row.update({
+                'next_due_mileage': schedule['next_due_miles'],
+                'miles_until_due': None if miles is None else miles[0],
+                'next_due_hours': schedule['next_due_hours'],
+                'hours_until_due': None if hours is None else hours[0],
+            })
+            left = [row['days_until_due'], row['miles_until_due'], row['hours_until_due']]
+            if any(value is not None and value <= 0 for value in left):
+                row['status'] = 'Overdue'
+            else:
+                row['status'] = 'Not Yet Done' if schedule['never_done'] else 'Due Soon'
+            rows.append(row)
+
+        df = pd.DataFrame(rows, columns=SCHEDULE_DUE_COLUMNS)
+        # Dates as timestamps and the rest as floats, so gaps are NaT / NaN whichever rows have them
+        df['next_due_date'] = pd.to_datetime(df['next_due_date'])
+        numbers = ['days_until_due', 'next_due_mileage', 'miles_until_due', 'next_due_hours', 'hours_until_due']
+        df[numbers] = df[numbers].astype(float)
+        return df.sort_values(['status', 'days_until_due', 'miles_until_due', 'hours_until_due'],
+                              ascending=[False, True, True, True], na_position='last', ignore_index=True)
+
+
+class ServiceScheduleIndex(TableIndex):
+    """
+    Index of next-due service points across vehicles and machines.
+    Built from the service schedules plus current vehicle mileage and
+    machine hours, and kept current as schedules are completed and
+    readings are updated.
+    """
+
+    tables = ('service_schedules', 'vehicles', 'machines')
+    asset_keys = {'vehicles': 'vehicle_id', 'machines': 'machine_id'}
+
+    # Asset columns used for the display name, and the reading intervals are measured on
+    name_columns = {
+        'vehicles': ('make', 'model', 'license_plate'),
+        'machines': ('make', 'model', 'whites_id'),
+    }
+    reading_columns = {'vehicles': 'mileage', 'machines': 'hours'}
+
+    def sources(self, name):
+        return self.tables
+
+    @staticmethod
+    def _schedule(record):
+        schedule = dict(record)
+        last_day = _day(record.get('last_done_date'))
+        interval_days = _number(record.get('interval_days'))
+        schedule['next_due_day'] = None if last_day is None or interval_days is None else last_day + int(interval_days)
+        for kind, (interval_column, last_column, _) in INTERVAL_KINDS.items():
+            interval = _number(record.get(interval_column))
+            last_done = _number(record.get(last_column))
+            schedule[f'next_due_{kind}'] = None if interval is None or last_done is None else last_done + interval
+        # Intervals to count from but no record of the service being done: due now
+        intervals = ['interval_days'] + [columns[0] for columns in INTERVAL_KINDS.values()]
+        points = ['next_due_day'] + [f'next_due_{kind}' for kind in INTERVAL_KINDS]
+        schedule['never_done'] = (
+            any(_number(record.get(col)) is not None for col in intervals)
+            and all(schedule[point] is None for point in points)
+        )
+        return schedule
+
+    def _readings(self, table, record):
+        make, model, label = (record.get(col) for col in self.name_columns[table])
+        column = self.reading_columns[table]
+        return {'name': f"{make} {model} ({label})", column: _number(record.get(column))}
+
+    def build(self, name, schedules_df, vehicles_df, machines_df):
+        state = ScheduleBook()
+        for table, df in (('vehicles', vehicles_df), ('machines', machines_df)):
+            for record in df.to_dict('records'):
+                state.set_asset(str(record.get(self.asset_keys[table])), self._readings(table, record))
+        for record in schedules_df.to_dict('records'):
+            state.set_schedule(self._schedule(record))
+        return state
+
+    def insert(self, state, table, rows):
+        for record in rows.to_dict('records'):
+            if table == 'service_schedules':
+                state.set_schedule(self._schedule(record))
+            else:
+                state.set_asset(str(record.get(self.asset_keys[table])), self._readings(table, record))
+        return True
+
+    def update(self, state, table, key, key_value, values):
+        key_value = str(key_value)
+        if table == 'service_schedules':
+            if key != 'schedule_id' or key_value not in state.schedules:
+                return False
+            record = dict(state.schedules[key_value])
+            record.update(values)
+            state.set_schedule(self._schedule(record))
+            return True
+
+        if key != self.asset_keys[table] or key_value not in state.assets:
+            return False
+        if any(col in values for col in self.name_columns[table]):
+            return False
+        readings = dict(state.assets[key_value])
+        column = self.reading_columns[table]
+        if column in values:
+            readings[column] = _number(values[column])
+        state.set_asset(key_value, readings)
+        return True
+
+    def delete(self, state, table, column, values):
+        values = [str(value) for value in values]
+        if table == 'service_schedules':
+            if column not in ('schedule_id', 'asset_id'):
+                return False
+            for value in values:
+                if column == 'schedule_id':
+                    state.remove_schedule(value)
+                else:
+                    state.remove_asset_schedules(value)
+            return True
+
+        if column != self.asset_keys[table]:
+            return False
+        for value in values:
+            state.remove_asset(value)
+        return True
+
+    def due(self, data_manager, days=None, miles=None, hours=None):
+        """Schedules due within any of the limits, most urgent first"""
+        with self._lock:
+            state = self.get(data_manager, 'schedules')
+            return state.describe(state.due_within(days, miles, hours))
+
+    def schedule(self, data_manager, schedule_id):
+        """One schedule with its next-due points"""
+        with self._lock:
+            return self.get(data_manager, 'schedules').schedules.get(str(schedule_id))
+
+
+# Shared by every DataManager in the process
+SERVICE_SCHEDULE_INDEX = register_index(ServiceScheduleIndex())
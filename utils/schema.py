@@ -0,0 +1,117 @@
+from datetime import date
+
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+
+# pandas dtype for each declared column type; undeclared columns are text
+PANDAS_DTYPES = {
+    'text': object,
+    'category': 'category',
+    'int': 'Int64',
+    'float': 'float64',
+    'date': 'datetime64[ns]',
+}
+
+
+def read_dtypes(types, columns):
+    """
+    dtype argument for pd.read_csv. Everything but numbers is read as a
+    string (or straight into a categorical), so IDs like "00123" or "1e5"
+    survive; numbers are left to the fast C parser and conform() finishes
+    the job.
+    """
+    kinds = {col: types.get(col, 'text') for col in columns}
+    return {col: 'category' if kind == 'category' else str for col, kind in kinds.items() if kind not in ('int', 'float')}
+
+
+def _numbers(series, kind):
+    numbers = pd.to_numeric(series, errors='coerce')
+    if numbers.notna().sum() < series.notna().sum():
+        # Leave columns with non-numeric entries alone rather than lose them on the next save
+        return series
+    if kind == 'int' and (numbers.dropna() % 1 == 0).all():
+        return numbers.astype('Int64')
+    return numbers.astype('float64')
+
+
+def _dates(series):
+    if is_datetime64_any_dtype(series.dtype):
+        return series
+    dates = pd.to_datetime(series, errors='coerce')
+    if dates.notna().sum() < series.notna().sum():
+        dates = pd.to_datetime(series, errors='coerce', format='mixed')
+        if dates.notna().sum() < series.notna().sum():
+            return series
+    return dates
+
+
+def _text(series):
+    if series.dtype == object:
+        return series
+    # Numbers read back from SQLite or an untyped frame
+    return series.astype(object).where(series.notna(), None).map(lambda value: value if value is None else str(value))
+
+
+def conform(df, types):
+    """Convert a frame's columns to their declared types"""
+    for col in df.columns:
+        kind = types.get(col, 'text')
+        series = df[col]
+        if str(series.dtype) == str(PANDAS_DTYPES[kind]) and kind != 'text':
+            continue
+        if kind == 'category':
+            df[col] = _text(series).astype('category')
+        elif kind in ('int', 'float'):
+            df[col] = _numbers(series, kind)
+        elif kind == 'date':
+            df[col] = _dates(series)
+        else:
+            df[col] = _text(series)
+    return df
+
+
+def drop_unused_categories(df):
+    """Drop categories no row uses any more, as a fresh load would"""
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def concat_frames(frames):
+    """
+    Concatenate frames of one table, widening categoricals to the union of
+    their categories so they stay categorical instead of falling back to object
+    """
+    frames = list(frames)
+    for col in frames[0].columns:
+        if not isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            continue
+        categories = list(frames[0][col].cat.categories)
+        known = set(categories)
+        for frame in frames[1:]:
+            if col in frame.columns:
+                values = frame[col].cat.categories if isinstance(frame[col].dtype, pd.CategoricalDtype) else frame[col].dropna().unique()
+                new = [value for value in values if value not in known]
+                categories.extend(new)
+                known.update(new)
+        dtype = pd.CategoricalDtype(categories)
+        for i, frame in enumerate(frames):
+            if col in frame.columns and frame[col].dtype != dtype:
+                frame = frame.copy(deep=False)
+                if i == 0:
+                    # Adding categories keeps the existing codes
+                    frame[col] = frame[col].cat.add_categories(categories[len(frame[col].cat.categories):])
+                else:
+                    frame[col] = frame[col].astype(dtype)
+                frames[i] = frame
+    return pd.concat(frames, ignore_index=True)
+
+
+def format_date(value):
+    """A loaded date value as YYYY-MM-DD for display, or '' if missing"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    if isinstance(value, (pd.Timestamp, date)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
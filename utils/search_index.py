@@ -0,0 +1,164 @@
+import re
+from collections import OrderedDict
+
+from utils.table_index import TableIndex, register_index
+
+# Identifying columns searched for each table
+SEARCH_COLUMNS = {
+    'vehicles': ['whites_id', 'make', 'model', 'license_plate', 'vin_chassis'],
+    'machines': ['whites_id', 'make', 'model', 'vin_chassis'],
+    'equipment': ['whites_id', 'name', 'category', 'brand', 'model', 'serial_number'],
+}
+
+# Primary key of each searchable table
+SEARCH_KEYS = {
+    'vehicles': 'vehicle_id',
+    'machines': 'machine_id',
+    'equipment': 'equipment_id',
+}
+
+NON_ALPHANUMERIC = re.compile(r'[^0-9A-Z]')
+
+# Recent query results kept per table; the least recently used go first
+RESULTS_CACHED = 256
+
+
+def normalize(value):
+    """
+    Normalise text for matching: upper case with spaces and punctuation
+    removed, so "ab12 cde" matches the plate "AB12CDE" and dashes in a
+    VIN don't matter.
+    """
+    if value is None or value != value:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return NON_ALPHANUMERIC.sub('', str(value).upper())
+
+
+def _grams(text):
+    """Keys a normalised field is posted under: every trigram"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchState:
+    """Trigram postings for one table"""
+
+    def __init__(self):
+        self.ids = []
+        self.fields = []
+        self.slots = {}
+        self.postings = {}
+        self.results = OrderedDict()
+
+    def add(self, record_id, fields):
+        slot = len(self.ids)
+        self.ids.append(record_id)
+        self.fields.append(())
+        self.slots[record_id] = slot
+        self.replace(slot, fields)
+
+    def replace(self, slot, fields):
+        """Swap the indexed fields of a record, keeping its place in the table"""
+        self.results.clear()
+        for text in self.fields[slot]:
+            for gram in _grams(text):
+                posting = self.postings.get(gram)
+                if posting is not None:
+                    posting.discard(slot)
+                    if not posting:
+                        del self.postings[gram]
+        self.fields[slot] = fields
+        for text in fields:
+            for gram in _grams(text):
+                self.postings.setdefault(gram, set()).add(slot)
+
+    def remove(self, record_id):
+        slot = self.slots.pop(record_id, None)
+        if slot is not None:
+            self.replace(slot, ())
+            self.ids[slot] = None
+
+    def search(self, query):
+        """IDs of records with a field containing the query, in table order"""
+        query = normalize(query)
+        if not query:
+            return None
+        if query in self.results:
+            self.results.move_to_end(query)
+            return self.results[query]
+
+        if len(query) < 3:
+            # Too short for a trigram: scan the indexed fields
+            slots = [slot for slot, fields in enumerate(self.fields) if any(query in text for text in fields)]
+        else:
+            # Check the whole query against the rarest of its trigrams
+            postings = [self.postings.get(query[i:i + 3], ()) for i in range(len(query) - 2)]
+            slots = min(postings, key=len)
+            if len(postings) > 1:
+                slots = [slot for slot in slots if any(query in text for text in self.fields[slot])]
+
+        ids = [self.ids[slot] for slot in sorted(slots)]
+        self.results[query] = ids
+        if len(self.results) > RESULTS_CACHED:
+            self.results.popitem(last=False)
+        return ids
+
+
+class SearchIndex(TableIndex):
+    """
+    Search over the identifying columns of vehicles, machines and equipment.
+    Every field is normalised and posted under its trigrams, so substring
+    and plate/VIN lookups of three characters or more touch only the
+    postings for the query; shorter queries scan the normalised fields.
+    """
+
+    tables = tuple(SEARCH_COLUMNS)
+
+    @staticmethod
+    def _fields(table, record):
+        return tuple(normalize(record.get(col)) for col in SEARCH_COLUMNS[table])
+
+    def build(self, table, df):
+        state = SearchState()
+        key = SEARCH_KEYS[table]
+        columns = [col for col in [key] + SEARCH_COLUMNS[table] if col in df.columns]
+        for record in df[columns].to_dict('records'):
+            state.add(str(record[key]), self._fields(table, record))
+        return state
+
+    def insert(self, state, table, rows):
+        key = SEARCH_KEYS[table]
+        if key not in rows.columns:
+            return False
+        for record in rows.to_dict('records'):
+            state.add(str(record[key]), self._fields(table, record))
+        return True
+
+    def update(self, state, table, key, key_value, values):
+        key_value = str(key_value)
+        if key != SEARCH_KEYS[table] or key_value not in state.slots:
+            return False
+        if any(col in values for col in SEARCH_COLUMNS[table]):
+            fields = list(state.fields[state.slots[key_value]])
+            for i, col in enumerate(SEARCH_COLUMNS[table]):
+                if col in values:
+                    fields[i] = normalize(values[col])
+            state.replace(state.slots[key_value], tuple(fields))
+        return True
+
+    def delete(self, state, table, column, values):
+        if column != SEARCH_KEYS[table]:
+            return False
+        for value in values:
+            state.remove(str(value))
+        return True
+
+    def search(self, data_manager, table, query):
+        """IDs (as strings) of the records in a table matching a search query"""
+        with self._lock:
+            return self.get(data_manager, table).search(query)
+
+
+# Shared by every DataManager in the process
+SEARCH_INDEX = register_index(SearchIndex())
@@ -0,0 +1,45 @@
+import os
+import threading
+
+from utils.data_manager import DataManager
+from utils.storage import CSVStorage
+
+
+class ServiceRegistry:
+    """
+    Process-wide home for long-lived objects shared by every page script
+    and session. Each service is created once, on first use, so setup work
+    (creating tables, replaying journals, building caches) runs once per
+    server process instead of once per page.
+    """
+
+    def __init__(self):
+        self._services = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, factory):
+        """Return the service stored under `key`, creating it with `factory()` the first time"""
+        service = self._services.get(key)
+        if service is not None:
+            return service
+        with self._lock:
+            if key not in self._services:
+                self._services[key] = factory()
+            return self._services[key]
+
+    def clear(self):
+        """Forget every service, so the next use creates it again"""
+        with self._lock:
+            self._services.clear()
+
+
+SERVICES = ServiceRegistry()
+
+
+def get_data_manager(storage=None):
+    """
+    The process's DataManager for a storage backend (WHITES_STORAGE, then
+    CSV, if not given), shared by app.py and every page.
+    """
+    name = (storage or os.environ.get("WHITES_STORAGE") or CSVStorage.name).lower()
+    return SERVICES.get(('data_manager', name), lambda: DataManager(name))
@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    # Snapshots are an optional speed-up; without pyarrow tables load from CSV
+    pa = None
+
+# Bump when the snapshot layout changes so old files are ignored
+SNAPSHOT_FORMAT = 1
+
+STAMP_KEY = b'whites_snapshot'
+
+
+def snapshots_available():
+    """Whether Arrow snapshots can be read and written here"""
+    return pa is not None
+
+
+def _stamp(signature, types):
+    """What a snapshot was built from: the CSV signature and the declared column types"""
+    return json.dumps(
+        {'format': SNAPSHOT_FORMAT, 'source': list(signature), 'types': types},
+        sort_keys=True
+    ).encode('utf-8')
+
+
+def read_snapshot(path, signature, types):
+    """
+    Load a table from its Arrow IPC snapshot, memory-mapped so numeric and
+    date columns aren't copied through a parser; only category columns are
+    copied, to make them writable. Returns None if there is no snapshot or
+    it was built from a different version of the CSV.
+    """
+    if pa is None or signature is None:
+        return None
+    try:
+        # A missing snapshot raises FileNotFoundError, an OSError
+        reader = ipc.open_file(pa.memory_map(path, 'r'))
+        if (reader.schema.metadata or {}).get(STAMP_KEY) != _stamp(signature, types):
+            return None
+        df = reader.read_all().to_pandas()
+    except (OSError, pa.ArrowException):
+        return None
+
+    for col in df.columns:
+        if df[col].dtype == object:
+            # Arrow gives missing text back as None; CSV loads give NaN
+            df[col] = df[col].mask(df[col].isna(), np.nan)
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            # Category codes are assigned in place and may point into the
+            # mapped file, which is read-only. Other columns stay zero-copy:
+            # copy-on-write copies a read-only array before writing to it
+            df[col] = df[col].copy()
+    return df
+
+
+def write_snapshot(path, df, signature, types):
+    """
+    Write an Arrow IPC snapshot of a loaded table, stamped with the CSV
+    signature it matches. Snapshots are only a cache, so any failure just
+    leaves the table to load from CSV.
+    """
+    if pa is None or signature is None:
+        return
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), STAMP_KEY: _stamp(signature, types)})
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with pa.OSFile(temp_path, 'wb') as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, path)
+    except (OSError, TypeError, ValueError, pa.ArrowException):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
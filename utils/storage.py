@@ -0,0 +1,709 @@
+import glob
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import ExitStack, contextmanager
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+
+from utils.journal import COMPACTOR, TableJournal
+from utils.locks import table_lock
+from utils.schema import concat_frames, conform, drop_unused_categories, read_dtypes
+from utils.snapshots import read_snapshot, write_snapshot
+from utils.table_cache import TABLE_CACHE
+
+
+def to_python_value(value):
+    """Convert pandas/numpy scalars to plain Python values for storage"""
+    if value is None:
+        return None
+    if isinstance(value, (list, dict)):
+        return str(value)
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+class ConcurrentEditError(ValueError):
+    """Raised when a row changed after the editor read it"""
+
+
+def row_version(record):
+    """
+    Fingerprint of a row's values. Editors keep the version of the row they
+    started from, and updates made against a version that no longer matches
+    the stored row are refused.
+    """
+    parts = []
+    for column in sorted(record):
+        value = to_python_value(record[column])
+        if isinstance(value, str) and not value.strip():
+            value = None
+        if value is None:
+            continue
+        # Whole numbers compare equal whether the column loaded as int or float
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        parts.append(f"{column}={value}")
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def assign_value(df, mask, column, value):
+    """Assign a value to the masked rows without tripping dtype coercion"""
+    if column not in df.columns:
+        df[column] = None
+    if isinstance(value, str) and not value.strip():
+        value = None
+    dtype = df[column].dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        if value is not None and not pd.isna(value) and value not in dtype.categories:
+            df[column] = df[column].cat.add_categories([value])
+    elif is_datetime64_any_dtype(dtype):
+        if value is not None:
+            parsed = pd.to_datetime(value, errors='coerce')
+            if pd.isna(parsed):
+                # Keep text that isn't a date rather than lose it
+                df[column] = df[column].astype(object)
+            else:
+                value = parsed
+    elif value is not None and not isinstance(value, (int, float, np.number, bool)):
+        if dtype != object:
+            df[column] = df[column].astype(object)
+    elif isinstance(value, float) and dtype == 'Int64' and not value.is_integer():
+        df[column] = df[column].astype('float64')
+    df.loc[mask, column] = value
+
+
+def assign_values(df, mask, column, values):
+    """
+    Assign per-row values (a Series on df's index) to the masked rows in one
+    go, with the same dtype handling as assign_value
+    """
+    if column not in df.columns:
+        df[column] = None
+    values = values[mask].astype(object)
+    values = values.mask(values.map(lambda v: isinstance(v, str) and not v.strip()), None)
+    present = values.notna()
+    dtype = df[column].dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        new = [v for v in pd.unique(values[present]) if v not in dtype.categories]
+        if new:
+            df[column] = df[column].cat.add_categories(new)
+    elif is_datetime64_any_dtype(dtype):
+        parsed = pd.to_datetime(values, errors='coerce')
+        if (parsed.notna() < present).any():
+            # Keep text that isn't a date rather than lose it
+            df[column] = df[column].astype(object)
+        else:
+            values = parsed
+    elif dtype != object:
+        numbers = pd.to_numeric(values, errors='coerce')
+        if (numbers.notna() < present).any():
+            df[column] = df[column].astype(object)
+        else:
+            values = numbers
+            if dtype == 'Int64' and not (numbers[present] % 1 == 0).all():
+                df[column] = df[column].astype('float64')
+    df.loc[mask, column] = values
+
+
+class StorageBackend:
+    """
+    Interface shared by the DataManager storage backends.
+    Each table has a fixed list of columns and a primary key column.
+    """
+    name = None
+
+    @property
+    def cache_key(self):
+        """Identifies this store in the process-wide table cache"""
+        return (self.name, os.path.abspath(self.data_dir))
+
+    def signature(self, table):
+        """Cheap token that changes whenever the stored table changes"""
+        raise NotImplementedError
+
+    def cached(self, table):
+        """Load a table through the process-wide cache"""
+        return TABLE_CACHE.get(self, table)
+
+    def changed(self, table):
+        """Invalidate the cached copy of a table after a write"""
+        TABLE_CACHE.invalidate(self, table)
+
+    def lock(self, table):
+        """
+        Exclusive lock on a table for a read-modify-write, shared with other
+        threads and processes using the same data directory
+        """
+        return table_lock(os.path.join(self.data_dir, ".locks"), table)
+
+    @contextmanager
+    def lock_tables(self, tables):
+        """Lock several tables, always in the same order so writers can't deadlock"""
+        with ExitStack() as stack:
+            for table in sorted(set(tables)):
+                stack.enter_context(self.lock(table))
+            yield
+
+    def fetch_row(self, table, key, key_value):
+        """The row where key == key_value as a dict, or None if there isn't one"""
+        df = self.cached(table)
+        rows = df[df[key] == key_value]
+        return None if rows.empty else rows.iloc[0].to_dict()
+
+    def ensure_table(self, table, columns, primary_key, indexes=(), types=None):
+        """Create the table if it doesn't exist; `types` maps columns to their declared types"""
+        raise NotImplementedError
+
+    def conform(self, table, df):
+        """Give a loaded frame the table's declared column types"""
+        return conform(df, self.types.get(table, {}))
+
+    def load(self, table):
+        """Load a whole table as a DataFrame"""
+        raise NotImplementedError
+
+    def save(self, table, df):
+        """Replace the contents of a table"""
+        raise NotImplementedError
+
+    def insert(self, table, rows):
+        """Insert the rows of a DataFrame"""
+        raise NotImplementedError
+
+    def update(self, table, key, key_value, values):
+        """Update the columns in `values` for the row where key == key_value"""
+        raise NotImplementedError
+
+    def update_many(self, table, key, rows):
+        """
+        Update many rows in one write: `rows` is a DataFrame with the key
+        column and the columns to set, one row per record
+        """
+        raise NotImplementedError
+
+    def delete(self, table, column, values):
+        """Delete every row whose `column` value is in `values`"""
+        raise NotImplementedError
+
+    def delete_many(self, deletes):
+        """Run several (table, column, values) deletes as one all-or-nothing change"""
+        with self.lock_tables(table for table, _, _ in deletes):
+            for table, column, values in deletes:
+                self.delete(table, column, values)
+
+    def recover(self):
+        """Finish any multi-table change a crash interrupted"""
+
+
+class CSVStorage(StorageBackend):
+    """
+    Stores each table as a CSV file in the data directory.
+    New rows are appended to the file. Updates and deletes are written to
+    a journal in data/.journal/ and applied to the cached table in memory,
+    and a background compactor folds them into the CSV shortly afterwards,
+    so a burst of edits costs one rewrite instead of one each. Loads replay
+    any journal still pending and startup compacts it, so a crash loses no
+    change that was acknowledged.
+    A binary Arrow snapshot of each table is kept in data/.snapshots/ and
+    loaded instead of parsing the CSV while the CSV is unchanged; editing
+    the CSV outside the app makes the next load reparse it and refresh the
+    snapshot. Snapshots need pyarrow and are skipped without it.
+    """
+    name = "csv"
+
+    def __init__(self, data_dir="data"):
+        self.data_dir = data_dir
+        self.columns = {}
+        self.types = {}
+        self.primary_keys = {}
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def path(self, table):
+        return os.path.join(self.data_dir, f"{table}.csv")
+
+    def snapshot_path(self, table):
+        return os.path.join(self.data_dir, ".snapshots", f"{table}.arrow")
+
+    def journal(self, table):
+        return TableJournal(os.path.join(self.data_dir, ".journal", f"{table}.jsonl"))
+
+    def ensure_table(self, table, columns, primary_key, indexes=(), types=None):
+        self.columns[table] = list(columns)
+        self.types[table] = dict(types or {})
+        self.primary_keys[table] = primary_key
+        try:
+            # 'x' only creates the file, so an existing table is never truncated
+            with open(self.path(table), 'x', newline='') as f:
+                pd.DataFrame(columns=columns).to_csv(f, index=False)
+        except FileExistsError:
+            pass
+
+        # Fold in changes journaled before a crash or restart
+        if self.journal(table).signature() is not None:
+            self.compact(table)
+
+    def file_signature(self, table):
+        """(mtime, size) of the table's CSV file alone"""
+        try:
+            stat = os.stat(self.path(table))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def signature(self, table):
+        file_signature = self.file_signature(table)
+        if file_signature is None:
+            return None
+        return file_signature + (self.journal(table).signature() or (0, 0))
+
+    def read(self, table, source, columns, **kwargs):
+        """Parse CSV text of a table, whose header is `columns`, with its declared column types"""
+        df = pd.read_csv(source, dtype=read_dtypes(self.types.get(table, {}), columns), **kwargs)
+        return self.conform(table, df)
+
+    def load(self, table):
+        # Journal before file: if the journal is compacted in between, replaying
+        # it again over the new file changes nothing
+        records = self.journal(table).records()
+        df = self._load_file(table)
+        for record in records:
+            df = self._replay(table, df, record)
+        return df
+
+    def _load_file(self, table):
+        # Signature first, so a CSV edited mid-load can't be stamped as current
+        signature = self.file_signature(table)
+        types = self.types.get(table, {})
+        df = read_snapshot(self.snapshot_path(table), signature, types)
+        if df is not None:
+            return self.conform(table, df)
+
+        try:
+            df = self.read(table, self.path(table), self.header(table) or [])
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            return self.conform(table, pd.DataFrame(columns=self.columns.get(table, [])))
+        write_snapshot(self.snapshot_path(table), df, signature, types)
+        return df
+
+    def _replay(self, table, df, record):
+        """
+        Apply one journal record to a loaded table. Replaying a record the
+        table already reflects leaves it unchanged: updates set values,
+        deletes filter and inserts skip rows whose key is already present.
+        """
+        if record['op'] == 'update':
+            key = record['key']
+            mask = df[key] == record['key_value']
+
+            # Update only the columns that already exist in the table
+            for col in df.columns:
+                if col in record['values'] and col != key:
+                    assign_value(df, mask, col, record['values'][col])
+            return drop_unused_categories(df)
+
+        if record['op'] == 'update_many':
+            key = record['key']
+            rows = pd.DataFrame(record['rows'])
+            if rows.empty:
+                return df
+            rows = rows.drop_duplicates(key, keep='last').set_index(key)
+            mask = df[key].isin(rows.index)
+            for col in df.columns:
+                if col in rows.columns:
+                    assign_values(df, mask, col, df[key].map(rows[col]))
+            return drop_unused_categories(df)
+
+        if record['op'] == 'delete':
+            return drop_unused_categories(df[~df[record['column']].isin(record['values'])])
+
+        rows = self.conform(table, pd.DataFrame(record['rows']))
+        key = self.primary_keys.get(table)
+        if key in rows.columns and key in df.columns:
+            rows = rows[~rows[key].isin(df[key])]
+        if df.empty:
+            columns = list(df.columns) + [col for col in rows.columns if col not in df.columns]
+            return self.conform(table, rows.reindex(columns=columns))
+        return concat_frames([df, rows])
+
+    def _journal(self, table, record):
+        """Durably log a change, apply it to the cached table and queue a compaction"""
+        before = self.signature(table)
+        record = self.journal(table).append(record)
+        after = self.signature(table)
+        TABLE_CACHE.apply(self, table, lambda df: self._replay(table, df, record), before, after)
+        COMPACTOR.schedule(self, table)
+
+    def compact(self, table):
+        """Fold the table's journal into its CSV file"""
+        with self.lock(table):
+            journal = self.journal(table)
+            if journal.signature() is None:
+                return
+            before = self.signature(table)
+            self._write_file(table, self.cached(table))
+            journal.clear()
+
+            # Same rows as before, so cached copies and derived indexes stay valid
+            TABLE_CACHE.rebase(self, table, before, self.signature(table))
+
+    def save(self, table, df):
+        with self.lock(table):
+            self._write_file(table, df)
+
+            # The saved frame replaces anything still journaled
+            self.journal(table).clear()
+        self.changed(table)
+
+    def _write_file(self, table, df):
+        data = df.to_csv(index=False).encode('utf-8')
+        path = self.path(table)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        # Write a temporary file and swap it in, so a crash mid-write
+        # leaves the old file rather than a truncated one
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        signature = self.file_signature(table)
+
+        # Snapshot what was just written so the next load needn't parse it,
+        # unless someone else has written to the file since
+        if signature is not None and signature[1] == len(data):
+            snapshot = drop_unused_categories(self.conform(table, df.copy(deep=False)))
+            write_snapshot(self.snapshot_path(table), snapshot, signature, self.types.get(table, {}))
+
+    def header(self, table):
+        """Column names from the first line of the table's CSV file"""
+        try:
+            return list(pd.read_csv(self.path(table), nrows=0).columns)
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            return None
+
+    def insert(self, table, rows):
+        with self.lock(table):
+            if self.journal(table).signature() is not None:
+                # Keep the rows in order behind the changes still journaled
+                records = [
+                    {col: to_python_value(value) for col, value in record.items()}
+                    for record in rows.to_dict('records')
+                ]
+                self._journal(table, {'op': 'insert', 'rows': records})
+            else:
+                self._append(table, rows)
+
+    def _append(self, table, rows):
+        header = self.header(table)
+        if header is None or not set(rows.columns) <= set(header):
+            # New columns need the whole file rewritten with a wider header
+            df = self.cached(table)
+            df = pd.concat([df, rows], ignore_index=True)
+            self.save(table, df)
+            return
+
+        # Encode just the new rows in file column order
+        buffer = io.StringIO()
+        rows.reindex(columns=header).to_csv(buffer, header=False, index=False)
+        text = buffer.getvalue()
+
+        path = self.path(table)
+        before = self.signature(table)
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) not in (b'\n', b'\r'):
+                text = os.linesep + text
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            f.write(text)
+        after = self.signature(table)
+
+        # Hand the parsed rows to the cache unless someone else wrote meanwhile
+        written = len(text.encode('utf-8'))
+        if before is None or after is None or after[1] != before[1] + written:
+            self.changed(table)
+        else:
+            TABLE_CACHE.append(self, table, text, header, before, after)
+
+    def update(self, table, key, key_value, values):
+        with self.lock(table):
+            self._journal(table, {
+                'op': 'update',
+                'key': key,
+                'key_value': to_python_value(key_value),
+                'values': {col: to_python_value(value) for col, value in values.items()},
+            })
+
+    def update_many(self, table, key, rows):
+        # One journal record for the whole batch, so it lands all at once
+        records = [
+            {col: to_python_value(value) for col, value in record.items()}
+            for record in rows.to_dict('records')
+        ]
+        with self.lock(table):
+            self._journal(table, {'op': 'update_many', 'key': key, 'rows': records})
+
+    def delete(self, table, column, values):
+        with self.lock(table):
+            self._journal(table, {
+                'op': 'delete',
+                'column': column,
+                'values': [to_python_value(value) for value in values],
+            })
+
+    def delete_many(self, deletes):
+        """
+        Deletes across tables are recorded as one pending change before any
+        table is touched, and the record is removed once every table's
+        journal has its delete. A crash in between leaves the record for
+        recover() to finish, so parents and children go together.
+        """
+        deletes = [(table, column, [to_python_value(value) for value in values]) for table, column, values in deletes]
+        pending = TableJournal(os.path.join(self.data_dir, ".journal", f"pending-{uuid.uuid4().hex}.jsonl"))
+        with self.lock_tables(table for table, _, _ in deletes):
+            pending.append({'op': 'delete_many', 'deletes': deletes})
+            for table, column, values in deletes:
+                self.delete(table, column, values)
+            pending.clear()
+
+    def recover(self):
+        for path in glob.glob(os.path.join(self.data_dir, ".journal", "pending-*.jsonl")):
+            pending = TableJournal(path)
+            records = pending.records()
+            if not records:
+                # Torn before it was acknowledged, so no table was touched
+                pending.clear()
+                continue
+            deletes = records[0]['deletes']
+
+            # Waits for the change to finish if another session is still making it
+            with self.lock_tables(table for table, _, _ in deletes):
+                if not os.path.exists(path):
+                    continue
+                for table, column, values in deletes:
+                    self.delete(table, column, values)
+                pending.clear()
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Stores every table in a single embedded SQLite database.
+    Primary and foreign key columns are indexed so single-row
+    updates and deletes don't rewrite the table.
+    """
+    name = "sqlite"
+
+    def __init__(self, data_dir="data", filename="whites.db"):
+        self.data_dir = data_dir
+        self.db_path = os.path.join(data_dir, filename)
+        self.columns = {}
+        self.types = {}
+        self._lock = threading.RLock()
+        os.makedirs(self.data_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS _table_versions (name TEXT PRIMARY KEY, version INTEGER)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _quote(name):
+        return '"' + str(name).replace('"', '""') + '"'
+
+    def _bump_version(self, conn, table):
+        conn.execute(
+            "INSERT INTO _table_versions (name, version) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+            (table,)
+        )
+
+    def signature(self, table):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version FROM _table_versions WHERE name = ?", (table,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def _table_columns(self, conn, table):
+        rows = conn.execute(f"PRAGMA table_info({self._quote(table)})").fetchall()
+        return [row[1] for row in rows]
+
+    def _add_missing_columns(self, conn, table, columns):
+        existing = self._table_columns(conn, table)
+        for col in columns:
+            if col not in existing:
+                conn.execute(f"ALTER TABLE {self._quote(table)} ADD COLUMN {self._quote(col)}")
+                existing.append(col)
+        self.columns[table] = existing
+        return existing
+
+    def ensure_table(self, table, columns, primary_key, indexes=(), types=None):
+        self.types[table] = dict(types or {})
+        with self._lock, self._connect() as conn:
+            created = not self._table_columns(conn, table)
+            if created:
+                column_sql = ", ".join(self._quote(col) for col in columns)
+                conn.execute(f"CREATE TABLE {self._quote(table)} ({column_sql})")
+            self._add_missing_columns(conn, table, columns)
+
+            # Index the primary key and any lookup columns
+            for col in [primary_key] + list(indexes):
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self._quote(f'idx_{table}_{col}')} "
+                    f"ON {self._quote(table)} ({self._quote(col)})"
+                )
+
+        # Migrate existing CSV data the first time the table is created
+        csv_path = os.path.join(self.data_dir, f"{table}.csv")
+        if created and os.path.exists(csv_path):
+            try:
+                existing_df = pd.read_csv(csv_path, dtype=read_dtypes(self.types[table], pd.read_csv(csv_path, nrows=0).columns))
+            except pd.errors.EmptyDataError:
+                existing_df = None
+            if existing_df is not None and not existing_df.empty:
+                self.insert(table, existing_df)
+
+    def load(self, table):
+        with self._lock, self._connect() as conn:
+            try:
+                df = pd.read_sql_query(f"SELECT * FROM {self._quote(table)}", conn)
+            except (sqlite3.OperationalError, pd.errors.DatabaseError):
+                df = pd.DataFrame(columns=self.columns.get(table, []))
+        return self.conform(table, df)
+
+    def save(self, table, df):
+        with self._lock, self._connect() as conn:
+            conn.execute(f"DELETE FROM {self._quote(table)}")
+            self._insert_rows(conn, table, df)
+            self._bump_version(conn, table)
+        self.changed(table)
+
+    def insert(self, table, rows):
+        with self._lock, self._connect() as conn:
+            self._insert_rows(conn, table, rows)
+            self._bump_version(conn, table)
+        self.changed(table)
+
+    def fetch_row(self, table, key, key_value):
+        with self._lock, self._connect() as conn:
+            df = pd.read_sql_query(
+                f"SELECT * FROM {self._quote(table)} WHERE {self._quote(key)} = ? LIMIT 1",
+                conn, params=[to_python_value(key_value)]
+            )
+        df = self.conform(table, df)
+        return None if df.empty else df.iloc[0].to_dict()
+
+    def _insert_rows(self, conn, table, rows):
+        if rows.empty:
+            return
+        columns = list(rows.columns)
+        self._add_missing_columns(conn, table, columns)
+        column_sql = ", ".join(self._quote(col) for col in columns)
+        placeholders = ", ".join("?" for _ in columns)
+        records = [
+            tuple(to_python_value(value) for value in row)
+            for row in rows.itertuples(index=False, name=None)
+        ]
+        conn.executemany(
+            f"INSERT INTO {self._quote(table)} ({column_sql}) VALUES ({placeholders})",
+            records
+        )
+
+    def update(self, table, key, key_value, values):
+        with self._lock, self._connect() as conn:
+            existing = self._table_columns(conn, table)
+            columns = [col for col in values if col in existing and col != key]
+            if not columns:
+                return
+            assignments = ", ".join(f"{self._quote(col)} = ?" for col in columns)
+            params = [to_python_value(values[col]) for col in columns]
+            params.append(to_python_value(key_value))
+            conn.execute(
+                f"UPDATE {self._quote(table)} SET {assignments} WHERE {self._quote(key)} = ?",
+                params
+            )
+            self._bump_version(conn, table)
+        self.changed(table)
+
+    def update_many(self, table, key, rows):
+        with self._lock, self._connect() as conn:
+            existing = self._table_columns(conn, table)
+            columns = [col for col in rows.columns if col in existing and col != key]
+            if not columns or rows.empty:
+                return
+            assignments = ", ".join(f"{self._quote(col)} = ?" for col in columns)
+            params = [
+                tuple(to_python_value(value) for value in record)
+                for record in rows[columns + [key]].itertuples(index=False, name=None)
+            ]
+            conn.executemany(
+                f"UPDATE {self._quote(table)} SET {assignments} WHERE {self._quote(key)} = ?",
+                params
+            )
+            self._bump_version(conn, table)
+        self.changed(table)
+
+    def delete(self, table, column, values):
+        self.delete_many([(table, column, values)])
+
+    def delete_many(self, deletes):
+        deletes = [(table, column, [to_python_value(value) for value in values]) for table, column, values in deletes]
+        deletes = [(table, column, values) for table, column, values in deletes if values]
+
+        # One transaction, so parent and child rows go together
+        with self._lock, self._connect() as conn:
+            for table, column, values in deletes:
+                # Delete in batches to stay under SQLite's parameter limit
+                for start in range(0, len(values), 500):
+                    batch = values[start:start + 500]
+                    placeholders = ", ".join("?" for _ in batch)
+                    conn.execute(
+                        f"DELETE FROM {self._quote(table)} WHERE {self._quote(column)} IN ({placeholders})",
+                        batch
+                    )
+                self._bump_version(conn, table)
+        for table in {table for table, _, _ in deletes}:
+            self.changed(table)
+
+
+STORAGE_BACKENDS = {
+    CSVStorage.name: CSVStorage,
+    SQLiteStorage.name: SQLiteStorage,
+}
+
+
+def get_storage_backend(name=None, data_dir="data"):
+    """
+    Create a storage backend by name.
+    Defaults to the WHITES_STORAGE environment variable, then CSV.
+    """
+    name = (name or os.environ.get("WHITES_STORAGE") or CSVStorage.name).lower()
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}'. Use one of: {', '.join(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[name](data_dir=data_dir)
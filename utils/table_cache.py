@@ -0,0 +1,168 @@
+import io
+import threading
+
+import pandas as pd
+
+from utils.schema import concat_frames
+
+# Loaded tables are shared between every session in the process, so callers
+# get shallow copies. Entry points turn on pandas copy-on-write at startup,
+# which stops those copies mutating the cached frame.
+
+
+class TableCache:
+    """
+    Process-wide cache of parsed tables.
+    Entries are keyed on (storage, table) and validated against the storage
+    signature (file mtime and size for CSV), so an unchanged table is never
+    parsed twice. Write methods bump the table's version counter.
+    Appended rows are kept as small delta frames and compacted into the
+    cached table on the next read, so an insert never reparses the file.
+    Journaled updates and deletes are applied to the cached frame in memory.
+    """
+
+    # Fold pending appends into the cached frame once this many build up
+    max_pending_appends = 64
+
+    def __init__(self):
+        self._entries = {}
+        self._versions = {}
+        # Last storage signature seen for each table, kept when its entry is
+        # dropped so a change by another process is still noticed
+        self._seen = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def get(self, storage, table):
+        """Return a copy-on-write view of a table, loading it if it changed"""
+        key = (storage.cache_key, table)
+        with self._key_lock(key):
+            signature = storage.signature(table)
+            entry = self._entries.get(key)
+            if entry is None or signature is None or entry[0] != signature:
+                df = storage.load(table)
+                self._observe(key, signature)
+                entry = [signature, df, []]
+                if signature is not None:
+                    self._entries[key] = entry
+            elif entry[2]:
+                self._compact(entry)
+        return entry[1].copy(deep=False)
+
+    def append(self, storage, table, text, header, before, after):
+        """
+        Record CSV text appended to a table without reloading it.
+        `before` and `after` are the storage signatures around the append;
+        if the cached copy wasn't current beforehand it is dropped instead.
+        """
+        key = (storage.cache_key, table)
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != before or after is None:
+                self._entries.pop(key, None)
+            else:
+                # Parse the new rows with the table's declared column types
+                rows = storage.read(table, io.StringIO(text), header, header=None, names=header)
+                entry[0] = after
+                entry[2].append(rows)
+                if len(entry[2]) >= self.max_pending_appends:
+                    self._compact(entry)
+            self._bump(key)
+            self._seen[key] = after
+
+    def apply(self, storage, table, change, before, after):
+        """
+        Apply a journaled change to the cached table without reloading it.
+        `change` takes the cached frame and returns the changed one; if the
+        cached copy wasn't current at `before` it is dropped instead.
+        """
+        key = (storage.cache_key, table)
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != before or after is None:
+                self._entries.pop(key, None)
+            else:
+                if entry[2]:
+                    self._compact(entry)
+                # A shallow copy, so copy-on-write protects frames already handed out
+                entry[1] = change(entry[1].copy(deep=False))
+                entry[0] = after
+            self._bump(key)
+            self._seen[key] = after
+
+    def rebase(self, storage, table, before, after):
+        """
+        Carry the cached table over a storage change that kept its contents
+        (folding the journal into the file), without bumping its version
+        """
+        key = (storage.cache_key, table)
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == before and after is not None:
+                entry[0] = after
+                self._seen[key] = after
+            elif entry is not None:
+                self._entries.pop(key, None)
+                self._bump(key)
+                self._seen[key] = after
+
+    @staticmethod
+    def _compact(entry):
+        """Fold pending appended rows into the cached frame"""
+        base = entry[1]
+        if base.empty:
+            df = concat_frames(entry[2])
+            df = df.reindex(columns=list(base.columns) + [c for c in df.columns if c not in base.columns])
+        else:
+            df = concat_frames([base] + entry[2])
+        entry[1] = df
+        entry[2] = []
+
+    def version(self, storage, table):
+        """Return the table's version counter, noticing external changes"""
+        key = (storage.cache_key, table)
+        if key in self._seen:
+            signature = storage.signature(table)
+            if signature != self._seen[key]:
+                with self._key_lock(key):
+                    entry = self._entries.get(key)
+                    if entry is not None and entry[0] != signature:
+                        self._entries.pop(key, None)
+                    self._observe(key, signature)
+        return self._versions.get(key, 0)
+
+    def invalidate(self, storage, table):
+        """Drop a cached table and bump its version after a write"""
+        key = (storage.cache_key, table)
+        with self._key_lock(key):
+            self._entries.pop(key, None)
+            self._bump(key)
+            # Writes hold the table lock, so this is the signature of our own write
+            self._seen[key] = storage.signature(table)
+
+    def _observe(self, key, signature):
+        """Record the signature a table was read at, bumping its version if it changed"""
+        if key in self._seen and self._seen[key] != signature:
+            self._bump(key)
+        self._seen[key] = signature
+
+    def _bump(self, key):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def clear(self):
+        """Drop every cached table"""
+        with self._lock:
+            for key in list(self._entries):
+                self._versions[key] = self._versions.get(key, 0) + 1
+            self._entries.clear()
+
+
+# Shared by every DataManager in the process
+TABLE_CACHE = TableCache()
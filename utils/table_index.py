@@ -0,0 +1,146 @@
+import bisect
+import threading
+
+
+class TableIndex:
+    """
+    Base class for in-memory structures derived from tables and kept up to
+    date by DataManager writes.
+    State is built once per (storage, name) from the tables returned by
+    `sources(name)` and stamped with their versions. A write that moves a
+    source table's version on by exactly one is applied incrementally;
+    anything else (an external edit to the file, another writer in
+    between) drops the state so it is rebuilt on next use.
+    """
+
+    # Tables this index is built from
+    tables = ()
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.RLock()
+
+    def sources(self, name):
+        """Tables the state called `name` is built from, in build() argument order"""
+        return (name,)
+
+    def build(self, name, *frames):
+        """Build the state from the source tables"""
+        raise NotImplementedError
+
+    def save(self, state, table, df):
+        """Replace the state after a whole-table save; return False to force a rebuild"""
+        return False
+
+    def insert(self, state, table, rows):
+        """Add inserted rows to the state; return False to force a rebuild"""
+        return False
+
+    def update(self, state, table, key, key_value, values):
+        """Apply a single-row update to the state; return False to force a rebuild"""
+        return False
+
+    def update_many(self, state, table, key, rows):
+        """Apply a bulk update (a DataFrame of rows) through update(); return False to force a rebuild"""
+        for values in rows.to_dict('records'):
+            if not self.update(state, table, key, values[key], values):
+                return False
+        return True
+
+    def delete(self, state, table, column, values):
+        """Remove deleted rows from the state; return False to force a rebuild"""
+        return False
+
+    def _versions(self, data_manager, name):
+        return tuple(data_manager.table_version(table) for table in self.sources(name))
+
+    def get(self, data_manager, name):
+        """Return the state called `name`, building it if a source table changed"""
+        key = (data_manager.storage.cache_key, name)
+        with self._lock:
+            entry = self._states.get(key)
+            versions = self._versions(data_manager, name)
+            if entry is not None and tuple(entry[0]) == versions:
+                return entry[1]
+
+            frames = [data_manager._load_table(table) for table in self.sources(name)]
+            state = self.build(name, *frames)
+
+            # Only keep the state if nothing was written while it was built
+            if self._versions(data_manager, name) == versions:
+                self._states[key] = [list(versions), state]
+            return state
+
+    def apply(self, data_manager, table, op, args, before, after):
+        """Pass a storage write on to every state built from its table"""
+        if table not in self.tables:
+            return
+        with self._lock:
+            for key, entry in list(self._states.items()):
+                if key[0] != data_manager.storage.cache_key:
+                    continue
+                sources = self.sources(key[1])
+                if table not in sources:
+                    continue
+                position = sources.index(table)
+                if entry[0][position] == after:
+                    continue
+                applied = False
+                if entry[0][position] == before and after == before + 1:
+                    applied = getattr(self, op)(entry[1], table, *args)
+                if applied:
+                    entry[0][position] = after
+                else:
+                    self._states.pop(key, None)
+
+    def clear(self):
+        """Drop every built state"""
+        with self._lock:
+            self._states.clear()
+
+
+class SortedIndex:
+    """
+    Items kept ordered by a numeric sort key, like a priority queue that
+    can also be read by range. Moving or removing an item is O(log n) to
+    find plus a list shift, and range lookups cost O(log n + matches).
+    """
+
+    def __init__(self):
+        self.order = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.order)
+
+    def set(self, item, sort_key):
+        """Place an item at a new sort key; a key of None removes it"""
+        self.remove(item)
+        if sort_key is None:
+            return
+        position = (sort_key, item)
+        self.positions[item] = position
+        bisect.insort(self.order, position)
+
+    def remove(self, item):
+        position = self.positions.pop(item, None)
+        if position is not None:
+            index = bisect.bisect_left(self.order, position)
+            if index < len(self.order) and self.order[index] == position:
+                del self.order[index]
+
+    def between(self, low=None, high=None):
+        """(sort_key, item) pairs with low < sort_key <= high, lowest first"""
+        start = 0 if low is None else bisect.bisect_right(self.order, low, key=lambda position: position[0])
+        end = len(self.order) if high is None else bisect.bisect_right(self.order, high, key=lambda position: position[0])
+        return self.order[start:end]
+
+
+# Indexes that DataManager keeps up to date on every write
+TABLE_INDEXES = []
+
+
+def register_index(index):
+    """Add an index to the set maintained by DataManager writes"""
+    TABLE_INDEXES.append(index)
+    return index
@@ -1,4 +1,5 @@
 import re
+import pandas as pd
 from datetime import datetime
 
 def validate_weight(weight):
@@ -157,3 +158,115 @@ def validate_maintenance_data(maintenance_data):
         errors.append(f"Invalid maintenance type. Must be one of: {', '.join(valid_types)}")
     
     return len(errors) == 0, errors
+
+# Frame validators used by the bulk importer. Each one applies the same
+# rules as the single-record validators above to a whole DataFrame and
+# returns a Series with an error message per row ('' for valid rows).
+
+def blank_rows(df, column):
+    """Rows where a column is missing or empty"""
+    if column not in df.columns:
+        return pd.Series(True, index=df.index)
+    values = df[column]
+    return values.isna() | (values.astype(str).str.strip() == '')
+
+def column_numbers(df, column):
+    """Column as numbers, with NaN for anything unparseable"""
+    if column not in df.columns:
+        return pd.Series(float('nan'), index=df.index)
+    return pd.to_numeric(df[column], errors='coerce')
+
+def invalid_dates(df, column):
+    """Rows with a date that isn't in YYYY-MM-DD format"""
+    if column not in df.columns:
+        return pd.Series(False, index=df.index)
+    parsed = pd.to_datetime(df[column].astype(str), format='%Y-%m-%d', errors='coerce')
+    return parsed.isna() & ~blank_rows(df, column)
+
+def collect_errors(df, checks):
+    """Combine (mask, message) checks into one message per row"""
+    errors = pd.Series('', index=df.index, dtype=object)
+    for mask, message in checks:
+        mask = mask.fillna(False).astype(bool)
+        errors = errors.where(~mask, errors + message + '; ')
+    return errors.str.rstrip('; ')
+
+def required_checks(df, required_fields):
+    return [(blank_rows(df, field), f"Field '{field}' is required") for field in required_fields]
+
+def optional_number_checks(df, column, minimum, message, strict=False):
+    """Check a number only where a value was given"""
+    given = ~blank_rows(df, column)
+    number = column_numbers(df, column)
+    too_small = number <= minimum if strict else number < minimum
+    return [
+        (given & number.isna(), f"{column} must be a valid number"),
+        (given & too_small, message),
+    ]
+
+def validate_vehicle_frame(df):
+    """
+    Validate every row of a vehicle import
+    """
+    current_year = datetime.now().year
+    year = column_numbers(df, 'year')
+    plates = df['license_plate'].astype(str).str.replace(' ', '').str.upper() if 'license_plate' in df.columns else pd.Series('', index=df.index)
+    
+    checks = required_checks(df, ['make', 'model', 'year', 'weight', 'license_plate', 'mileage'])
+    checks += [
+        (~blank_rows(df, 'year') & ((year < 1900) | (year > current_year + 1) | year.isna()),
+         f"Year must be between 1900 and {current_year + 1}"),
+        (~blank_rows(df, 'license_plate') & ~plates.str.fullmatch(r'[A-Z0-9-]{2,8}'),
+         "Invalid license plate format"),
+    ]
+    checks += optional_number_checks(df, 'weight', 0, "Weight must be greater than 0 tonnes", strict=True)
+    checks += optional_number_checks(df, 'mileage', 0, "Mileage cannot be negative")
+    return collect_errors(df, checks)
+
+def validate_machine_frame(df):
+    """
+    Validate every row of a machine import
+    """
+    current_year = datetime.now().year
+    year = column_numbers(df, 'year')
+    
+    checks = required_checks(df, ['make', 'model'])
+    checks += [
+        (~blank_rows(df, 'year') & ((year < 1900) | (year > current_year + 1) | year.isna()),
+         f"Year must be between 1900 and {current_year + 1}"),
+    ]
+    checks += optional_number_checks(df, 'weight', 0, "Weight must be greater than 0 tonnes", strict=True)
+    checks += optional_number_checks(df, 'hours', 0, "Hours cannot be negative")
+    return collect_errors(df, checks)
+
+def validate_maintenance_frame(df):
+    """
+    Validate every row of a maintenance import
+    """
+    checks = required_checks(df, ['vehicle_id', 'date', 'type', 'description', 'cost', 'mileage'])
+    checks += [(invalid_dates(df, 'date'), "Invalid date format (use YYYY-MM-DD)")]
+    checks += optional_number_checks(df, 'cost', 0, "Cost cannot be negative")
+    checks += optional_number_checks(df, 'mileage', 0, "Mileage cannot be negative")
+    return collect_errors(df, checks)
+
+def validate_equipment_frame(df):
+    """
+    Validate every row of an equipment import
+    """
+    checks = required_checks(df, ['name', 'category', 'daily_rate'])
+    checks += optional_number_checks(df, 'daily_rate', 0, "Daily rate cannot be negative")
+    checks += optional_number_checks(df, 'weekly_rate', 0, "Weekly rate cannot be negative")
+    return collect_errors(df, checks)
+
+def validate_rental_frame(df):
+    """
+    Validate every row of a rental import
+    """
+    checks = required_checks(df, ['equipment_id', 'customer_name', 'start_date'])
+    checks += [
+        (invalid_dates(df, 'start_date'), "Invalid start date format (use YYYY-MM-DD)"),
+        (invalid_dates(df, 'expected_return_date'), "Invalid expected return date format (use YYYY-MM-DD)"),
+        (invalid_dates(df, 'actual_return_date'), "Invalid actual return date format (use YYYY-MM-DD)"),
+    ]
+    checks += optional_number_checks(df, 'rental_rate', 0, "Rental rate cannot be negative")
+    return collect_errors(df, checks)